@@ -0,0 +1,89 @@
+# bench_acquisition.py
+# Mô phỏng thu mẫu theo ngắt FIFO gần đầy với cảm biến và chân INT giả lập, đồng thời chạy một
+# "vòng lặp hiển thị" chặn CPU định kỳ (như oled.show()). So sánh với cách đọc từng mẫu mỗi 100 ms cũ.
+# Chạy trên máy tính: python bench/bench_acquisition.py
+import json
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+import host
+host.install()
+
+import micropython
+from machine import Pin
+import max30102
+from acquisition import InterruptAcquisition
+from sim_max30102 import SimulatedMAX30102, sine_source
+
+SAMPLE_RATE = 100
+DURATION_S = 30
+STEP_S = 0.001
+FRAME_PERIOD_S = 0.1     # Chu kỳ vòng lặp hiển thị
+FRAME_BLOCK_S = 0.045    # Thời gian CPU bị chặn trong lệnh C dài (vẽ + show qua SoftI2C)
+
+
+def run_interrupt():
+    pin = Pin(15, Pin.IN, Pin.PULL_UP)
+    dev = SimulatedMAX30102(sine_source(sample_rate=SAMPLE_RATE), SAMPLE_RATE, int_pin=pin)
+    sensor = max30102.MAX30102(dev)
+    delivered_at = []
+
+    def on_batch(n):
+        delivered_at.append((t, n))
+    acq = InterruptAcquisition(sensor, pin, almost_full=24, on_batch=on_batch)
+    acq.start()
+
+    t = 0.0
+    blocked_until = -1.0
+    next_frame = 0.0
+    steps = int(DURATION_S / STEP_S)
+    for i in range(steps):
+        t = i * STEP_S
+        dev.advance(STEP_S)
+        if t >= next_frame:
+            next_frame += FRAME_PERIOD_S
+            blocked_until = t + FRAME_BLOCK_S
+        if t >= blocked_until:
+            micropython.run_scheduled()
+    acq.stop()
+
+    # Độ trễ giao mẫu: thời điểm mẫu cuối của mỗi lô được sinh ra đến khi lô được xử lý
+    gaps = [delivered_at[k][0] - delivered_at[k - 1][0] for k in range(1, len(delivered_at))]
+    stats = acq.stats()
+    stats.update({
+        'generated': dev.samples_generated,
+        'lost': dev.samples_generated - stats['samples'] - len(dev.fifo),
+        'interrupts_per_s': stats['interrupts'] / DURATION_S,
+        'samples_per_batch': stats['samples'] / max(1, stats['batches']),
+        'i2c_transactions_per_s': dev.transactions / DURATION_S,
+        'max_batch_gap_ms': max(gaps) * 1000 if gaps else 0,
+    })
+    return stats
+
+
+def run_polling():
+    # Cách cũ: mỗi khung hình đọc đúng một mẫu (read_fifo), phần còn lại bị tràn FIFO
+    dev = SimulatedMAX30102(sine_source(sample_rate=SAMPLE_RATE), SAMPLE_RATE)
+    sensor = max30102.MAX30102(dev)
+    dev.regs[0x08] |= 0x10  # Cấu hình cũ ghi đè khi đầy
+    read = 0
+    t = 0.0
+    while t < DURATION_S:
+        dev.advance(FRAME_PERIOD_S + FRAME_BLOCK_S)
+        sensor.read_fifo()
+        read += 1
+        t += FRAME_PERIOD_S + FRAME_BLOCK_S
+    return {'generated': dev.samples_generated, 'samples': read, 'lost': dev.samples_generated - read}
+
+
+def main():
+    results = {'interrupt': run_interrupt(), 'polling_single_sample': run_polling()}
+    for name, r in results.items():
+        print("{:22s} generated {:6d}  delivered {:6d}  lost {:6d}".format(
+            name, r['generated'], r['samples'], r['lost']))
+    print(json.dumps(results))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,84 @@
+# bench_display.py
+# So sánh thời gian vẽ một khung hình và lượng bộ nhớ cấp phát mỗi khung giữa đường vẽ chữ cũ
+# (Writer + f-string) và bộ đệm chữ dựng sẵn (text_cache). Chạy: mpremote run bench/bench_display.py
+# hoặc trên máy tính với module giả lập: python bench/bench_display.py
+import gc
+import time
+
+try:
+    import host  # Chỉ có khi chạy trên máy tính (bench/host.py)
+    host.install()
+except ImportError:
+    pass
+
+I2C_SCL_PIN = 14
+I2C_SDA_PIN = 12
+FRAMES = 200
+
+
+def _mem_alloc():
+    # Chỉ MicroPython có gc.mem_alloc(); trên máy tính không đo được (None)
+    return gc.mem_alloc() if hasattr(gc, 'mem_alloc') else None
+
+
+def run_mode(display, history, frames, cached, page):
+    display.use_text_cache = cached
+    display.current_mode = page
+    display.display_mode = "numerical"
+    draw_us = total_us = 0
+    gc.collect()
+    gc.disable()
+    mem0 = _mem_alloc()
+    for i in range(frames):
+        # Giá trị đổi chậm như khi đo thật (khoảng 1 lần mỗi giây ở 10 khung/giây)
+        hr = 60 + (i // 10) % 40
+        spo2 = 95 + (i // 30) % 5
+        t0 = time.ticks_us()
+        display.begin_frame()
+        if page == "measurement":
+            display.display_data(hr, spo2, hr + 1)
+        else:
+            display.display_history_data(history)
+        display.display_battery(80)
+        t1 = time.ticks_us()
+        display.end_frame()
+        t2 = time.ticks_us()
+        draw_us += time.ticks_diff(t1, t0)
+        total_us += time.ticks_diff(t2, t0)
+    alloc = _mem_alloc() - mem0 if mem0 is not None else None
+    gc.enable()
+    return {
+        'draw_us': draw_us // frames,
+        'frame_us': total_us // frames,
+        'alloc_bytes_per_frame': alloc // frames if alloc is not None else None,
+    }
+
+
+def main():
+    from machine import Pin, SoftI2C
+    from oled import OLEDDisplay
+    from history_manager import HistoryManager
+
+    i2c = SoftI2C(scl=Pin(I2C_SCL_PIN), sda=Pin(I2C_SDA_PIN))
+    if hasattr(i2c, 'attach'):
+        # Bus giả lập: gắn màn hình mô phỏng ở địa chỉ 0x3C
+        from sim_ssd1306 import SimulatedSSD1306
+        i2c.attach(0x3C, SimulatedSSD1306())
+    display = OLEDDisplay(i2c)
+    history = HistoryManager()
+    history.add_record("2025-01-01 08:00:00", 72, 98)
+    history.add_record("2025-01-01 09:00:00", 75, 97)
+
+    results = {}
+    for page in ("measurement", "history"):
+        for cached in (False, True):
+            name = "{}_{}".format(page, "cached" if cached else "writer")
+            results[name] = r = run_mode(display, history, FRAMES, cached, page)
+            print("{}: draw {} us, frame {} us, {} B/frame".format(
+                name, r['draw_us'], r['frame_us'], r['alloc_bytes_per_frame']))
+    print('{' + ', '.join('"{}": {{"draw_us": {}, "frame_us": {}, "alloc_bytes_per_frame": {}}}'.format(
+        k, v['draw_us'], v['frame_us'], 'null' if v['alloc_bytes_per_frame'] is None else v['alloc_bytes_per_frame'])
+        for k, v in results.items()) + '}')
+
+
+main()
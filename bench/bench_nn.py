@@ -0,0 +1,89 @@
+# bench_nn.py
+# So sánh độ trễ và bộ nhớ giữa mô hình joblib (scikit-learn) và mô hình rút gọn CompactMLP.
+# Chạy trên máy tính: python bench/bench_nn.py nn_model.pkl nn_model.bin
+import json
+import os
+import sys
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'src'))
+
+import numpy as np
+
+N_SINGLE = 2000
+N_BATCH = 10000
+
+
+def measure_load(loader):
+    # Thời gian nạp (tính cả import thư viện) và bộ nhớ cấp phát đỉnh trong lúc nạp
+    tracemalloc.start()
+    t0 = time.perf_counter()
+    model = loader()
+    load_s = time.perf_counter() - t0
+    current, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return model, load_s, current, peak
+
+
+def measure_single(predict, X):
+    times = []
+    for x in X[:N_SINGLE]:
+        t0 = time.perf_counter()
+        predict(x)
+        times.append(time.perf_counter() - t0)
+    times.sort()
+    return times[len(times) // 2] * 1e6, times[int(len(times) * 0.99)] * 1e6
+
+
+def measure_batch(predict_batch, X):
+    t0 = time.perf_counter()
+    predict_batch(X)
+    return len(X) / (time.perf_counter() - t0)
+
+
+def main():
+    if len(sys.argv) != 3:
+        print("Usage: python bench/bench_nn.py <nn_model.pkl> <nn_model.bin>")
+        sys.exit(1)
+    pkl_path, bin_path = sys.argv[1], sys.argv[2]
+
+    def load_joblib():
+        import joblib
+        return joblib.load(pkl_path)
+
+    def load_compact():
+        from nn_model import CompactMLP
+        return CompactMLP(bin_path)
+
+    sk_model, sk_load, sk_mem, sk_peak = measure_load(load_joblib)
+    nn_model, nn_load, nn_mem, nn_peak = measure_load(load_compact)
+
+    rng = np.random.default_rng(0)
+    X = rng.normal(np.asarray(nn_model.in_mean), np.asarray(nn_model.in_scale), (N_BATCH, nn_model.n_features))
+    rows = [list(map(float, x)) for x in X]
+
+    sk_p50, sk_p99 = measure_single(lambda x: sk_model.predict([x])[0], rows)
+    nn_p50, nn_p99 = measure_single(nn_model.predict, rows)
+    sk_batch = measure_batch(sk_model.predict, X)
+    nn_batch = measure_batch(nn_model.predict_batch, X)
+    err = np.abs(nn_model.predict_batch(X) - sk_model.predict(X))
+
+    results = {
+        'joblib': {'file_bytes': os.path.getsize(pkl_path), 'load_s': sk_load, 'load_alloc_bytes': sk_mem,
+                   'load_peak_bytes': sk_peak, 'single_p50_us': sk_p50, 'single_p99_us': sk_p99,
+                   'batch_per_s': sk_batch},
+        'compact': {'file_bytes': os.path.getsize(bin_path), 'weight_bytes': nn_model.size_bytes(),
+                    'load_s': nn_load, 'load_alloc_bytes': nn_mem, 'load_peak_bytes': nn_peak,
+                    'single_p50_us': nn_p50, 'single_p99_us': nn_p99, 'batch_per_s': nn_batch},
+        'abs_error': {'mean': float(err.mean()), 'max': float(err.max())},
+    }
+    for name in ('joblib', 'compact'):
+        r = results[name]
+        print("{:8s} file {:>8d} B  load {:7.3f} s  peak {:>10d} B  single p50 {:8.1f} us  batch {:>10.0f}/s".format(
+            name, r['file_bytes'], r['load_s'], r['load_peak_bytes'], r['single_p50_us'], r['batch_per_s']))
+    print(json.dumps(results))
+
+
+if __name__ == "__main__":
+    main()
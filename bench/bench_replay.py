@@ -0,0 +1,135 @@
+# bench_replay.py
+# Chạy lại một bản ghi thật qua toàn bộ chuỗi xử lý MAX30102 trên máy tính: đo tốc độ xử lý và lấy
+# chuỗi HR/SpO2/NN HR theo từng giây; so sánh với kết quả chuẩn đã lưu để phát hiện hồi quy.
+# Chạy: python bench/bench_replay.py rec0001.raw [--save-baseline base.json | --baseline base.json]
+#       python bench/bench_replay.py --synthetic 60   (tự tạo bản ghi từ cảm biến mô phỏng, mặc định
+#                                                      ghi vào thư mục tạm của hệ thống)
+import argparse
+import json
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+import host
+host.install()
+
+import max30102
+from fifo_recorder import RecordingI2C
+from replay import ReplayI2C, replay
+from sim_max30102 import SimulatedMAX30102, sine_source
+
+SYNTHETIC_PATH = os.path.join(tempfile.gettempdir(), 'synthetic.raw')
+
+# Sai lệch tối đa cho phép so với kết quả chuẩn, theo từng giây
+TOLERANCES = {'hr': 2.0, 'spo2': 1.0, 'nn_hr': 2.0}
+
+
+def make_synthetic(path, seconds, bpm=72):
+    # Ghi một bản ghi qua RecordingI2C từ cảm biến mô phỏng (cũng là phép thử cho bộ ghi)
+    dev = SimulatedMAX30102(sine_source(bpm=bpm))
+    rec = RecordingI2C(dev, path)
+    sensor = max30102.MAX30102(rec)
+    for _ in range(int(seconds / 0.25)):
+        dev.advance(0.25)
+        sensor.read_fifo_burst()
+    rec.close()
+    return path
+
+
+def run(path, model=None, speed=None):
+    dev = ReplayI2C(path)
+    kwargs = {'compact_model_path': model} if model else {}
+    sensor = max30102.MAX30102(dev, **kwargs)
+    trace = []
+    next_report = [1.0]
+
+    def on_block(t):
+        if t + 1e-9 < next_report[0]:
+            return
+        next_report[0] += 1.0
+        nn_hr = sensor.predict_heart_rate() if model else None
+        trace.append({'t': round(t, 2), 'hr': round(sensor.calculate_heart_rate(), 2),
+                      'spo2': round(sensor.calculate_spo2(), 2),
+                      'nn_hr': round(nn_hr, 2) if nn_hr is not None else None})
+
+    t0 = time.perf_counter()
+    duration = replay(sensor, dev, speed=speed, on_block=on_block)
+    wall = time.perf_counter() - t0
+    samples = dev.samples_generated
+    first_hr = next((p['t'] for p in trace if p['hr']), None)
+    return {
+        'recording': os.path.basename(path),
+        'sample_rate': dev.sample_rate,
+        'samples': samples,
+        'duration_s': round(duration, 2),
+        'wall_s': round(wall, 3),
+        'x_realtime': round(duration / wall, 1) if wall else None,
+        'us_per_sample': round(wall * 1e6 / samples, 1) if samples else None,
+        'overflow': sensor.overflow_count,
+        'time_to_first_hr_s': first_hr,
+        'final': trace[-1] if trace else None,
+        'trace': trace,
+    }
+
+
+def compare(result, baseline):
+    """
+    So sánh chuỗi kết quả với kết quả chuẩn.
+    Returns:
+        dict: Sai lệch lớn nhất của từng đại lượng và danh sách đại lượng vượt ngưỡng.
+    """
+    base = {p['t']: p for p in baseline['trace']}
+    worst = {key: 0.0 for key in TOLERANCES}
+    for p in result['trace']:
+        ref = base.get(p['t'])
+        if ref is None:
+            continue
+        for key in TOLERANCES:
+            if p[key] is None or ref[key] is None:
+                continue
+            worst[key] = max(worst[key], abs(p[key] - ref[key]))
+    failed = [key for key in TOLERANCES if worst[key] > TOLERANCES[key]]
+    return {'max_abs_diff': worst, 'failed': failed}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Replay a MAX30102 recording through the processing pipeline")
+    parser.add_argument('recording', nargs='?', help=".raw (RecordingI2C) or .bin (SDLogger) file")
+    parser.add_argument('--synthetic', type=float, metavar='SECONDS', help="record a simulated sensor first (to RECORDING, or a temp file)")
+    parser.add_argument('--model', help="compact NN model (.bin) for NN HR predictions")
+    parser.add_argument('--speed', type=float, help="playback speed relative to real time (default: max)")
+    parser.add_argument('--baseline', help="compare against a saved result, exit 1 on regression")
+    parser.add_argument('--save-baseline', help="save this result as a baseline")
+    args = parser.parse_args()
+
+    path = args.recording
+    if args.synthetic:
+        path = make_synthetic(path or SYNTHETIC_PATH, args.synthetic)
+    if not path:
+        parser.error("a recording or --synthetic is required")
+
+    result = run(path, args.model, args.speed)
+    if args.save_baseline:
+        with open(args.save_baseline, 'w') as f:
+            json.dump(result, f, indent=1)
+    status = 0
+    if args.baseline:
+        with open(args.baseline) as f:
+            result['regression'] = compare(result, json.load(f))
+        status = 1 if result['regression']['failed'] else 0
+
+    print("{}: {} samples, {:.1f} s replayed in {:.3f} s ({}x real time, {} us/sample)".format(
+        result['recording'], result['samples'], result['duration_s'], result['wall_s'],
+        result['x_realtime'], result['us_per_sample']))
+    if result['final']:
+        print("final HR {hr} bpm, SpO2 {spo2}%, NN HR {nn_hr}".format(**result['final']))
+    summary = dict(result)
+    summary.pop('trace')
+    print(json.dumps(summary))
+    sys.exit(status)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,112 @@
+# bench_sensor_array.py
+# Benchmark SensorArray trên bus giả lập: 1-8 MAX30102 mô phỏng sau TCA9548A mô phỏng, mỗi kênh một
+# tín hiệu khác nhau. Đo số mẫu/giây thực tế mỗi kênh, số mẫu bị tràn FIFO, tải bus (từ số byte và
+# giao dịch đếm được) và sai số HR của từng kênh (các chuỗi xử lý phải độc lập), kèm bảng capacity().
+# Chạy: python bench/bench_sensor_array.py [--duration 30] [--poll-ms 50] [--us-per-sample 120] [--json]
+import argparse
+import json
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+import host
+host.install()
+
+from machine import I2C
+from power_profiles import I2C_BITS_PER_BYTE
+from ppg_synth import PPGGenerator
+from sensor_array import SensorArray, capacity
+from sim_max30102 import SimulatedMAX30102
+from sim_tca9548a import SimulatedTCA9548A
+
+RATES = (50, 100, 200, 400)
+CHANNEL_HR = (62, 75, 88, 101, 114, 127, 70, 95)   # Mỗi kênh một nhịp tim khác nhau
+SETTLE_S = 10
+I2C_FREQ = 400000
+
+
+def _bus_us(bus):
+    # Xấp xỉ: mỗi giao dịch thêm khoảng 2 byte địa chỉ/thanh ghi
+    return (bus.bytes_read + bus.bytes_written + 2 * bus.transactions) * I2C_BITS_PER_BYTE * 1e6 / bus.freq
+
+
+def run_array(n_channels, rate, duration, poll_ms):
+    bus = I2C(0, freq=I2C_FREQ)
+    mux = bus.attach(0x70, SimulatedTCA9548A())
+    bus.attach(0x57, mux)
+    gens = []
+    devs = []
+    for ch in range(n_channels):
+        gen = PPGGenerator(hr=CHANNEL_HR[ch], sample_rate=rate, seed=ch)
+        gens.append(gen)
+        devs.append(mux.attach(ch, SimulatedMAX30102(gen, rate)))
+    array = SensorArray(bus, channels=range(n_channels))
+    array.configure(sample_rate=rate)
+    array.start_measurement()
+    base = (bus.transactions, bus.bytes_read, bus.bytes_written)
+    bus.transactions = bus.bytes_read = bus.bytes_written = 0
+    poll_s = poll_ms / 1000
+    busy = 0.0
+    hr_err = [[] for _ in range(n_channels)]
+    steps = int(duration / poll_s)
+    per_second = int(round(1 / poll_s))
+    for step in range(steps):
+        for dev in devs:
+            dev.advance(poll_s)
+        t0 = time.perf_counter()
+        array.poll()
+        busy += time.perf_counter() - t0
+        if (step + 1) * poll_s >= SETTLE_S and (step + 1) % per_second == 0:
+            for ch, hr, _ in array.results():
+                hr_err[ch].append(abs(hr - gens[ch].hr) if hr else gens[ch].hr)
+    samples = sum(array.samples)
+    report = array.report()
+    return {
+        'channels': n_channels,
+        'sample_rate_hz': rate,
+        'min_samples_per_s': round(min(array.samples) / duration, 1),
+        'overflow': sum(c['overflow'] for c in report['channels']),
+        'bus_utilization': round(_bus_us(bus) / (duration * 1e6), 3),
+        'mux_switches_per_s': round(array.mux.switches / duration, 1),
+        'host_us_per_sample': round(busy * 1e6 / samples, 2) if samples else None,
+        'hr_mae_per_channel': [round(sum(e) / len(e), 2) if e else None for e in hr_err],
+        'setup_transactions': base[0],
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="SensorArray throughput on a simulated TCA9548A bus")
+    parser.add_argument('--duration', type=float, default=30)
+    parser.add_argument('--poll-ms', type=int, default=50, help="Chu kỳ gọi SensorArray.poll()")
+    parser.add_argument('--us-per-sample', type=float, default=120,
+                        help="Thời gian xử lý một mẫu trên thiết bị (us) cho bảng capacity()")
+    parser.add_argument('--max-channels', type=int, default=8)
+    parser.add_argument('--json', action='store_true', help="In kết quả dạng JSON")
+    args = parser.parse_args()
+    runs = []
+    for rate in RATES:
+        for n in (1, 2, 4, args.max_channels):
+            if n <= args.max_channels:
+                runs.append(run_array(n, rate, args.duration, args.poll_ms))
+    model = [capacity(rate, args.poll_ms, I2C_FREQ, args.us_per_sample) for rate in RATES]
+    if args.json:
+        print(json.dumps({'runs': runs, 'capacity': model}, indent=1))
+        return
+    print("ch  rate  min_sps  ovf  bus%   mux/s  host_us  hr_mae/channel")
+    for r in runs:
+        print("{:2d} {:5d} {:8.1f} {:4d} {:5.1f} {:7.1f} {:8.2f}  {}".format(
+            r['channels'], r['sample_rate_hz'], r['min_samples_per_s'], r['overflow'],
+            100 * r['bus_utilization'], r['mux_switches_per_s'], r['host_us_per_sample'] or 0,
+            r['hr_mae_per_channel']))
+    print("\ncapacity (poll {} ms, {} kHz, {} us/sample on device)".format(
+        args.poll_ms, I2C_FREQ // 1000, args.us_per_sample))
+    print("rate  bus_us/s/ch  fifo_deadline_ms  by_bus  by_cpu  sustained")
+    for m in model:
+        print("{:4d} {:12d} {:17} {:7d} {:7d} {:10d}".format(
+            m['sample_rate_hz'], m['channel_bus_us_per_s'], m['fifo_deadline_ms'], m['max_channels_bus'],
+            m['max_channels_cpu'], m['sustained_channels']))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,35 @@
+# bench_startup.py
+# Đo thời gian khởi động trên thiết bị: thời gian import max30102, khởi tạo cảm biến
+# và thời gian đến mẫu đầu tiên. Chạy: mpremote run bench/bench_startup.py
+import time
+
+I2C_ID = 0
+SCL_PIN = 5
+SDA_PIN = 4
+FIRST_SAMPLE_TIMEOUT_MS = 2000
+
+
+def main():
+    t0 = time.ticks_us()
+    import max30102
+    t_import = time.ticks_diff(time.ticks_us(), t0)
+
+    from machine import I2C, Pin
+    i2c = I2C(I2C_ID, scl=Pin(SCL_PIN), sda=Pin(SDA_PIN), freq=400000)
+    t1 = time.ticks_us()
+    sensor = max30102.MAX30102(i2c)
+    t_init = time.ticks_diff(time.ticks_us(), t1)
+
+    first_sample = -1
+    while time.ticks_diff(time.ticks_us(), t1) < FIRST_SAMPLE_TIMEOUT_MS * 1000:
+        if sensor.read_sensor()['count']:
+            first_sample = time.ticks_diff(time.ticks_us(), t1)
+            break
+
+    print("import max30102: {} us".format(t_import))
+    print("MAX30102(): {} us".format(t_init))
+    print("time to first sample: {} us".format(first_sample))
+    print('{{"import_us": {}, "init_us": {}, "first_sample_us": {}}}'.format(t_import, t_init, first_sample))
+
+
+main()
@@ -0,0 +1,57 @@
+# font8.py (giả lập trên máy tính)
+# Font 8 pixel theo giao diện của font_to_py (hmap, không đảo bit). Hình glyph là mẫu bit suy ra từ
+# mã ký tự: đủ để đo thời gian vẽ và số byte gửi màn hình, không dùng để xem chữ.
+import sys
+
+_HEIGHT = 8
+_WIDTH = 6
+_glyphs = {}
+
+
+def height():
+    return _HEIGHT
+
+
+def baseline():
+    return 7
+
+
+def max_width():
+    return _WIDTH
+
+
+def hmap():
+    return True
+
+
+def reverse():
+    return False
+
+
+def monospaced():
+    return True
+
+
+def min_ch():
+    return 32
+
+
+def max_ch():
+    return 126
+
+
+def get_ch(ch):
+    g = _glyphs.get(ch)
+    if g is None:
+        code = ord(ch)
+        if ch == ' ':
+            data = bytes(_HEIGHT)
+        else:
+            # Bit 7..2 là 6 cột của glyph (HLSB), hàng đầu/cuối để trống
+            data = bytes([0] + [((code * (row + 5)) ^ (code >> row)) & 0xFC for row in range(_HEIGHT - 2)] + [0])
+        g = _glyphs[ch] = memoryview(data)
+    return g, _HEIGHT, _WIDTH
+
+
+# Mã thiết bị dùng "from font8 import font8"
+font8 = sys.modules[__name__]
@@ -0,0 +1,129 @@
+# framebuf.py (giả lập trên máy tính)
+# Cài đặt thuần Python các phần của framebuf.FrameBuffer mà mã thiết bị dùng (định dạng đơn sắc).
+MONO_VLSB = 0
+MONO_HLSB = 3
+MONO_HMSB = 4
+
+
+class FrameBuffer:
+    def __init__(self, buffer, width, height, format=MONO_VLSB, stride=None):
+        self.buffer = buffer
+        self.width = width
+        self.height = height
+        self.format = format
+        self.stride = width if stride is None else stride
+        if format == MONO_VLSB:
+            self._get, self._set = self._get_vlsb, self._set_vlsb
+        elif format in (MONO_HLSB, MONO_HMSB):
+            self._get, self._set = self._get_h, self._set_h
+        else:
+            raise ValueError("unsupported format")
+
+    # Định dạng VLSB: mỗi byte là 8 pixel dọc (SSD1306)
+    def _get_vlsb(self, x, y):
+        return (self.buffer[(y >> 3) * self.stride + x] >> (y & 7)) & 1
+
+    def _set_vlsb(self, x, y, c):
+        i = (y >> 3) * self.stride + x
+        if c:
+            self.buffer[i] |= 1 << (y & 7)
+        else:
+            self.buffer[i] &= ~(1 << (y & 7)) & 0xFF
+
+    # Định dạng HLSB/HMSB: mỗi byte là 8 pixel ngang (glyph của font_to_py)
+    def _bit(self, x):
+        return (7 - (x & 7)) if self.format == MONO_HLSB else (x & 7)
+
+    def _get_h(self, x, y):
+        return (self.buffer[(y * ((self.stride + 7) >> 3)) + (x >> 3)] >> self._bit(x)) & 1
+
+    def _set_h(self, x, y, c):
+        i = y * ((self.stride + 7) >> 3) + (x >> 3)
+        if c:
+            self.buffer[i] |= 1 << self._bit(x)
+        else:
+            self.buffer[i] &= ~(1 << self._bit(x)) & 0xFF
+
+    def pixel(self, x, y, c=None):
+        if not (0 <= x < self.width and 0 <= y < self.height):
+            return None if c is not None else 0
+        if c is None:
+            return self._get(x, y)
+        self._set(x, y, c)
+
+    def fill(self, c):
+        v = 0xFF if c else 0
+        for i in range(len(self.buffer)):
+            self.buffer[i] = v
+
+    def fill_rect(self, x, y, w, h, c):
+        x0, y0 = max(0, x), max(0, y)
+        x1, y1 = min(self.width, x + w), min(self.height, y + h)
+        for yy in range(y0, y1):
+            for xx in range(x0, x1):
+                self._set(xx, yy, c)
+
+    def hline(self, x, y, w, c):
+        self.fill_rect(x, y, w, 1, c)
+
+    def vline(self, x, y, h, c):
+        self.fill_rect(x, y, 1, h, c)
+
+    def rect(self, x, y, w, h, c, f=False):
+        if f:
+            self.fill_rect(x, y, w, h, c)
+            return
+        self.hline(x, y, w, c)
+        self.hline(x, y + h - 1, w, c)
+        self.vline(x, y, h, c)
+        self.vline(x + w - 1, y, h, c)
+
+    def line(self, x0, y0, x1, y1, c):
+        dx = abs(x1 - x0)
+        dy = -abs(y1 - y0)
+        sx = 1 if x0 < x1 else -1
+        sy = 1 if y0 < y1 else -1
+        err = dx + dy
+        while True:
+            self.pixel(x0, y0, c)
+            if x0 == x1 and y0 == y1:
+                break
+            e2 = 2 * err
+            if e2 >= dy:
+                err += dy
+                x0 += sx
+            if e2 <= dx:
+                err += dx
+                y0 += sy
+
+    def text(self, s, x, y, c=1):
+        # Không có font 8x8 thật: mỗi ký tự là một mẫu bit suy ra từ mã ký tự (đủ cho đo thời gian/byte)
+        for ch in s:
+            code = ord(ch)
+            for row in range(8):
+                bits = (code * (row + 3)) & 0x7E if ch != ' ' else 0
+                for col in range(8):
+                    if bits & (0x80 >> col):
+                        self.pixel(x + col, y + row, c)
+            x += 8
+
+    def scroll(self, xstep, ystep):
+        w, h = self.width, self.height
+        xs = range(w - 1, -1, -1) if xstep > 0 else range(w)
+        ys = range(h - 1, -1, -1) if ystep > 0 else range(h)
+        # Giống MicroPython: vùng bị bỏ trống giữ nguyên nội dung cũ
+        for y in ys:
+            sy = y - ystep
+            if not 0 <= sy < h:
+                continue
+            for x in xs:
+                sx = x - xstep
+                if 0 <= sx < w:
+                    self._set(x, y, self._get(sx, sy))
+
+    def blit(self, fbuf, x, y, key=-1, palette=None):
+        for yy in range(max(0, -y), min(fbuf.height, self.height - y)):
+            for xx in range(max(0, -x), min(fbuf.width, self.width - x)):
+                c = fbuf._get(xx, yy)
+                if c != key:
+                    self._set(x + xx, y + yy, c)
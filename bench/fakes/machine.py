@@ -0,0 +1,295 @@
+# machine.py (giả lập trên máy tính)
+# Thay thế module machine của MicroPython để chạy benchmark/mô phỏng trên Linux.
+import time
+
+
+class Pin:
+    IN = 0
+    OUT = 1
+    OPEN_DRAIN = 2
+    PULL_UP = 1
+    PULL_DOWN = 2
+    IRQ_RISING = 1
+    IRQ_FALLING = 2
+
+    def __init__(self, id, mode=-1, pull=-1, value=None):
+        self.id = id
+        self.mode = mode
+        self.pull = pull
+        self._value = 1 if pull == Pin.PULL_UP else 0
+        if value is not None:
+            self._value = value
+        self._handler = None
+        self._trigger = 0
+
+    def init(self, mode=-1, pull=-1, value=None):
+        self.mode = mode
+        self.pull = pull
+        if value is not None:
+            self._value = value
+
+    def value(self, v=None):
+        if v is None:
+            return self._value
+        self.sim_set(1 if v else 0)
+
+    def on(self):
+        self.value(1)
+
+    def off(self):
+        self.value(0)
+
+    def __call__(self, v=None):
+        return self.value(v)
+
+    def irq(self, handler=None, trigger=IRQ_FALLING | IRQ_RISING):
+        self._handler = handler
+        self._trigger = trigger
+
+    def sim_set(self, level):
+        """
+        Mô phỏng tín hiệu bên ngoài kéo chân lên/xuống, gọi trình xử lý ngắt nếu có cạnh phù hợp.
+        """
+        old = self._value
+        self._value = level
+        if self._handler is None or old == level:
+            return
+        if (level == 0 and self._trigger & Pin.IRQ_FALLING) or (level == 1 and self._trigger & Pin.IRQ_RISING):
+            self._handler(self)
+
+
+def _pin_id(pin):
+    return pin.id if isinstance(pin, Pin) else pin
+
+
+class I2C:
+    def __init__(self, id=-1, scl=None, sda=None, freq=400000, timeout=50000):
+        """
+        Bus I2C giả lập: các thiết bị mô phỏng được gắn theo địa chỉ bằng attach().
+        Thiết bị cần các phương thức giống machine.I2C (writeto_mem, readfrom_mem_into, ...);
+        phương thức nào thiếu sẽ báo OSError như khi thiết bị không phản hồi.
+        """
+        self.id = id
+        self.scl = scl
+        self.sda = sda
+        self.freq = freq
+        self.devices = {}
+        self.transactions = 0
+        self.bytes_written = 0
+        self.bytes_read = 0
+
+    def attach(self, addr, device):
+        self.devices[addr] = device
+        return device
+
+    def _device(self, addr, method):
+        dev = self.devices.get(addr)
+        func = getattr(dev, method, None) if dev is not None else None
+        if func is None:
+            raise OSError(19)  # ENODEV: không có thiết bị ACK
+        self.transactions += 1
+        return func
+
+    def scan(self):
+        return sorted(self.devices)
+
+    def writeto_mem(self, addr, memaddr, buf, addrsize=8):
+        self.bytes_written += len(buf)
+        return self._device(addr, 'writeto_mem')(addr, memaddr, buf)
+
+    def readfrom_mem(self, addr, memaddr, nbytes, addrsize=8):
+        buf = bytearray(nbytes)
+        self.readfrom_mem_into(addr, memaddr, buf)
+        return bytes(buf)
+
+    def readfrom_mem_into(self, addr, memaddr, buf, addrsize=8):
+        self.bytes_read += len(buf)
+        return self._device(addr, 'readfrom_mem_into')(addr, memaddr, buf)
+
+    def writeto(self, addr, buf, stop=True):
+        self.bytes_written += len(buf)
+        self._device(addr, 'writeto')(addr, buf)
+        return len(buf)
+
+    def writevto(self, addr, vector, stop=True):
+        data = b''.join(bytes(v) for v in vector)
+        return self.writeto(addr, data, stop)
+
+    def readfrom(self, addr, nbytes, stop=True):
+        buf = bytearray(nbytes)
+        self.readfrom_into(addr, buf, stop)
+        return bytes(buf)
+
+    def readfrom_into(self, addr, buf, stop=True):
+        self.bytes_read += len(buf)
+        self._device(addr, 'readfrom_into')(addr, buf)
+
+
+class SoftI2C(I2C):
+    def __init__(self, scl=None, sda=None, freq=400000, timeout=50000):
+        super().__init__(-1, scl, sda, freq, timeout)
+
+
+class ADC:
+    ATTN_0DB = 0
+    ATTN_2_5DB = 1
+    ATTN_6DB = 2
+    ATTN_11DB = 3
+    WIDTH_9BIT = 9
+    WIDTH_10BIT = 10
+    WIDTH_11BIT = 11
+    WIDTH_12BIT = 12
+
+    def __init__(self, pin, atten=None):
+        """
+        ADC giả lập: giá trị đọc được đặt bằng sim_set_voltage() hoặc sim_source (hàm trả về volt).
+        """
+        self.pin = _pin_id(pin)
+        self._atten = ADC.ATTN_0DB if atten is None else atten
+        self._bits = 12
+        self.voltage = 0.0
+        self.sim_source = None
+        self.noise = None    # Hàm trả về nhiễu (volt) cộng vào mỗi lần đọc
+        self.reads = 0
+
+    def atten(self, value):
+        self._atten = value
+
+    def width(self, value):
+        self._bits = value
+
+    def sim_set_voltage(self, volts):
+        self.voltage = volts
+
+    def _volts(self):
+        self.reads += 1
+        v = self.sim_source() if self.sim_source is not None else self.voltage
+        if self.noise is not None:
+            v += self.noise()
+        return v
+
+    def _full_scale(self):
+        return 3.3 if self._atten == ADC.ATTN_11DB else (2.0 if self._atten == ADC.ATTN_6DB else 1.1)
+
+    def read(self):
+        full = (1 << self._bits) - 1
+        raw = int(self._volts() / self._full_scale() * full + 0.5)
+        return max(0, min(full, raw))
+
+    def read_u16(self):
+        raw = int(self._volts() / self._full_scale() * 65535 + 0.5)
+        return max(0, min(65535, raw))
+
+    def read_uv(self):
+        return int(max(0.0, min(self._full_scale(), self._volts())) * 1000000)
+
+
+class SPI:
+    MSB = 0
+    LSB = 1
+
+    def __init__(self, id=1, baudrate=1000000, polarity=0, phase=0, bits=8, firstbit=0,
+                 sck=None, mosi=None, miso=None):
+        self.id = id
+        self.baudrate = baudrate
+        self.bytes_written = 0
+
+    def init(self, baudrate=1000000, **kwargs):
+        self.baudrate = baudrate
+
+    def deinit(self):
+        pass
+
+    def write(self, buf):
+        self.bytes_written += len(buf)
+
+    def read(self, nbytes, write=0x00):
+        return bytes([0xFF] * nbytes)
+
+    def readinto(self, buf, write=0x00):
+        for i in range(len(buf)):
+            buf[i] = 0xFF
+
+    def write_readinto(self, write_buf, read_buf):
+        self.bytes_written += len(write_buf)
+        self.readinto(read_buf)
+
+
+class Timer:
+    ONE_SHOT = 0
+    PERIODIC = 1
+
+    _active = []
+
+    def __init__(self, id=-1, **kwargs):
+        """
+        Timer giả lập: callback chỉ chạy khi bộ mô phỏng gọi Timer.run_due() (theo time.ticks_ms()).
+        """
+        self.id = id
+        self._callback = None
+        if kwargs:
+            self.init(**kwargs)
+
+    def init(self, mode=PERIODIC, period=-1, freq=-1, callback=None):
+        if freq > 0:
+            period = 1000 / freq
+        self.mode = mode
+        self.period = period
+        self._callback = callback
+        self._due = _now_ms() + period
+        if self not in Timer._active:
+            Timer._active.append(self)
+
+    def deinit(self):
+        if self in Timer._active:
+            Timer._active.remove(self)
+
+    @classmethod
+    def run_due(cls, now_ms=None):
+        """
+        Chạy callback của các timer đã đến hạn.
+        Returns:
+            int: Số callback đã chạy.
+        """
+        if now_ms is None:
+            now_ms = _now_ms()
+        count = 0
+        for timer in list(cls._active):
+            while timer in cls._active and now_ms >= timer._due:
+                if timer.mode == Timer.ONE_SHOT:
+                    timer.deinit()
+                else:
+                    timer._due += timer.period
+                timer._callback(timer)
+                count += 1
+        return count
+
+
+def _now_ms():
+    ticks = getattr(time, 'ticks_ms', None)
+    return ticks() if ticks is not None else time.perf_counter() * 1000
+
+
+def freq(hz=None):
+    return 160000000
+
+
+def reset():
+    raise SystemExit("machine.reset()")
+
+
+def unique_id():
+    return b'\x00\x00\x00\x00\x00\x01'
+
+
+def idle():
+    pass
+
+
+def disable_irq():
+    # Trên máy tính không có ngắt thật (trình xử lý được gọi đồng bộ): chỉ trả về trạng thái giả
+    return 0
+
+
+def enable_irq(state=0):
+    pass
@@ -0,0 +1,30 @@
+# micropython.py (giả lập trên máy tính)
+# schedule() chỉ xếp hàng, run_scheduled() được bộ mô phỏng gọi để chạy các hàm đã lên lịch,
+# giống cách VM MicroPython chạy chúng sau khi thoát khỏi ngắt.
+
+_QUEUE_SIZE = 8
+_pending = []
+
+
+def schedule(func, arg):
+    if len(_pending) >= _QUEUE_SIZE:
+        raise RuntimeError("schedule queue full")
+    _pending.append((func, arg))
+
+
+def run_scheduled():
+    """
+    Chạy toàn bộ các hàm đang chờ.
+    Returns:
+        int: Số hàm đã chạy.
+    """
+    count = 0
+    while _pending:
+        func, arg = _pending.pop(0)
+        func(arg)
+        count += 1
+    return count
+
+
+def const(x):
+    return x
@@ -0,0 +1,76 @@
+# writer.py (giả lập trên máy tính)
+# Phần giao diện Writer/CWriter (micropython-font-to-py) mà mã thiết bị dùng: set_textpos, printstring.
+import framebuf
+
+
+class _State:
+    def __init__(self):
+        self.text_row = 0
+        self.text_col = 0
+
+
+class Writer:
+    state = {}
+
+    @staticmethod
+    def set_textpos(device, row=None, col=None):
+        devid = id(device)
+        if devid not in Writer.state:
+            Writer.state[devid] = _State()
+        s = Writer.state[devid]
+        if row is not None:
+            s.text_row = row
+        if col is not None:
+            s.text_col = col
+        return s.text_row, s.text_col
+
+    def __init__(self, device, font, verbose=True):
+        self.devid = id(device)
+        self.device = device
+        if self.devid not in Writer.state:
+            Writer.state[self.devid] = _State()
+        self.font = font
+        self.screenwidth = device.width
+        self.screenheight = device.height
+        self.map = framebuf.MONO_HMSB if font.reverse() else framebuf.MONO_HLSB
+        self.row_clip = False
+        self.col_clip = False
+        self.wrap = True
+
+    def height(self):
+        return self.font.height()
+
+    def stringlen(self, string):
+        return sum(self.font.get_ch(ch)[2] for ch in string)
+
+    def printstring(self, string, invert=False):
+        s = Writer.state[self.devid]
+        for char in string:
+            if char == '\n':
+                s.text_col = 0
+                s.text_row += self.font.height()
+                continue
+            self._printchar(char, invert)
+
+    def _printchar(self, char, invert=False):
+        s = Writer.state[self.devid]
+        glyph, char_height, char_width = self.font.get_ch(char)
+        if s.text_col + char_width > self.screenwidth:
+            if not self.wrap:
+                return
+            s.text_col = 0
+            s.text_row += char_height
+        buf = bytearray(glyph)
+        if invert:
+            for i, v in enumerate(buf):
+                buf[i] = 0xFF & ~v
+        fbc = framebuf.FrameBuffer(buf, char_width, char_height, self.map)
+        self.device.blit(fbc, s.text_col, s.text_row)
+        s.text_col += char_width
+
+
+class CWriter(Writer):
+    def __init__(self, device, font, fgcolor=None, bgcolor=None, verbose=True):
+        super().__init__(device, font, verbose)
+        self.fgcolor = 1 if fgcolor is None else fgcolor
+        self.bgcolor = 0 if bgcolor is None else bgcolor
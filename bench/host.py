@@ -0,0 +1,26 @@
+# host.py
+# Chuẩn bị môi trường chạy mã thiết bị trên máy tính: thêm module giả lập và thư mục src vào
+# sys.path, bổ sung các hàm time.ticks_* / sleep_ms của MicroPython vào module time.
+import os
+import sys
+import time
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+SRC_DIR = os.path.join(BENCH_DIR, '..', 'src')
+FAKES_DIR = os.path.join(BENCH_DIR, 'fakes')
+
+_TICKS_PERIOD = 1 << 30
+
+
+def install():
+    for path in (SRC_DIR, FAKES_DIR, BENCH_DIR):
+        if path not in sys.path:
+            sys.path.insert(0, path)
+    if hasattr(time, 'ticks_ms'):
+        return
+    time.ticks_ms = lambda: int(time.perf_counter() * 1000) % _TICKS_PERIOD
+    time.ticks_us = lambda: int(time.perf_counter() * 1000000) % _TICKS_PERIOD
+    time.ticks_add = lambda t, delta: (t + delta) % _TICKS_PERIOD
+    time.ticks_diff = lambda a, b: ((a - b + _TICKS_PERIOD // 2) % _TICKS_PERIOD) - _TICKS_PERIOD // 2
+    time.sleep_ms = lambda ms: time.sleep(ms / 1000)
+    time.sleep_us = lambda us: time.sleep(us / 1000000)
@@ -0,0 +1,109 @@
+# ppg_synth.py
+# Bộ tạo tín hiệu PPG tổng hợp cho MAX30102 mô phỏng: nhịp tim, SpO2 (qua tỉ số R), nhiễu trắng,
+# trôi nền do hô hấp, biến thiên nhịp tim và nhiễu chuyển động. Giá trị thật được giữ lại để đo sai số.
+import math
+import random
+
+# Hệ số của công thức SpO2 = A - B * R (giống SpO2Engine)
+SPO2_A = 110
+SPO2_B = 25
+
+
+def _pulse(phase):
+    # Một chu kỳ mạch: đỉnh tâm thu và sóng dội (dicrotic), giá trị trong khoảng [0, 1]
+    d1 = (phase - 0.15) / 0.07
+    d2 = (phase - 0.45) / 0.09
+    return math.exp(-d1 * d1) + 0.35 * math.exp(-d2 * d2)
+
+
+class PPGGenerator:
+    def __init__(self, hr=72, spo2=97, sample_rate=100, ir_dc=60000, red_dc=50000, perfusion=0.01,
+                 noise=15, wander=0.003, resp_rate=15, hrv=0.0, motion_rate=0.0, motion_amplitude=0.05,
+                 motion_seconds=1.0, seed=0):
+        """
+        Args:
+            hr (float, optional): Nhịp tim (bpm). Mặc định là 72.
+            spo2 (float, optional): SpO2 (%), quyết định biên độ AC tương đối của kênh RED. Mặc định là 97.
+            sample_rate (int, optional): Tần số lấy mẫu (Hz). Mặc định là 100.
+            ir_dc (int, optional): Mức DC kênh IR (đơn vị ADC 18-bit). Mặc định là 60000.
+            red_dc (int, optional): Mức DC kênh RED. Mặc định là 50000.
+            perfusion (float, optional): Biên độ AC/DC của kênh IR. Mặc định là 0.01 (1%).
+            noise (float, optional): Độ lệch chuẩn nhiễu trắng (đơn vị ADC). Mặc định là 15.
+            wander (float, optional): Biên độ trôi nền do hô hấp (tỉ lệ so với DC). Mặc định là 0.003.
+            resp_rate (float, optional): Nhịp thở (lần/phút). Mặc định là 15.
+            hrv (float, optional): Biến thiên ngẫu nhiên của từng khoảng RR (tỉ lệ). Mặc định là 0.
+            motion_rate (float, optional): Số lần nhiễu chuyển động mỗi phút. Mặc định là 0.
+            motion_amplitude (float, optional): Biên độ nhiễu chuyển động (tỉ lệ so với DC). Mặc định là 0.05.
+            motion_seconds (float, optional): Thời gian mỗi lần nhiễu chuyển động (giây). Mặc định là 1.
+            seed (int, optional): Hạt giống ngẫu nhiên (kết quả lặp lại được). Mặc định là 0.
+        """
+        self.hr = hr
+        self.spo2 = spo2
+        self.sample_rate = sample_rate
+        self.ir_dc = ir_dc
+        self.red_dc = red_dc
+        self.perfusion = perfusion
+        self.noise = noise
+        self.wander = wander
+        self.resp_rate = resp_rate
+        self.hrv = hrv
+        self.motion_rate = motion_rate
+        self.motion_amplitude = motion_amplitude
+        self.motion_seconds = motion_seconds
+        self.rng = random.Random(seed)
+        self.k = 0
+        self._phase = 0.0
+        self._rr_scale = 1.0
+        self._motion_left = 0
+        self._motion_shape = 0.0
+        self.beats = 0
+        self.motion_samples = 0
+
+    def r_ratio(self):
+        return (SPO2_A - self.spo2) / SPO2_B
+
+    def __call__(self, k=None):
+        """
+        Tạo mẫu tiếp theo (tham số k bị bỏ qua, để dùng được làm nguồn của SimulatedMAX30102).
+        Returns:
+            tuple: (red, ir) dạng số nguyên 18-bit.
+        """
+        rng = self.rng
+        t = self.k / self.sample_rate
+        self.k += 1
+        self._phase += self.hr / 60 / self.sample_rate * self._rr_scale
+        if self._phase >= 1.0:
+            self._phase -= 1.0
+            self.beats += 1
+            if self.hrv:
+                self._rr_scale = 1.0 / max(0.5, 1.0 + rng.gauss(0, self.hrv))
+        # Ánh sáng nhận được giảm khi máu dồn tới (tâm thu), nên lấy 1 - pulse
+        pulse = _pulse(self._phase)
+        ir_mod = self.perfusion * pulse
+        red_mod = ir_mod * self.r_ratio()
+        base = 1.0 + self.wander * math.sin(2 * math.pi * self.resp_rate / 60 * t)
+        motion = 0.0
+        if self._motion_left:
+            # Nhiễu chuyển động: bướu nửa sin cộng dao động, như khi ngón tay trượt trên cảm biến
+            self._motion_left -= 1
+            self.motion_samples += 1
+            x = 1 - self._motion_left / (self.motion_seconds * self.sample_rate)
+            motion = self._motion_shape * math.sin(math.pi * x) * (1 + 0.5 * math.sin(2 * math.pi * 3 * t))
+        elif self.motion_rate and rng.random() < self.motion_rate / 60 / self.sample_rate:
+            self._motion_left = int(self.motion_seconds * self.sample_rate)
+            self._motion_shape = self.motion_amplitude * rng.uniform(-1, 1)
+        ir = self.ir_dc * (base + motion - ir_mod) + rng.gauss(0, self.noise)
+        red = self.red_dc * (base + motion - red_mod) + rng.gauss(0, self.noise)
+        return max(0, min(0x3FFFF, int(red))), max(0, min(0x3FFFF, int(ir)))
+
+
+# Các kịch bản chuẩn cho benchmark
+SCENARIOS = {
+    'rest': {'hr': 62, 'spo2': 98},
+    'normal': {'hr': 75, 'spo2': 97, 'hrv': 0.03},
+    'exercise': {'hr': 140, 'spo2': 96, 'hrv': 0.02, 'perfusion': 0.02},
+    'bradycardia': {'hr': 42, 'spo2': 95},
+    'hypoxia': {'hr': 88, 'spo2': 86},
+    'low_perfusion': {'hr': 70, 'spo2': 97, 'perfusion': 0.003, 'noise': 25},
+    'motion': {'hr': 80, 'spo2': 97, 'motion_rate': 6, 'motion_amplitude': 0.03},
+}
@@ -0,0 +1,105 @@
+# replay.py
+# Phát lại dữ liệu đã ghi (RecordingI2C hoặc log nhị phân SDLogger) qua một MAX30102 mô phỏng có cùng
+# giao diện với machine.I2C, với đồng hồ ảo nên chạy nhanh hơn thời gian thực.
+import struct
+import time
+from array import array
+
+from sim_max30102 import SimulatedMAX30102
+from fifo_recorder import REC_MAGIC, REC_HEADER_FORMAT, REC_HEADER_SIZE
+
+
+def load_recording(path):
+    """
+    Nạp file ghi luồng FIFO (.raw của RecordingI2C) hoặc log nhị phân của SDLogger (.bin).
+    Args:
+        path (str): Đường dẫn file.
+    Returns:
+        tuple: (sample_rate, array RED, array IR).
+    Raises:
+        ValueError: Nếu file không đúng định dạng.
+    """
+    with open(path, 'rb') as f:
+        head = f.read(REC_HEADER_SIZE)
+        if head[:4] == REC_MAGIC:
+            _, sample_rate, bps = struct.unpack(REC_HEADER_FORMAT, head)
+            data = f.read()
+            red = array('i')
+            ir = array('i')
+            for j in range(0, len(data) - bps + 1, bps):
+                red.append(((data[j] << 16) | (data[j + 1] << 8) | data[j + 2]) & 0x3FFFF)
+                ir.append(((data[j + 3] << 16) | (data[j + 4] << 8) | data[j + 5]) & 0x3FFFF)
+            return sample_rate, red, ir
+    from sd_logger import MAGIC, read_records
+    if head[:4] != MAGIC:
+        raise ValueError("Unknown recording format: {}".format(path))
+    red = array('i')
+    ir = array('i')
+    ticks = []
+    for _, t, r, i, _, _ in read_records(path):
+        ticks.append(t)
+        red.append(r)
+        ir.append(i)
+    # Tần số lấy mẫu suy ra từ dấu thời gian (SDLogger lưu ticks_ms của từng mẫu)
+    sample_rate = 100
+    if len(ticks) > 1 and ticks[-1] != ticks[0]:
+        sample_rate = int(round((len(ticks) - 1) * 1000 / ((ticks[-1] - ticks[0]) & 0xFFFFFFFF)))
+    return sample_rate, red, ir
+
+
+class ReplayI2C(SimulatedMAX30102):
+    def __init__(self, path, int_pin=None, addr=0x57):
+        """
+        Thay cho machine.I2C: cảm biến mô phỏng phát lại các mẫu đã ghi theo đồng hồ ảo.
+        Args:
+            path (str): File ghi (xem load_recording).
+            int_pin (Pin, optional): Chân INT giả lập. Mặc định là None.
+            addr (int, optional): Địa chỉ I2C. Mặc định là 0x57.
+        """
+        self.path = path
+        rate, self.red, self.ir = load_recording(path)
+        super().__init__(self._source, rate, int_pin, addr)
+
+    def _source(self, k):
+        return self.red[k], self.ir[k]
+
+    def __len__(self):
+        return len(self.red)
+
+    def remaining(self):
+        return len(self.red) - self.samples_generated
+
+    def advance(self, seconds):
+        # Không tạo mẫu vượt quá cuối bản ghi
+        self._phase = min(self._phase + seconds * self.sample_rate, self.remaining())
+        return super().advance(0)
+
+
+def replay(sensor, dev, block_seconds=0.25, speed=None, on_block=None):
+    """
+    Chạy toàn bộ bản ghi qua chuỗi xử lý của cảm biến.
+    Args:
+        sensor (MAX30102): Cảm biến đã khởi tạo với i2c=dev.
+        dev (ReplayI2C): Nguồn phát lại.
+        block_seconds (float, optional): Thời gian ảo giữa hai lần đọc FIFO. Mặc định là 0.25 s
+            (phải nhỏ hơn 0.32 s để FIFO 32 mẫu không tràn ở 100 Hz).
+        speed (float, optional): Hệ số so với thời gian thực (1.0 = thời gian thực).
+            Mặc định là None (nhanh nhất có thể).
+        on_block (function, optional): Gọi on_block(t_seconds) sau mỗi lần đọc.
+    Returns:
+        float: Thời gian ảo đã phát lại (giây).
+    """
+    t = 0.0
+    start = time.perf_counter()
+    while dev.remaining() > 0:
+        dev.advance(block_seconds)
+        t += block_seconds
+        while sensor.process_fifo():
+            pass
+        if on_block is not None:
+            on_block(t)
+        if speed:
+            delay = t / speed - (time.perf_counter() - start)
+            if delay > 0:
+                time.sleep(delay)
+    return t
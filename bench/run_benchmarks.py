@@ -0,0 +1,235 @@
+# run_benchmarks.py
+# Bộ benchmark trên máy tính cho chuỗi xử lý MAX30102 với tín hiệu PPG tổng hợp: chi phí xử lý mỗi
+# mẫu, bộ nhớ đỉnh, lượng cấp phát mỗi giây, thời gian đến HR đầu tiên và sai số HR/SpO2.
+# Kết quả xuất JSON để so sánh giữa các phiên bản.
+# Chạy: python bench/run_benchmarks.py [--duration 60] [--out result.json] [--compare old.json]
+import argparse
+import json
+import os
+import platform
+import subprocess
+import sys
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+import host
+host.install()
+
+import max30102
+from power_profiles import PROFILES, effective_rate, work_model
+from ppg_synth import PPGGenerator, SCENARIOS
+from sim_max30102 import SimulatedMAX30102
+
+BLOCK_S = 0.25          # Chu kỳ đọc FIFO (giây ảo)
+SETTLE_S = 10           # Bỏ qua giai đoạn khởi động khi tính sai số
+HR_TOLERANCE = 5        # bpm, để tính tỉ lệ ước lượng đạt
+
+# Ngưỡng coi là hồi quy khi so sánh với kết quả cũ
+REGRESSION_LIMITS = {
+    'us_per_sample': 1.20,          # Chậm hơn 20%
+    'peak_kb': 1.20,
+    'alloc_bytes_per_s': 1.50,
+    'hr_mae': 1.0,                  # Tăng hơn 1 bpm (chênh lệch tuyệt đối)
+    'spo2_mae': 1.0,
+    'time_to_first_hr_s': 1.0,
+}
+ABSOLUTE_METRICS = ('hr_mae', 'spo2_mae', 'time_to_first_hr_s')
+PROFILE_SCENARIO = 'normal'   # Kịch bản dùng để đo chi phí xử lý của từng cấu hình năng lượng
+
+
+def _new_sensor(config, model=None, sensor_config=None):
+    if sensor_config is not None:
+        # Bộ mô phỏng tạo mẫu theo tần số thực tế của cấu hình (không đọc thanh ghi 0x08/0x0A)
+        config = dict(config, sample_rate=effective_rate(sensor_config))
+    gen = PPGGenerator(**config)
+    dev = SimulatedMAX30102(gen, gen.sample_rate)
+    kwargs = {'compact_model_path': model} if model else {}
+    sensor = max30102.MAX30102(dev, **kwargs)
+    if sensor_config is not None:
+        sensor.configure(**sensor_config)
+    return gen, dev, sensor
+
+
+def run_timing(config, duration, model=None, sensor_config=None):
+    gen, dev, sensor = _new_sensor(config, model, sensor_config)
+    blocks = int(duration / BLOCK_S)
+    busy = 0.0
+    processed = 0
+    first_hr = None
+    hr_err = []
+    spo2_err = []
+    nn_err = []
+    for b in range(blocks):
+        t = (b + 1) * BLOCK_S
+        dev.advance(BLOCK_S)
+        t0 = time.perf_counter()
+        while True:
+            n = sensor.process_fifo()
+            if n == 0:
+                break
+            processed += n
+        busy += time.perf_counter() - t0
+        hr = sensor.calculate_heart_rate()
+        if hr and first_hr is None:
+            first_hr = t
+        if t >= SETTLE_S and (b % 4) == 3:   # Lấy mẫu sai số mỗi giây
+            hr_err.append(abs(hr - gen.hr) if hr else gen.hr)
+            spo2_err.append(abs(sensor.calculate_spo2() - gen.spo2))
+            if model:
+                nn = sensor.predict_heart_rate()
+                if nn is not None:
+                    nn_err.append(abs(nn - gen.hr))
+    result = {
+        'samples': processed,
+        'us_per_sample': round(busy * 1e6 / processed, 2) if processed else None,
+        'cpu_fraction_at_100hz': round(busy / duration, 5),
+        'i2c_transactions_per_s': round(dev.transactions / duration, 1),
+        'overflow': sensor.overflow_count,
+        'time_to_first_hr_s': first_hr,
+        'hr_mae': round(sum(hr_err) / len(hr_err), 2) if hr_err else None,
+        'hr_within_tolerance': round(sum(1 for e in hr_err if e <= HR_TOLERANCE) / len(hr_err), 3) if hr_err else None,
+        'spo2_mae': round(sum(spo2_err) / len(spo2_err), 2) if spo2_err else None,
+        'final_hr': round(sensor.calculate_heart_rate(), 1),
+        'final_spo2': round(sensor.calculate_spo2(), 1),
+    }
+    if nn_err:
+        result['nn_hr_mae'] = round(sum(nn_err) / len(nn_err), 2)
+    return result
+
+
+def run_memory(config, duration):
+    # Chạy riêng dưới tracemalloc (làm chậm đáng kể nên không dùng chung với phép đo thời gian)
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    gen, dev, sensor = _new_sensor(config)
+    init_bytes = tracemalloc.get_traced_memory()[0] - before
+    transient = 0
+    for b in range(int(duration / BLOCK_S)):
+        dev.advance(BLOCK_S)
+        tracemalloc.reset_peak()
+        current = tracemalloc.get_traced_memory()[0]
+        while sensor.process_fifo():
+            pass
+        # Phần bộ nhớ tạm vượt lên trên mức hiện tại trong lô: cận dưới của lượng cấp phát
+        transient += tracemalloc.get_traced_memory()[1] - current
+    tracemalloc.reset_peak()
+    _, peak = tracemalloc.get_traced_memory()
+    steady = tracemalloc.get_traced_memory()[0] - before
+    tracemalloc.stop()
+    return {
+        'init_kb': round(init_bytes / 1024, 1),
+        'peak_kb': round(max(peak - before, steady) / 1024, 1),
+        'alloc_bytes_per_s': round(transient / duration, 1),
+    }
+
+
+def run_profiles(duration):
+    """
+    Đo chi phí xử lý và sai số ở tần số mẫu của từng cấu hình năng lượng, rồi ước lượng
+    khối lượng công việc mỗi giây bằng power_profiles.work_model().
+    """
+    results = {}
+    for name in sorted(PROFILES):
+        profile = PROFILES[name]
+        entry = {}
+        us_per_sample = 0
+        if profile['sensor'] is not None:
+            timing = run_timing(SCENARIOS[PROFILE_SCENARIO], duration, sensor_config=profile['sensor'])
+            us_per_sample = timing['us_per_sample'] or 0
+            for key in ('us_per_sample', 'time_to_first_hr_s', 'hr_mae', 'spo2_mae'):
+                entry[key] = timing[key]
+        entry['work'] = work_model(profile, us_per_sample)
+        results[name] = entry
+        work = entry['work']
+        print("profile {:12s} {:4d} Hz  LED {:6.3f} mA  sensor bus {:6d} us/s  CPU {:7d} us/s  HR MAE {}".format(
+            name, work['sample_rate_hz'], work['led_avg_ma'], work['sensor_bus_us_per_s'],
+            work['cpu_us_per_s'], entry.get('hr_mae')), file=sys.stderr)
+    return results
+
+
+def _version():
+    try:
+        out = subprocess.run(['git', 'describe', '--always', '--dirty'], capture_output=True, text=True,
+                             cwd=os.path.dirname(os.path.abspath(__file__)), check=True)
+        return out.stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def compare(result, baseline):
+    """
+    So sánh với kết quả cũ.
+    Returns:
+        list: Các dòng (kịch bản, chỉ số, cũ, mới) vượt ngưỡng REGRESSION_LIMITS.
+    """
+    regressions = []
+    for name, metrics in result['scenarios'].items():
+        old = baseline.get('scenarios', {}).get(name)
+        if not old:
+            continue
+        for key, limit in REGRESSION_LIMITS.items():
+            new_v, old_v = metrics.get(key), old.get(key)
+            if new_v is None or old_v is None:
+                continue
+            if key in ABSOLUTE_METRICS:
+                worse = new_v - old_v > limit
+            else:
+                worse = old_v > 0 and new_v / old_v > limit
+            if worse:
+                regressions.append((name, key, old_v, new_v))
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Host benchmarks for the MAX30102 processing pipeline")
+    parser.add_argument('--duration', type=float, default=60, help="simulated seconds per scenario")
+    parser.add_argument('--scenario', action='append', choices=sorted(SCENARIOS), help="run only these")
+    parser.add_argument('--model', help="compact NN model (.bin) to include NN HR accuracy")
+    parser.add_argument('--no-memory', action='store_true', help="skip the tracemalloc pass")
+    parser.add_argument('--no-profiles', action='store_true', help="skip the power profile work model")
+    parser.add_argument('--out', help="write the JSON result to this file")
+    parser.add_argument('--compare', help="previous JSON result; exit 1 on regression")
+    args = parser.parse_args()
+
+    result = {
+        'meta': {
+            'version': _version(),
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+            'time': time.strftime('%Y-%m-%dT%H:%M:%S'),
+            'duration_s': args.duration,
+        },
+        'scenarios': {},
+    }
+    for name in args.scenario or sorted(SCENARIOS):
+        config = SCENARIOS[name]
+        metrics = run_timing(config, args.duration, args.model)
+        if not args.no_memory:
+            metrics.update(run_memory(config, args.duration))
+        metrics['truth'] = {'hr': config['hr'], 'spo2': config['spo2']}
+        result['scenarios'][name] = metrics
+        print("{:14s} {:7.1f} us/sample  HR MAE {:>6}  SpO2 MAE {:>5}  first HR {:>5} s  peak {} KB".format(
+            name, metrics['us_per_sample'], metrics['hr_mae'], metrics['spo2_mae'],
+            metrics['time_to_first_hr_s'], metrics.get('peak_kb')), file=sys.stderr)
+    if not args.no_profiles:
+        result['profiles'] = run_profiles(args.duration)
+
+    status = 0
+    if args.compare:
+        with open(args.compare) as f:
+            regressions = compare(result, json.load(f))
+        result['regressions'] = [{'scenario': s, 'metric': k, 'old': o, 'new': n} for s, k, o, n in regressions]
+        for s, k, o, n in regressions:
+            print("REGRESSION {} {}: {} -> {}".format(s, k, o, n), file=sys.stderr)
+        status = 1 if regressions else 0
+    text = json.dumps(result, indent=1)
+    if args.out:
+        with open(args.out, 'w') as f:
+            f.write(text)
+    print(text)
+    sys.exit(status)
+
+
+if __name__ == "__main__":
+    main()
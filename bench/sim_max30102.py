@@ -0,0 +1,139 @@
+# sim_max30102.py
+# MAX30102 mô phỏng: thanh ghi, FIFO 32 mẫu có con trỏ/bộ đếm tràn, và chân INT (A_FULL).
+# Dùng thay cho đối tượng I2C khi chạy benchmark trên máy tính.
+import math
+
+FIFO_DEPTH = 32
+
+
+def sine_source(red_dc=50000, ir_dc=60000, red_ac=300, ir_ac=800, bpm=75, sample_rate=100):
+    """
+    Nguồn mẫu đơn giản dạng sin.
+    Returns:
+        function: f(k) -> (red, ir) cho mẫu thứ k.
+    """
+    w = 2 * math.pi * bpm / 60 / sample_rate
+
+    def source(k):
+        s = math.sin(w * k)
+        return int(red_dc + red_ac * s), int(ir_dc + ir_ac * s)
+    return source
+
+
+class SimulatedMAX30102:
+    def __init__(self, source, sample_rate=100, int_pin=None, addr=0x57):
+        """
+        Args:
+            source (function): f(k) -> (red, ir), giá trị 18-bit của mẫu thứ k.
+            sample_rate (int, optional): Tần số tạo mẫu (Hz). Mặc định là 100.
+            int_pin (Pin, optional): Chân giả lập nối với INT (machine.Pin giả lập có sim_set).
+            addr (int, optional): Địa chỉ I2C. Mặc định là 0x57.
+        """
+        self.source = source
+        self.sample_rate = sample_rate
+        self.int_pin = int_pin
+        self.addr = addr
+        self.samples_generated = 0
+        self.transactions = 0
+        self.bytes_read = 0
+        self._phase = 0.0
+        self._reset_regs()
+
+    def _reset_regs(self):
+        self.regs = bytearray(256)
+        self.regs[0xFE] = 0x03  # REV_ID
+        self.regs[0xFF] = 0x15  # PART_ID
+        self.fifo = []
+        self.wr_ptr = 0
+        self.rd_ptr = 0
+        self.ovf = 0
+        self._set_int(False)
+
+    def _set_int(self, active):
+        if self.int_pin is not None:
+            self.int_pin.sim_set(0 if active else 1)
+
+    def _threshold(self):
+        return FIFO_DEPTH - (self.regs[0x08] & 0x0F)
+
+    def advance(self, seconds):
+        """
+        Cho đồng hồ mô phỏng chạy thêm `seconds` giây, tạo các mẫu mới vào FIFO.
+        Returns:
+            int: Số mẫu được tạo.
+        """
+        self._phase += seconds * self.sample_rate
+        n = int(self._phase)
+        self._phase -= n
+        shutdown = self.regs[0x09] & 0x80
+        if shutdown:
+            return 0
+        for _ in range(n):
+            self.push(self.source(self.samples_generated))
+        return n
+
+    def push(self, sample):
+        self.samples_generated += 1
+        if len(self.fifo) == FIFO_DEPTH:
+            if self.regs[0x08] & 0x10:  # FIFO_ROLLOVER_EN: ghi đè mẫu cũ nhất
+                self.fifo.pop(0)
+                self.rd_ptr = (self.rd_ptr + 1) & 0x1F
+            self.ovf = min(self.ovf + 1, 0x1F)
+            if not self.regs[0x08] & 0x10:
+                return
+        self.fifo.append(sample)
+        self.wr_ptr = (self.wr_ptr + 1) & 0x1F
+        if self.regs[0x02] & 0x80 and len(self.fifo) >= self._threshold() and not self.regs[0x00] & 0x80:
+            self.regs[0x00] |= 0x80
+            self._set_int(True)
+
+    # Giao diện giống machine.I2C
+    def writeto_mem(self, addr, reg, buf):
+        self.transactions += 1
+        value = buf[0]
+        if reg == 0x09 and value & 0x40:
+            self._reset_regs()  # Bit RESET tự xóa ngay
+            return
+        if reg == 0x04:
+            self.wr_ptr = value & 0x1F
+            self.fifo = []
+        elif reg == 0x05:
+            self.ovf = value & 0x1F
+        elif reg == 0x06:
+            self.rd_ptr = value & 0x1F
+            self.fifo = []
+        self.regs[reg] = value
+
+    def readfrom_mem(self, addr, reg, nbytes):
+        buf = bytearray(nbytes)
+        self.readfrom_mem_into(addr, reg, buf)
+        return bytes(buf)
+
+    def readfrom_mem_into(self, addr, reg, buf):
+        self.transactions += 1
+        self.bytes_read += len(buf)
+        if reg == 0x07:
+            for k in range(len(buf) // 6):
+                if self.fifo:
+                    red, ir = self.fifo.pop(0)
+                    self.rd_ptr = (self.rd_ptr + 1) & 0x1F
+                    self.ovf = 0
+                else:
+                    red = ir = 0
+                buf[k * 6:k * 6 + 6] = bytes(((red >> 16) & 3, (red >> 8) & 0xFF, red & 0xFF,
+                                              (ir >> 16) & 3, (ir >> 8) & 0xFF, ir & 0xFF))
+            return
+        for k in range(len(buf)):
+            r = reg + k
+            if r == 0x04:
+                buf[k] = self.wr_ptr
+            elif r == 0x05:
+                buf[k] = self.ovf
+            elif r == 0x06:
+                buf[k] = self.rd_ptr
+            else:
+                buf[k] = self.regs[r]
+        if reg <= 0x00 < reg + len(buf):
+            # Đọc Interrupt Status 1 xóa cờ và nhả chân INT
+            self.regs[0x00] = 0
+            self._set_int(False)
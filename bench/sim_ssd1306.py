@@ -0,0 +1,77 @@
+# sim_ssd1306.py
+# Màn hình SSD1306 mô phỏng phía thiết bị I2C: giải mã byte điều khiển/lệnh, giữ RAM hiển thị
+# (chế độ địa chỉ ngang) và đếm số byte nhận được. Gắn vào bus giả lập bằng i2c.attach(0x3C, panel).
+
+# Số byte tham số của các lệnh có tham số
+_ARGS = {0x20: 1, 0x21: 2, 0x22: 2, 0x81: 1, 0x8D: 1, 0xA8: 1, 0xD3: 1, 0xD5: 1, 0xD9: 1, 0xDA: 1, 0xDB: 1}
+
+
+class SimulatedSSD1306:
+    def __init__(self, width=128, height=64):
+        self.width = width
+        self.pages = height // 8
+        self.ram = bytearray(128 * self.pages)
+        self.col_start, self.col_end = 0, 127
+        self.page_start, self.page_end = 0, self.pages - 1
+        self.col = 0
+        self.page = 0
+        self.display_on = False
+        self._cmd = []
+        self.transactions = 0
+        self.bytes_received = 0
+        self.data_bytes = 0
+
+    def _command(self, byte):
+        self._cmd.append(byte)
+        if len(self._cmd) <= _ARGS.get(self._cmd[0], 0):
+            return
+        cmd = self._cmd
+        self._cmd = []
+        op = cmd[0]
+        if op == 0x21:
+            self.col_start, self.col_end = cmd[1], cmd[2]
+            self.col = cmd[1]
+        elif op == 0x22:
+            self.page_start, self.page_end = cmd[1], cmd[2]
+            self.page = cmd[1]
+        elif op in (0xAE, 0xAF):
+            self.display_on = op == 0xAF
+
+    def _data(self, byte):
+        self.ram[self.page * 128 + self.col] = byte
+        self.data_bytes += 1
+        if self.col == self.col_end:
+            self.col = self.col_start
+            self.page = self.page_start if self.page == self.page_end else self.page + 1
+        else:
+            self.col += 1
+
+    def writeto(self, addr, buf):
+        self.transactions += 1
+        self.bytes_received += len(buf) + 1  # Kể cả byte địa chỉ
+        i = 0
+        n = len(buf)
+        while i < n:
+            ctrl = buf[i]
+            i += 1
+            if ctrl & 0x80:
+                # Co = 1: đúng một byte theo sau, sau đó lại là byte điều khiển
+                if i < n:
+                    (self._data if ctrl & 0x40 else self._command)(buf[i])
+                    i += 1
+                continue
+            # Co = 0: toàn bộ phần còn lại là lệnh hoặc dữ liệu
+            handler = self._data if ctrl & 0x40 else self._command
+            while i < n:
+                handler(buf[i])
+                i += 1
+
+    def visible(self, offset=0):
+        """
+        Returns:
+            bytes: RAM của vùng hiển thị (theo định dạng buffer của SSD1306_I2C).
+        """
+        out = bytearray()
+        for p in range(self.pages):
+            out += self.ram[p * 128 + offset:p * 128 + offset + self.width]
+        return bytes(out)
@@ -0,0 +1,51 @@
+# sim_tca9548a.py
+# Bộ chọn kênh TCA9548A mô phỏng trên bus I2C giả lập (fakes/machine.I2C): thanh ghi điều khiển ở địa chỉ
+# của bộ chọn kênh, giao dịch tới các địa chỉ khác được chuyển cho thiết bị trên kênh đang bật.
+# Gắn vào bus: mux = i2c.attach(0x70, SimulatedTCA9548A()); mux.attach(0, dev0); mux.attach(1, dev1);
+#              i2c.attach(0x57, mux)  (bộ chọn kênh nhận cả giao dịch của địa chỉ phía sau nó)
+
+
+class SimulatedTCA9548A:
+    def __init__(self, addr=0x70):
+        self.addr = addr
+        self.control = 0x00     # Sau khi bật nguồn không kênh nào được nối
+        self.channels = [[] for _ in range(8)]
+        self.selects = 0
+        self.routed = 0
+
+    def attach(self, channel, device):
+        """
+        Gắn thiết bị mô phỏng (có thuộc tính addr) vào một kênh.
+        """
+        self.channels[channel].append(device)
+        return device
+
+    def _target(self, addr):
+        found = [dev for ch in range(8) if self.control & (1 << ch)
+                 for dev in self.channels[ch] if getattr(dev, 'addr', None) == addr]
+        if not found:
+            raise OSError(19)   # ENODEV: không thiết bị nào ACK
+        if len(found) > 1:
+            raise OSError(5)    # EIO: hai thiết bị cùng địa chỉ trên các kênh đang bật
+        self.routed += 1
+        return found[0]
+
+    # Giao diện giống machine.I2C
+    def writeto(self, addr, buf):
+        if addr == self.addr:
+            self.control = buf[-1]
+            self.selects += 1
+            return
+        self._target(addr).writeto(addr, buf)
+
+    def readfrom_into(self, addr, buf):
+        if addr == self.addr:
+            buf[0] = self.control
+            return
+        self._target(addr).readfrom_into(addr, buf)
+
+    def writeto_mem(self, addr, reg, buf):
+        self._target(addr).writeto_mem(addr, reg, buf)
+
+    def readfrom_mem_into(self, addr, reg, buf):
+        self._target(addr).readfrom_mem_into(addr, reg, buf)
@@ -0,0 +1,161 @@
+# validate_fixed.py
+# So sánh chuỗi xử lý số nguyên (fixed_dsp, MAX30102(dsp='fixed')) với chuỗi số thực trên các kịch bản
+# tín hiệu tổng hợp: từng khâu với cùng một đầu vào (IIR so với Kalman, phát hiện nhịp, SpO2) và cả chuỗi
+# qua cảm biến mô phỏng. Sai lệch trung bình phải nằm trong fixed_dsp.TOLERANCE_HR / TOLERANCE_SPO2;
+# kịch bản mà chính chuỗi số thực đã sai so với giá trị thật (ví dụ tưới máu thấp) chỉ được báo cáo.
+# Chạy: python bench/validate_fixed.py [--duration 60] [--scenario normal]
+import argparse
+import os
+import sys
+import time
+from array import array
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+import host
+host.install()
+
+import max30102
+from beat_detector import BeatDetector
+from filters import KalmanFilter
+from fixed_dsp import (FixedIIR, FixedBeatDetector, FixedSpO2Engine, NATIVE,
+                       TOLERANCE_HR, TOLERANCE_SPO2)
+from ppg_synth import PPGGenerator, SCENARIOS
+from sim_max30102 import SimulatedMAX30102
+from spo2_engine import SpO2Engine
+
+BLOCK = 25          # Số mẫu mỗi lô (một lần đọc FIFO ở 100 Hz, 250 ms)
+SETTLE_S = 10       # Bỏ qua giai đoạn khởi động
+BLOCK_S = 0.25
+REFERENCE_HR_MAE = 5    # bpm: chuỗi số thực sai hơn mức này so với giá trị thật thì không dùng làm chuẩn
+
+
+def _mean(values):
+    return sum(values) / len(values) if values else 0.0
+
+
+def _generate(config, seconds):
+    gen = PPGGenerator(**config)
+    n = int(seconds * gen.sample_rate)
+    red = array('i', [0] * n)
+    ir = array('i', [0] * n)
+    for k in range(n):
+        red[k], ir[k] = gen()
+    return gen.sample_rate, red, ir, gen.hr
+
+
+def compare_stages(config, seconds):
+    """
+    Đưa cùng một chuỗi mẫu thô qua từng cặp khâu số thực / số nguyên, so sánh mỗi giây sau khi ổn định.
+    """
+    rate, red, ir, true_hr = _generate(config, seconds)
+    n = len(ir)
+    kalman = KalmanFilter()
+    iir = FixedIIR(kalman.k_ss)
+    beat_f = BeatDetector(rate)
+    beat_i = FixedBeatDetector(rate)
+    spo2_f = SpO2Engine(rate)
+    spo2_i = FixedSpO2Engine(rate)
+    kf_out = array('f', [0.0] * BLOCK)
+    iir_out = array('i', [0] * BLOCK)
+    iir_err = 0.0
+    hr_err = []
+    spo2_err = []
+    r_err = []
+    ref_err = []
+    for start in range(0, n - BLOCK + 1, BLOCK):
+        red_blk = red[start:start + BLOCK]
+        ir_blk = ir[start:start + BLOCK]
+        kalman.update_block(ir_blk, kf_out, BLOCK)
+        iir.update_block(ir_blk, iir_out, BLOCK)
+        beat_f.process_block(ir_blk, BLOCK)
+        beat_i.process_block(ir_blk, BLOCK)
+        spo2_f.process_block(red_blk, ir_blk, BLOCK)
+        spo2_i.process_block(red_blk, ir_blk, BLOCK)
+        end = start + BLOCK
+        if end < SETTLE_S * rate:
+            continue
+        for j in range(BLOCK):
+            iir_err = max(iir_err, abs(kf_out[j] - iir_out[j]))
+        if end % rate == 0:
+            hr_err.append(abs(beat_f.heart_rate - beat_i.heart_rate))
+            ref_err.append(abs(beat_f.heart_rate - true_hr))
+            spo2_err.append(abs(spo2_f.spo2 - spo2_i.spo2))
+            r_err.append(abs(spo2_f.r_ratio - spo2_i.r_ratio))
+    return {
+        'iir_max_err': round(iir_err, 1),
+        'beats': (beat_f.beat_count, beat_i.beat_count),
+        'hr_mean_err': round(_mean(hr_err), 3),
+        'hr_max_err': round(max(hr_err), 2) if hr_err else 0,
+        'spo2_mean_err': round(_mean(spo2_err), 3),
+        'spo2_max_err': round(max(spo2_err), 2) if spo2_err else 0,
+        'r_max_err': round(max(r_err), 4) if r_err else 0,
+        'float_hr_mae': round(_mean(ref_err), 2),
+    }
+
+
+def compare_chain(config, seconds):
+    """
+    Chạy hai MAX30102 (dsp='float' và dsp='fixed') trên cùng tín hiệu mô phỏng.
+    """
+    results = {}
+    series = {}
+    truth = 0
+    for dsp in ('float', 'fixed'):
+        gen = PPGGenerator(**config)
+        truth = gen.hr
+        dev = SimulatedMAX30102(gen, gen.sample_rate)
+        sensor = max30102.MAX30102(dev, dsp=dsp)
+        busy = 0.0
+        processed = 0
+        values = []
+        for b in range(int(seconds / BLOCK_S)):
+            dev.advance(BLOCK_S)
+            t0 = time.perf_counter()
+            while True:
+                n = sensor.process_fifo()
+                if n == 0:
+                    break
+                processed += n
+            busy += time.perf_counter() - t0
+            if (b + 1) * BLOCK_S >= SETTLE_S and b % 4 == 3:
+                values.append((sensor.calculate_heart_rate(), sensor.calculate_spo2()))
+        series[dsp] = values
+        results[dsp + '_us_per_sample'] = round(busy * 1e6 / processed, 2) if processed else None
+    pairs = list(zip(series['float'], series['fixed']))
+    hr_err = [abs(f[0] - x[0]) for f, x in pairs]
+    spo2_err = [abs(f[1] - x[1]) for f, x in pairs]
+    results['hr_mean_err'] = round(_mean(hr_err), 3)
+    results['spo2_mean_err'] = round(_mean(spo2_err), 3)
+    results['float_hr_mae'] = round(_mean([abs(f[0] - truth) for f in series['float']]), 2)
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Validate the fixed-point DSP chain against the float chain")
+    parser.add_argument('--duration', type=float, default=60, help="Số giây tín hiệu mỗi kịch bản")
+    parser.add_argument('--scenario', action='append', help="Chỉ chạy kịch bản này (có thể lặp lại)")
+    args = parser.parse_args()
+    names = args.scenario or sorted(SCENARIOS)
+    print("native: {}  tolerance: HR {} bpm, SpO2 {} %".format(NATIVE, TOLERANCE_HR, TOLERANCE_SPO2))
+    failed = []
+    for name in names:
+        stages = compare_stages(SCENARIOS[name], args.duration)
+        chain = compare_chain(SCENARIOS[name], args.duration)
+        print("{:14s} stages {}".format(name, stages))
+        print("{:14s} chain  {}".format('', chain))
+        for result in (stages, chain):
+            if result['spo2_mean_err'] > TOLERANCE_SPO2:
+                failed.append(name)
+            elif result['hr_mean_err'] > TOLERANCE_HR:
+                if result['float_hr_mae'] > REFERENCE_HR_MAE:
+                    print("{:14s} (float HR off by {} bpm: not a valid reference)".format('', result['float_hr_mae']))
+                else:
+                    failed.append(name)
+    if failed:
+        print("FAIL:", ', '.join(sorted(set(failed))))
+        sys.exit(1)
+    print("OK")
+
+
+if __name__ == '__main__':
+    main()
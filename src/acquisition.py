@@ -0,0 +1,116 @@
+# acquisition.py
+# Thu mẫu theo ngắt: MAX30102 kéo chân INT xuống khi FIFO gần đầy, trình phục vụ ngắt chỉ lên lịch
+# một lần đọc theo lô; việc đọc I2C và xử lý chạy ngoài ngữ cảnh ngắt, độc lập với vòng lặp hiển thị.
+import time
+from machine import Pin
+from micropython import schedule
+
+REG_INTR_STATUS_1 = 0x00
+REG_INTR_STATUS_2 = 0x01
+REG_INTR_ENABLE_1 = 0x02
+REG_FIFO_CONFIG = 0x08
+
+INTR_A_FULL = 0x80  # Bit A_FULL trong thanh ghi Interrupt Enable/Status 1
+
+
+class InterruptAcquisition:
+    def __init__(self, sensor, int_pin=15, almost_full=24, on_batch=None):
+        """
+        Khởi tạo chế độ thu mẫu theo ngắt FIFO gần đầy.
+        Args:
+            sensor (MAX30102): Cảm biến đã được setup().
+            int_pin (int/Pin, optional): Chân GPIO nối với chân INT (open-drain, tích cực mức thấp). Mặc định là 15.
+            almost_full (int, optional): Số mẫu trong FIFO để phát ngắt (17-31). Mặc định là 24.
+                Không dùng 32: khi FIFO vừa đầy mà chưa tràn, con trỏ ghi bằng con trỏ đọc
+                nên không phân biệt được với FIFO rỗng.
+            on_batch (function, optional): Hàm gọi lại on_batch(n) sau mỗi lô được xử lý.
+        """
+        self.sensor = sensor
+        self.pin = int_pin if isinstance(int_pin, Pin) else Pin(int_pin, Pin.IN, Pin.PULL_UP)
+        self.almost_full = max(17, min(almost_full, 31))
+        self.on_batch = on_batch
+        self.running = False
+        # Giữ sẵn tham chiếu phương thức: tạo bound method trong ngắt cứng sẽ cấp phát bộ nhớ
+        self._service_ref = self._service
+        self._scheduled = False
+        self._status = bytearray(2)
+        self.interrupts = 0
+        self.batches = 0
+        self.samples = 0
+        self.missed_schedules = 0
+        self.last_irq_us = 0
+        self.max_latency_us = 0     # Từ lúc ngắt đến lúc bắt đầu đọc FIFO
+        self.max_service_us = 0     # Thời gian đọc và xử lý một lô
+
+    def start(self):
+        """
+        Cấu hình ngưỡng FIFO_A_FULL, bật ngắt A_FULL và gắn trình xử lý ngắt vào chân INT.
+        """
+        sensor = self.sensor
+        fifo_config = sensor.read_reg(REG_FIFO_CONFIG)[0]
+        # FIFO_A_FULL (4 bit thấp) là số ô trống còn lại khi phát ngắt
+        sensor.write_reg(REG_FIFO_CONFIG, (fifo_config & 0xF0) | (32 - self.almost_full))
+        sensor.write_reg(REG_INTR_ENABLE_1, INTR_A_FULL)
+        self.running = True
+        self.pin.irq(trigger=Pin.IRQ_FALLING, handler=self._irq)
+        # Xóa ngắt đang chờ và đọc hết FIFO, nếu không chân INT có thể đã ở mức thấp từ trước
+        self._service(0)
+
+    def stop(self):
+        """
+        Tắt ngắt và gỡ trình xử lý khỏi chân INT.
+        """
+        self.running = False
+        self.pin.irq(handler=None)
+        self.sensor.write_reg(REG_INTR_ENABLE_1, 0x00)
+
+    def _irq(self, pin):
+        # Ngữ cảnh ngắt: không cấp phát bộ nhớ, không truy cập I2C
+        self.interrupts += 1
+        self.last_irq_us = time.ticks_us()
+        if self._scheduled:
+            return
+        try:
+            schedule(self._service_ref, 0)
+            self._scheduled = True
+        except RuntimeError:
+            self.missed_schedules += 1  # Hàng đợi schedule đầy, lô sẽ được đọc ở ngắt sau
+
+    def _service(self, _):
+        self._scheduled = False
+        if not self.running:
+            return
+        sensor = self.sensor
+        start = time.ticks_us()
+        latency = time.ticks_diff(start, self.last_irq_us)
+        if self.last_irq_us and latency > self.max_latency_us:
+            self.max_latency_us = latency
+        # Đọc thanh ghi trạng thái để nhả chân INT, sau đó đọc FIFO đến khi rỗng
+        sensor.i2c.readfrom_mem_into(sensor.addr, REG_INTR_STATUS_1, self._status)
+        while True:
+            n = sensor.process_fifo()
+            if n == 0:
+                break
+            self.samples += n
+            self.batches += 1
+            if self.on_batch:
+                self.on_batch(n)
+        elapsed = time.ticks_diff(time.ticks_us(), start)
+        if elapsed > self.max_service_us:
+            self.max_service_us = elapsed
+
+    def stats(self):
+        """
+        Returns:
+            dict: Số ngắt, số lô, số mẫu, số lần lên lịch bị lỡ, số mẫu mất do tràn FIFO,
+                  độ trễ và thời gian phục vụ lớn nhất (us).
+        """
+        return {
+            'interrupts': self.interrupts,
+            'batches': self.batches,
+            'samples': self.samples,
+            'missed_schedules': self.missed_schedules,
+            'overflow': self.sensor.overflow_count,
+            'max_latency_us': self.max_latency_us,
+            'max_service_us': self.max_service_us,
+        }
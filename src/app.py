@@ -0,0 +1,372 @@
+# app.py
+# Chạy ứng dụng bằng các tác vụ asyncio hợp tác (tương thích uasyncio): thu mẫu, xử lý tín hiệu,
+# làm mới màn hình, nút nhấn, theo dõi pin và ghi thẻ nhớ, mỗi tác vụ có chu kỳ riêng và giao tiếp
+# qua hàng đợi có giới hạn.
+import time
+from array import array
+
+try:
+    import uasyncio as asyncio
+except ImportError:
+    import asyncio
+
+from max30102 import FIFO_DEPTH
+from power_profiles import PROFILES
+from profiler import profiler, RENDER, SD_FLUSH, SerialConsole
+from queues import BoundedQueue, SampleQueue
+
+# Chu kỳ mặc định của từng tác vụ (ms)
+DEFAULT_PERIODS = {
+    'acquisition': 50,     # FIFO 32 mẫu ở 100 Hz đầy sau 320 ms
+    'display': 100,
+    'buttons': 20,
+    'battery': 5000,
+    'logging': 1000,
+    'results': 1000,       # Chu kỳ đẩy kết quả HR/SpO2 sang hàng đợi ghi thẻ nhớ
+}
+
+
+class TaskStats:
+    def __init__(self):
+        """
+        Thống kê thời gian chạy của một tác vụ.
+        """
+        self.runs = 0
+        self.total_us = 0
+        self.max_us = 0
+        self.overruns = 0   # Số lần tác vụ chạy trễ hơn chu kỳ đã cấu hình
+
+    def record(self, elapsed_us):
+        self.runs += 1
+        self.total_us += elapsed_us
+        if elapsed_us > self.max_us:
+            self.max_us = elapsed_us
+
+    def as_dict(self):
+        return {
+            'runs': self.runs,
+            'avg_us': self.total_us // self.runs if self.runs else 0,
+            'max_us': self.max_us,
+            'overruns': self.overruns,
+        }
+
+
+class App:
+    def __init__(self, sensor, display, battery, buttons, history, buzzer, microsd=None,
+                 periods=None, acquisition=None, sample_queue_size=256, log_path='/sd/results.csv',
+                 sample_logger=None, profiles=None, console=False):
+        """
+        Khởi tạo ứng dụng.
+        Args:
+            sensor (MAX30102): Cảm biến.
+            display (OLEDDisplay): Màn hình.
+            battery (BatteryCharge): Theo dõi pin.
+            buttons (ButtonManager): Nút nhấn.
+            history (HistoryManager): Lịch sử đo.
+            buzzer (Buzzer): Còi báo.
+            microsd (MicroSD, optional): Thẻ nhớ để ghi kết quả. Mặc định là None.
+            periods (dict, optional): Ghi đè chu kỳ (ms) trong DEFAULT_PERIODS.
+            acquisition (InterruptAcquisition, optional): Nếu có, mẫu được thu theo ngắt và
+                không chạy tác vụ thu/xử lý theo chu kỳ. Mặc định là None.
+            sample_queue_size (int, optional): Dung lượng hàng đợi mẫu thô. Mặc định là 256.
+            log_path (str, optional): File kết quả trên thẻ nhớ. Mặc định là '/sd/results.csv'.
+            sample_logger (SDLogger, optional): Ghi mẫu thô dạng nhị phân; các khối đầy được ghi
+                ra thẻ trong tác vụ ghi log. Mặc định là None.
+            profiles (dict, optional): Các cấu hình năng lượng (mặc định là power_profiles.PROFILES);
+                cần có 'measuring', 'idle' và 'low_battery'.
+            console (bool, optional): Đọc lệnh của profiler từ REPL/UART ('p' in thống kê, 'r' xóa,
+                'e'/'d' bật/tắt). Mặc định là False.
+        """
+        self.sensor = sensor
+        self.display = display
+        self.battery = battery
+        self.buttons = buttons
+        self.history = history
+        self.buzzer = buzzer
+        self.microsd = microsd
+        self.acquisition = acquisition
+        self.log_path = log_path
+        self.sample_logger = sample_logger
+        if sample_logger is not None:
+            sensor.logger = sample_logger
+        self.periods = dict(DEFAULT_PERIODS)
+        if periods:
+            self.periods.update(periods)
+
+        self.profiles = profiles or PROFILES
+        self.profile = None
+        self.console = SerialConsole(profiler) if console else None
+
+        self.samples = SampleQueue(sample_queue_size)
+        self.results = BoundedQueue(32)
+        self.task_stats = {}
+        self.running = False
+        self.battery_percentage = 0
+        self.alert_interval_ms = 2000
+        self._last_alert = time.ticks_ms()
+        self.nn_interval_ms = 1000   # Mô hình NN chạy trên cả cửa sổ đặc trưng: tối đa 1 lần/giây
+        self._last_nn = None
+        # Bộ đệm cho tác vụ xử lý lấy mẫu từ hàng đợi
+        self._red = array('i', [0] * FIFO_DEPTH)
+        self._ir = array('i', [0] * FIFO_DEPTH)
+        if battery.on_low_battery is None:
+            battery.on_low_battery = self.on_low_battery
+        buttons.set_callbacks(
+            on_button1_press=self.on_button1_press,
+            on_button2_press=self.on_button2_press,
+            on_button2_long_press=self.on_button2_long_press,
+            on_button3_press=self.on_button3_press,
+            on_button3_long_press=self.on_button3_long_press,
+        )
+        # Chế độ dạng sóng vẽ trực tiếp từ bộ đệm IR của cảm biến
+        display.waveform_source = sensor.ir_buffer
+
+    def _stats(self, name):
+        stats = self.task_stats.get(name)
+        if stats is None:
+            stats = self.task_stats[name] = TaskStats()
+        return stats
+
+    async def _periodic(self, name, func):
+        # Chạy func theo chu kỳ cố định; nếu bị trễ thì đặt lại mốc thời gian thay vì chạy bù
+        stats = self._stats(name)
+        next_run = time.ticks_ms()
+        while self.running:
+            t0 = time.ticks_us()
+            func()
+            stats.record(time.ticks_diff(time.ticks_us(), t0))
+            next_run = time.ticks_add(next_run, self.periods[name])
+            delay = time.ticks_diff(next_run, time.ticks_ms())
+            if delay < 0:
+                stats.overruns += 1
+                next_run = time.ticks_ms()
+                delay = 0
+            await asyncio.sleep(delay / 1000)
+
+    # Các tác vụ
+
+    def acquire(self):
+        """
+        Đọc một lô từ FIFO và đẩy mẫu thô vào hàng đợi cho tác vụ xử lý.
+        """
+        sensor = self.sensor
+        n = sensor.read_fifo_burst()
+        if n:
+            self.samples.put_batch(sensor.fifo_red, sensor.fifo_ir, n)
+
+    async def processing_task(self):
+        """
+        Chờ mẫu trong hàng đợi và chạy chuỗi xử lý tín hiệu (lọc, HR, SpO2).
+        """
+        stats = self._stats('processing')
+        while self.running:
+            await self.samples.wait()
+            t0 = time.ticks_us()
+            while True:
+                n = self.samples.get_batch(self._red, self._ir, FIFO_DEPTH)
+                if n == 0:
+                    break
+                self.sensor.process_samples(self._red, self._ir, n)
+            self.update_results()
+            stats.record(time.ticks_diff(time.ticks_us(), t0))
+            await asyncio.sleep(0)
+
+    def update_results(self):
+        """
+        Cập nhật HR/SpO2 hiển thị, HR dự đoán bằng NN (giới hạn tần suất bằng nn_interval_ms; None khi
+        không có mô hình, màn hình ẩn trường này) và phát cảnh báo (giới hạn tần suất bằng alert_interval_ms).
+        """
+        display = self.display
+        display.hr = self.sensor.calculate_heart_rate()
+        display.spo2 = self.sensor.calculate_spo2()
+        now = time.ticks_ms()
+        if self._last_nn is None or time.ticks_diff(now, self._last_nn) >= self.nn_interval_ms:
+            self._last_nn = now
+            display.nn_hr = self.sensor.predict_heart_rate()
+        if not display.alert_sound_enabled or not display.hr:
+            return
+        if time.ticks_diff(now, self._last_alert) < self.alert_interval_ms:
+            return
+        if display.hr < 40 or display.hr > 120 or (display.spo2 and display.spo2 < 90):
+            self._last_alert = now
+            self.buzzer.beep()
+
+    def push_result(self):
+        """
+        Đưa kết quả hiện tại vào hàng đợi ghi thẻ nhớ.
+        """
+        if self.display.current_mode == "measurement" and self.display.hr:
+            self.results.put_nowait((time.time(), self.display.hr, self.display.spo2))
+
+    def refresh_display(self):
+        # Vẽ toàn bộ khung hình rồi gửi một lần (chỉ các vùng thay đổi)
+        display = self.display
+        profiler.begin(RENDER)
+        display.begin_frame()
+        if display.current_mode == "measurement":
+            display.display_data(display.hr, display.spo2, display.nn_hr)
+        elif display.current_mode == "history":
+            display.display_history_data(self.history)
+        elif display.current_mode == "stats":
+            display.display_stats()
+        display.display_battery(self.battery_percentage)  # Hiển thị ở dòng cuối cùng
+        profiler.end(RENDER)
+        display.end_frame()
+
+    def handle_buttons(self):
+        # Các cạnh đã được ghi trong ngắt; ở đây chỉ phân loại và gọi các callback on_button*
+        self.buttons.check_events()
+        self.select_profile()
+
+    def set_profile(self, name):
+        """
+        Áp dụng một cấu hình năng lượng: cấu hình lại (hoặc tắt) cảm biến và đổi chu kỳ các tác vụ.
+        Args:
+            name (str): Tên cấu hình trong self.profiles.
+        """
+        profile = self.profiles[name]
+        sensor_config = profile['sensor']
+        if sensor_config is None:
+            if not self.sensor.shutdown:
+                self.sensor.sleep()
+        elif self.sensor.shutdown or not _same_config(self.sensor.config, sensor_config):
+            self.sensor.configure(**sensor_config)
+        self.periods.update(profile['periods'])
+        self.profile = name
+
+    def select_profile(self):
+        """
+        Chọn cấu hình theo trạng thái: xem lịch sử -> 'idle', pin yếu -> 'low_battery', còn lại 'measuring'.
+        """
+        if self.display.current_mode == "history":
+            name = 'idle'
+        elif self.battery.low:
+            name = 'low_battery'
+        else:
+            name = 'measuring'
+        if name != self.profile:
+            self.set_profile(name)
+
+    def on_button1_press(self):
+        self.display.next_display_mode()
+
+    def on_button2_press(self):
+        display = self.display
+        if display.current_mode == "measurement":
+            display.current_mode = "history"
+            display.history_page_index = 0  # Đặt lại chỉ số trang khi chuyển sang chế độ lịch sử
+        elif display.current_mode == "history":
+            display.history_page_index = max(0, display.history_page_index - 1)  # Di chuyển lên
+
+    def on_button2_long_press(self):
+        # Nhấn giữ nút 2: quay về màn hình đo
+        self.display.current_mode = "measurement"
+
+    def on_button3_long_press(self):
+        # Nhấn giữ nút 3: bật/tắt trang thống kê (bật cả profiler khi vào trang)
+        display = self.display
+        if display.current_mode == "stats":
+            display.current_mode = "measurement"
+        else:
+            display.current_mode = "stats"
+            profiler.enable()
+
+    def on_button3_press(self):
+        display = self.display
+        if display.current_mode == "history":
+            display.history_page_index = min(display.history_page_index + 1, self.history.get_history_length() - 1)  # Di chuyển xuống
+
+    def read_battery(self):
+        # Tác vụ chu kỳ thấp lấy mẫu ADC; màn hình chỉ dùng giá trị đã lưu
+        self.battery_percentage = self.battery.update()
+        self.select_profile()
+
+    def on_low_battery(self, percentage):
+        print("Low battery:", percentage, "%")
+        self.buzzer.beep(500)
+
+    def write_log(self):
+        """
+        Ghi các kết quả đang chờ ra thẻ nhớ trong một lần mở file và các khối mẫu thô đã đầy.
+        """
+        profiler.begin(SD_FLUSH)
+        if self.sample_logger is not None:
+            self.sample_logger.flush()
+        if len(self.results) and self.microsd and self.microsd.is_mounted():
+            try:
+                with open(self.log_path, 'a') as f:
+                    while len(self.results):
+                        t, hr, spo2 = self.results.get_nowait()
+                        f.write("{},{:.1f},{:.1f}\n".format(t, hr, spo2))
+            except OSError:
+                print("Error writing", self.log_path)
+        profiler.end(SD_FLUSH)
+
+    def check_console(self):
+        self.console.check()
+
+    def stats(self):
+        """
+        Returns:
+            dict: Thống kê từng tác vụ và số phần tử bị bỏ ở các hàng đợi.
+        """
+        result = {name: s.as_dict() for name, s in self.task_stats.items()}
+        result['profile'] = self.profile
+        if profiler.enabled:
+            result['profiler'] = profiler.stats()
+        result['queues'] = {'samples_dropped': self.samples.dropped, 'results_dropped': self.results.dropped}
+        if hasattr(self.buttons, 'stats'):
+            result['buttons'] = self.buttons.stats()
+        if self.sample_logger is not None:
+            result['sample_log'] = self.sample_logger.stats()
+        return result
+
+    async def main(self):
+        """
+        Tạo và chạy tất cả các tác vụ.
+        """
+        self.running = True
+        self.read_battery()   # Cũng chọn cấu hình năng lượng ban đầu
+        tasks = [
+            self._periodic('display', self.refresh_display),
+            self._periodic('buttons', self.handle_buttons),
+            self._periodic('battery', self.read_battery),
+            self._periodic('logging', self.write_log),
+            self._periodic('results', self.push_result),
+        ]
+        if self.console is not None:
+            self.periods.setdefault('console', 200)
+            tasks.append(self._periodic('console', self.check_console))
+        if self.acquisition is None:
+            tasks.append(self._periodic('acquisition', self.acquire))
+            tasks.append(self.processing_task())
+        else:
+            # Mẫu đã được xử lý trong ngắt đã lên lịch, chỉ cần cập nhật kết quả định kỳ
+            self.periods.setdefault('processing', self.periods['display'])
+            tasks.append(self._periodic('processing', self.update_results))
+            self.acquisition.start()
+        await asyncio.gather(*tasks)
+
+    def run(self):
+        asyncio.run(self.main())
+
+    def stop(self):
+        """
+        Dừng tất cả các tác vụ sau lượt chạy hiện tại.
+        """
+        self.running = False
+        self.samples.wake()
+        if self.acquisition is not None:
+            self.acquisition.stop()
+        if self.sample_logger is not None:
+            self.sample_logger.close()
+
+
+def _same_config(current, wanted):
+    # Cấu hình hiện tại của cảm biến đã có đủ các giá trị của cấu hình mong muốn
+    if current is None:
+        return False
+    for key, value in wanted.items():
+        if current.get(key) != value:
+            return False
+    return True
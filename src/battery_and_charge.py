@@ -1,52 +1,193 @@
 # battery_and_charge.py
+# Theo dõi pin: lấy mẫu ADC ở tần số thấp (nhiều lần đọc rồi lấy trung bình, lọc thông thấp), lưu kết quả
+# để giao diện đọc lại không tốn chi phí, đổi điện áp sang phần trăm theo đường cong xả Li-ion.
 from machine import Pin, ADC
-import time
+
+try:
+    from micropython import schedule
+except ImportError:
+    schedule = None
+
+# Đường cong xả Li-ion 1 cell khi tải nhẹ: (điện áp V, phần trăm), điện áp tăng dần
+LIION_CURVE = (
+    (3.30, 0),
+    (3.50, 5),
+    (3.61, 10),
+    (3.67, 20),
+    (3.71, 30),
+    (3.75, 40),
+    (3.80, 50),
+    (3.85, 60),
+    (3.92, 70),
+    (4.00, 80),
+    (4.10, 90),
+    (4.20, 100),
+)
+
+
+def voltage_to_percentage(voltage, curve=LIION_CURVE):
+    """
+    Nội suy tuyến tính phần trăm pin theo bảng điện áp.
+    Args:
+        voltage (float): Điện áp pin (V).
+        curve (tuple, optional): Các cặp (điện áp, phần trăm) theo điện áp tăng dần. Mặc định là LIION_CURVE.
+    Returns:
+        int: Phần trăm pin (0-100).
+    """
+    if voltage <= curve[0][0]:
+        return curve[0][1]
+    for i in range(1, len(curve)):
+        v1, p1 = curve[i]
+        if voltage <= v1:
+            v0, p0 = curve[i - 1]
+            return int(p0 + (p1 - p0) * (voltage - v0) / (v1 - v0) + 0.5)
+    return curve[-1][1]
+
 
 class BatteryCharge:
-    def __init__(self, adc_pin=0, battery_voltage=4.2, resistor_divider=1):
-        """
-        old: 
-            self, adc_pin=0, battery_voltage=4.2, resistor_divider=1
-        """
+    def __init__(self, adc_pin=0, battery_voltage=4.2, resistor_divider=1, charge_status_pin=None,
+                 oversample=16, alpha=0.3, curve=LIION_CURVE, low_percentage=15, hysteresis=3,
+                 vref=3.3, on_low_battery=None):
         """
         Khởi tạo module BatteryCharge.
         Args:
             adc_pin (int, optional): Chân ADC được kết nối với pin đo điện áp. Mặc định là 0 (A0).
-            battery_voltage (float, optional): Điện áp của pin khi đầy. Mặc định là 3.7V.
-            resistor_divider (int, optional): Tỉ số của bộ chia điện áp (nếu có). Mặc định là 2.
+            battery_voltage (float, optional): Không còn dùng, giữ ở vị trí cũ để các lời gọi theo vị trí
+                vẫn đúng; điện áp khi đầy là điểm cuối của curve.
+            resistor_divider (float, optional): Tỉ số của bộ chia điện áp (nếu có). Mặc định là 1.
+            charge_status_pin (int, optional): Chân GPIO nối với chân báo sạc của TP4056. Mặc định là None.
+            oversample (int, optional): Số lần đọc ADC lấy trung bình cho mỗi mẫu. Mặc định là 16.
+            alpha (float, optional): Hệ số bộ lọc thông thấp giữa các mẫu (1 = không lọc). Mặc định là 0.3.
+            curve (tuple, optional): Bảng (điện áp, phần trăm) của pin; điểm cuối là điện áp khi đầy.
+                Mặc định là LIION_CURVE (4.2V).
+            low_percentage (int, optional): Ngưỡng báo pin yếu (%). Mặc định là 15.
+            hysteresis (int, optional): Pin phải vượt ngưỡng thêm bấy nhiêu % mới hết báo pin yếu. Mặc định là 3.
+            vref (float, optional): Điện áp ứng với giá trị ADC lớn nhất khi không có read_uv(). Mặc định là 3.3V.
+            on_low_battery (function, optional): Hàm gọi lại on_low_battery(percentage) khi pin vừa xuống dưới ngưỡng.
         """
         self.adc = ADC(Pin(adc_pin))
-        self.adc.atten(ADC.ATTN_11DB)  # Đặt dải đo của ADC (0-3.3V)
-        self.battery_voltage = battery_voltage
+        if hasattr(ADC, 'ATTN_11DB'):
+            self.adc.atten(ADC.ATTN_11DB)  # ESP32: dải đo đến khoảng 3.3V
+        if hasattr(self.adc, 'read_uv'):
+            self._read = self.adc.read_uv       # ESP32: đã hiệu chỉnh theo eFuse, đơn vị uV
+            self._scale = 1e-6
+        elif hasattr(self.adc, 'read_u16'):
+            self._read = self.adc.read_u16      # Mọi cổng: 0-65535 bất kể độ phân giải thật
+            self._scale = vref / 65535
+        else:
+            self._read = self.adc.read
+            self._scale = vref / 1023
         self.resistor_divider = resistor_divider
+        self.charge_pin = Pin(charge_status_pin, Pin.IN) if charge_status_pin is not None else None
+        self.oversample = max(1, oversample)
+        self.alpha = alpha
+        self.curve = curve
+        self.low_percentage = low_percentage
+        self.hysteresis = hysteresis
+        self.on_low_battery = on_low_battery
+        # Kết quả đã lưu
+        self.voltage = None
+        self.percentage = 0
+        self.charging = False
+        self.low = False
+        self.samples = 0
+        self.timer = None
+        self._update_ref = self._scheduled_update
+
+    def _sample_voltage(self):
+        read = self._read
+        total = 0
+        for _ in range(self.oversample):
+            total += read()
+        return total * self._scale / self.oversample * self.resistor_divider
+
+    def update(self):
+        """
+        Lấy một mẫu điện áp (đọc ADC oversample lần), lọc và cập nhật phần trăm, trạng thái sạc và pin yếu.
+        Gọi ở tần số thấp (vài giây một lần); giao diện chỉ đọc các giá trị đã lưu.
+        Returns:
+            int: Phần trăm pin.
+        """
+        v = self._sample_voltage()
+        if self.voltage is None:
+            self.voltage = v
+        else:
+            self.voltage += self.alpha * (v - self.voltage)
+        self.samples += 1
+        self.percentage = voltage_to_percentage(self.voltage, self.curve)
+        if self.charge_pin is not None:
+            self.charging = self.charge_pin.value() == 0  # Thay đổi logic tùy thuộc vào module TP4056
+        if self.charging:
+            self.low = False
+        elif not self.low and self.percentage <= self.low_percentage:
+            self.low = True
+            if self.on_low_battery:
+                self.on_low_battery(self.percentage)
+        elif self.low and self.percentage > self.low_percentage + self.hysteresis:
+            self.low = False
+        return self.percentage
+
+    def _scheduled_update(self, _):
+        self.update()
+
+    def _timer_callback(self, timer):
+        # Timer có thể chạy trong ngắt cứng: đẩy việc đọc ADC ra ngoài bằng micropython.schedule
+        if schedule is None:
+            self.update()
+            return
+        try:
+            schedule(self._update_ref, 0)
+        except RuntimeError:
+            pass   # Hàng đợi schedule đầy: bỏ qua lần này
+
+    def start(self, period_ms=5000, timer_id=-1):
+        """
+        Lấy mẫu nền bằng Timer (khi không chạy trong App, nơi tác vụ 'battery' gọi update()).
+        Args:
+            period_ms (int, optional): Chu kỳ lấy mẫu (ms). Mặc định là 5000.
+            timer_id (int, optional): Timer phần cứng hoặc -1 (timer ảo). Mặc định là -1.
+        """
+        from machine import Timer
+        self.update()
+        self.timer = Timer(timer_id)
+        self.timer.init(period=period_ms, mode=Timer.PERIODIC, callback=self._timer_callback)
+
+    def stop(self):
+        if self.timer is not None:
+            self.timer.deinit()
+            self.timer = None
 
     def read_voltage(self):
         """
-        Đọc giá trị điện áp từ pin.
+        Đọc giá trị điện áp đã lọc của pin (lấy mẫu lần đầu nếu chưa có).
         Returns:
             float: Điện áp của pin (V).
         """
-        adc_value = self.adc.read()
-        voltage = adc_value * (3.3 / 1023) * self.resistor_divider  # Chuyển đổi ADC sang V
-        return voltage
+        if self.voltage is None:
+            self.update()
+        return self.voltage
 
     def read_percentage(self):
         """
-        Đọc phần trăm pin còn lại.
+        Đọc phần trăm pin còn lại (giá trị đã lưu, không đọc ADC).
         Returns:
             int: Phần trăm pin còn lại (%).
         """
-        voltage = self.read_voltage()
-        percentage = int(voltage / self.battery_voltage * 100)
-        return max(0, min(percentage, 100))  # Giới hạn giá trị từ 0-100%
+        if self.voltage is None:
+            self.update()
+        return self.percentage
 
-    def is_charging(self, charge_status_pin):
+    def is_charging(self, charge_status_pin=None):
         """
         Kiểm tra xem pin có đang được sạc hay không.
         Args:
-            charge_status_pin (int): Chân GPIO được kết nối với chân báo sạc của module TP4056.
+            charge_status_pin (int, optional): Chân GPIO nối với chân báo sạc của module TP4056; chỉ cần
+                khi không truyền vào lúc khởi tạo (Pin được tạo một lần rồi dùng lại).
         Returns:
             bool: True nếu đang sạc, False nếu không sạc.
         """
-        charge_status = Pin(charge_status_pin, Pin.IN)
-        return charge_status.value() == 0  # Thay đổi logic tùy thuộc vào module TP4056
+        if self.charge_pin is None:
+            if charge_status_pin is None:
+                return False
+            self.charge_pin = Pin(charge_status_pin, Pin.IN)
+        return self.charge_pin.value() == 0  # Thay đổi logic tùy thuộc vào module TP4056
@@ -0,0 +1,139 @@
+# beat_detector.py
+from array import array
+
+
+class BeatDetector:
+    def __init__(self, sample_rate=100, avg_beats=4, refractory_ms=300, threshold_ratio=0.5,
+                 lp_alpha=0.25, dc_alpha=0.02, envelope_halflife=1.5, invert=True,
+                 min_bpm=30, max_bpm=220, on_beat=None):
+        """
+        Bộ phát hiện nhịp tim trực tuyến, xử lý từng mẫu khi dữ liệu đến (O(1) mỗi mẫu).
+        Tín hiệu được bỏ thành phần DC, làm mượt, sau đó so với ngưỡng thích nghi
+        (tỉ lệ của đường bao biên độ có suy giảm) kèm thời gian trơ giữa hai nhịp.
+        Args:
+            sample_rate (int, optional): Tần số lấy mẫu (Hz). Mặc định là 100.
+            avg_beats (int, optional): Số nhịp gần nhất dùng để tính HR trung bình. Mặc định là 4.
+            refractory_ms (int, optional): Thời gian trơ sau mỗi nhịp (ms). Mặc định là 300.
+            threshold_ratio (float, optional): Ngưỡng theo tỉ lệ của đường bao. Mặc định là 0.5.
+            lp_alpha (float, optional): Hệ số lọc thông thấp. Mặc định là 0.25.
+            dc_alpha (float, optional): Hệ số bám đường nền DC. Mặc định là 0.02.
+            envelope_halflife (float, optional): Thời gian (s) đường bao giảm một nửa. Mặc định là 1.5.
+            invert (bool, optional): Đảo tín hiệu (xung PPG là đáy của tín hiệu IR thô). Mặc định là True.
+            min_bpm (int, optional): HR nhỏ nhất được chấp nhận. Mặc định là 30.
+            max_bpm (int, optional): HR lớn nhất được chấp nhận. Mặc định là 220.
+            on_beat (function, optional): Hàm gọi lại on_beat(timestamp_ms, rr_ms) mỗi khi có nhịp.
+        """
+        self.sample_rate = sample_rate
+        self.avg_beats = avg_beats
+        self.refractory = int(refractory_ms * sample_rate / 1000)
+        self.threshold_ratio = threshold_ratio
+        self.lp_alpha = lp_alpha
+        self.dc_alpha = dc_alpha
+        self.decay = 0.5 ** (1 / (envelope_halflife * sample_rate))
+        self.sign = -1 if invert else 1
+        self.min_rr_ms = 60000 / max_bpm
+        self.max_rr_ms = 60000 / min_bpm
+        self.on_beat = on_beat
+        self._rr = array('f', [0.0] * avg_beats)
+        self.reset()
+
+    def reset(self):
+        """
+        Xóa trạng thái, bắt đầu một phiên đo mới.
+        """
+        self.n = 0                # Số mẫu đã xử lý
+        self._baseline = None
+        self._lp = 0.0
+        self._envelope = 0.0
+        self._in_peak = False
+        self._peak_value = 0.0
+        self._peak_index = 0
+        self._last_beat_index = -1
+        self._rr_pos = 0
+        self._rr_count = 0
+        self._rr_sum = 0.0
+        self.beat_count = 0
+        self.last_beat = None     # (timestamp_ms, rr_ms) của nhịp gần nhất
+        self.heart_rate = 0
+
+    def _add_rr(self, rr_ms):
+        rr = self._rr
+        if self._rr_count == self.avg_beats:
+            self._rr_sum -= rr[self._rr_pos]
+        else:
+            self._rr_count += 1
+        rr[self._rr_pos] = rr_ms
+        self._rr_sum += rr_ms
+        self._rr_pos = (self._rr_pos + 1) % self.avg_beats
+        self.heart_rate = 60000 * self._rr_count / self._rr_sum
+
+    def _emit(self, index):
+        timestamp_ms = index * 1000 / self.sample_rate
+        rr_ms = 0
+        if self._last_beat_index >= 0:
+            rr_ms = (index - self._last_beat_index) * 1000 / self.sample_rate
+            if self.min_rr_ms <= rr_ms <= self.max_rr_ms:
+                self._add_rr(rr_ms)
+        self._last_beat_index = index
+        self.beat_count += 1
+        self.last_beat = (timestamp_ms, rr_ms)
+        if self.on_beat:
+            self.on_beat(timestamp_ms, rr_ms)
+        return self.last_beat
+
+    def update(self, x):
+        """
+        Xử lý một mẫu.
+        Args:
+            x (float): Giá trị mẫu (IR).
+        Returns:
+            tuple: (timestamp_ms, rr_ms) nếu phát hiện một nhịp tại mẫu này, ngược lại None.
+                   timestamp_ms tính từ mẫu đầu tiên; rr_ms là 0 với nhịp đầu tiên.
+        """
+        index = self.n
+        self.n = index + 1
+        if self._baseline is None:
+            self._baseline = x
+            self._lp = x
+            return None
+        self._baseline += self.dc_alpha * (x - self._baseline)
+        self._lp += self.lp_alpha * (x - self._lp)
+        ac = self.sign * (self._lp - self._baseline)
+
+        env = self._envelope * self.decay
+        if ac > env:
+            env = ac
+        self._envelope = env
+        if index < self.sample_rate:
+            return None  # Chờ đường nền DC ổn định (1 giây đầu)
+
+        if ac > self.threshold_ratio * env:
+            if not self._in_peak or ac > self._peak_value:
+                self._peak_value = ac
+                self._peak_index = index
+            self._in_peak = True
+            return None
+        if self._in_peak:
+            self._in_peak = False
+            peak = self._peak_index
+            if self._last_beat_index < 0 or peak - self._last_beat_index >= self.refractory:
+                return self._emit(peak)
+        return None
+
+    def process_block(self, data, n=None):
+        """
+        Xử lý một lô mẫu (ví dụ một lần đọc FIFO).
+        Args:
+            data (list/array): Các mẫu IR.
+            n (int, optional): Số mẫu cần xử lý. Mặc định là len(data).
+        Returns:
+            int: Số nhịp phát hiện được trong lô.
+        """
+        if n is None:
+            n = len(data)
+        beats = 0
+        update = self.update
+        for i in range(n):
+            if update(data[i]) is not None:
+                beats += 1
+        return beats
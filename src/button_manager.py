@@ -1,40 +1,192 @@
 # button_manager.py
-from machine import Pin
+# Nút nhấn theo ngắt: trình xử lý ngắt chỉ ghi thời điểm và mức của mỗi cạnh vào hàng đợi vòng cấp phát
+# sẵn; check_events() chống dội, phân loại nhấn / nhấn giữ / nhấn đúp và gọi các hàm callback đã đăng ký.
+from machine import Pin, disable_irq, enable_irq
+from array import array
 import time
 
+PRESS = 'press'
+LONG_PRESS = 'long_press'
+DOUBLE_CLICK = 'double_click'
+
+
 class ButtonManager:
-    def __init__(self, button1_pin=0, button2_pin=2, button3_pin=3, long_press_duration=2000):
+    def __init__(self, button1_pin=0, button2_pin=2, button3_pin=3, long_press_duration=2000,
+                 debounce_ms=30, double_click_ms=300, queue_size=16):
         """
         Khởi tạo ButtonManager.
         Args:
             button1_pin (int, optional): Chân GPIO của nút nhấn 1. Mặc định là D3 (GPIO0).
             button2_pin (int, optional): Chân GPIO của nút nhấn 2. Mặc định là D4 (GPIO2).
-            button3_pin (int, optional): Chân GPIO của nút nhấn 3. Mặc định là D7 (GPIO13).
-            long_press_duration (int, optional): Thời gian (ms) để coi là nhấn giữ. Mặc định là 2000ms.
-        """
-        self.buttons = [
-            Pin(button1_pin, Pin.IN, Pin.PULL_UP),
-            Pin(button2_pin, Pin.IN, Pin.PULL_UP),
-            Pin(button3_pin, Pin.IN, Pin.PULL_UP)
-        ]
+            button3_pin (int, optional): Chân GPIO của nút nhấn 3 (None nếu không có). Mặc định là GPIO3.
+            long_press_duration (int, optional): Thời gian giữ (ms) để coi là nhấn giữ. Mặc định là 2000ms.
+            debounce_ms (int, optional): Các cạnh cách nhau ít hơn khoảng này bị coi là dội. Mặc định là 30ms.
+            double_click_ms (int, optional): Khoảng tối đa giữa hai lần nhấn để coi là nhấn đúp. Mặc định là 300ms.
+            queue_size (int, optional): Số cạnh tối đa chờ xử lý giữa hai lần check_events(). Mặc định là 16.
+        """
+        pins = [p for p in (button1_pin, button2_pin, button3_pin) if p is not None]
+        self.buttons = [Pin(p, Pin.IN, Pin.PULL_UP) for p in pins]
+        n = len(self.buttons)
         self.long_press_duration = long_press_duration
-        self.last_press_time = [0] * len(self.buttons)
+        self.debounce_ms = debounce_ms
+        self.double_click_ms = double_click_ms
+        # Hàng đợi cạnh: thời điểm (ticks_ms) và mã (chỉ số nút * 2 + mức)
+        self._ev_time = array('i', [0] * queue_size)
+        self._ev_code = bytearray(queue_size)
+        self._ev_head = 0
+        self._ev_tail = 0
+        self.dropped = 0
+        # Trạng thái trong ngắt: mức và thời điểm của cạnh được chấp nhận gần nhất
+        self._irq_level = bytearray(n)
+        self._irq_time = array('i', [0] * n)
+        # Trạng thái phân loại (chỉ dùng ngoài ngắt)
+        self._pressed = [False] * n
+        self._press_time = [0] * n
+        self._long_fired = [False] * n
+        self._click_pending = [False] * n
+        self._click_time = [0] * n
+        self._callbacks = [dict() for _ in range(n)]
+        self._events = []   # Sự kiện chưa được lấy bởi check_button_press()
+        for i, pin in enumerate(self.buttons):
+            self._irq_level[i] = pin.value()
+            pin.irq(trigger=Pin.IRQ_FALLING | Pin.IRQ_RISING, handler=self._make_handler(i))
+
+    def _make_handler(self, index):
+        # Mỗi nút một closure tạo sẵn lúc khởi tạo: trong ngắt không tạo đối tượng mới
+        def handler(pin):
+            self._edge(index, pin.value(), time.ticks_ms())
+        return handler
+
+    def _edge(self, index, level, now):
+        # Ngữ cảnh ngắt: không cấp phát bộ nhớ
+        if level == self._irq_level[index]:
+            return   # Cạnh dội đã về lại mức cũ
+        if time.ticks_diff(now, self._irq_time[index]) < self.debounce_ms:
+            return   # Mức cuối cùng được đồng bộ lại trong check_events()
+        self._irq_level[index] = level
+        self._irq_time[index] = now
+        nxt = (self._ev_head + 1) % len(self._ev_code)
+        if nxt == self._ev_tail:
+            self.dropped += 1
+            return
+        self._ev_time[self._ev_head] = now
+        self._ev_code[self._ev_head] = index * 2 + level
+        self._ev_head = nxt
+
+    def set_callbacks(self, **callbacks):
+        """
+        Đăng ký hàm callback theo tên on_button<n>_<sự kiện>, ví dụ on_button1_press,
+        on_button1_long_press, on_button1_double_click, on_button2_press.
+        Nếu một nút không có callback nhấn đúp, sự kiện nhấn được báo ngay khi nhả nút
+        (không phải chờ hết double_click_ms).
+        """
+        for name, func in callbacks.items():
+            for kind in (LONG_PRESS, DOUBLE_CLICK, PRESS):   # '_press' cũng là đuôi của '_long_press'
+                suffix = '_' + kind
+                number = name[len('on_button'):-len(suffix)]
+                if name.startswith('on_button') and name.endswith(suffix) and number.isdigit():
+                    index = int(number) - 1
+                    if 0 <= index < len(self.buttons):
+                        self._callbacks[index][kind] = func
+                        break
+            else:
+                print("Unknown button callback:", name)
+
+    def _emit(self, index, kind):
+        func = self._callbacks[index].get(kind)
+        if func is not None:
+            func()
+        elif len(self._events) < len(self._ev_code):
+            self._events.append((index, kind))
+
+    def _resync(self, now):
+        # Cạnh cuối của một đợt dội có thể bị bỏ qua trong ngắt: so mức thật của chân sau khi đã ổn định.
+        # _edge() cũng chạy trong ngắt và ghi cùng hàng đợi/trạng thái, nên kiểm tra lại và ghi khi tắt ngắt
+        for i, pin in enumerate(self.buttons):
+            if pin.value() == self._irq_level[i]:
+                continue
+            state = disable_irq()
+            try:
+                level = pin.value()
+                if level != self._irq_level[i] and time.ticks_diff(now, self._irq_time[i]) >= self.debounce_ms:
+                    self._edge(i, level, now)
+            finally:
+                enable_irq(state)
+
+    def check_events(self):
+        """
+        Xử lý các cạnh đã được ghi trong ngắt và gọi callback tương ứng.
+        Gọi định kỳ từ vòng lặp chính; độ trễ đầu vào không phụ thuộc vào chu kỳ gọi
+        vì thời điểm nhấn/nhả đã được ghi trong ngắt.
+        """
+        now = time.ticks_ms()
+        self._resync(now)
+        size = len(self._ev_code)
+        while self._ev_tail != self._ev_head:
+            t = self._ev_time[self._ev_tail]
+            code = self._ev_code[self._ev_tail]
+            self._ev_tail = (self._ev_tail + 1) % size
+            index = code >> 1
+            if code & 1 == 0:
+                self._on_down(index, t)
+            else:
+                self._on_up(index, t)
+        for i in range(len(self.buttons)):
+            if self._pressed[i] and not self._long_fired[i] and \
+                    time.ticks_diff(now, self._press_time[i]) >= self.long_press_duration:
+                # Báo nhấn giữ ngay khi đủ thời gian, không chờ nhả nút
+                self._long_fired[i] = True
+                self._click_pending[i] = False
+                self._emit(i, LONG_PRESS)
+            if self._click_pending[i] and time.ticks_diff(now, self._click_time[i]) > self.double_click_ms:
+                self._click_pending[i] = False
+                self._emit(i, PRESS)
+
+    def _on_down(self, index, t):
+        self._pressed[index] = True
+        self._press_time[index] = t
+        self._long_fired[index] = False
+
+    def _on_up(self, index, t):
+        if not self._pressed[index]:
+            return
+        self._pressed[index] = False
+        if self._long_fired[index]:
+            return
+        if time.ticks_diff(t, self._press_time[index]) >= self.long_press_duration:
+            self._long_fired[index] = True
+            self._emit(index, LONG_PRESS)
+            return
+        if DOUBLE_CLICK not in self._callbacks[index]:
+            self._emit(index, PRESS)
+        elif self._click_pending[index] and \
+                time.ticks_diff(self._press_time[index], self._click_time[index]) <= self.double_click_ms:
+            self._click_pending[index] = False
+            self._emit(index, DOUBLE_CLICK)
+        else:
+            self._click_pending[index] = True
+            self._click_time[index] = t
 
     def check_button_press(self):
         """
-        Kiểm tra trạng thái của các nút nhấn.
+        Lấy các sự kiện chưa có callback kể từ lần gọi trước.
         Returns:
-            tuple: Một tuple chứa 3 phần tử boolean tương ứng với trạng thái của 3 nút nhấn.
-                   (True nếu nút được nhấn, False nếu không).
-        """
-        button_states = []
-        for i, button in enumerate(self.buttons):
-            if button.value() == 0:  # Nút được nhấn
-                if time.ticks_ms() - self.last_press_time[i] > self.long_press_duration:
-                    button_states.append("long")  # Nhấn giữ
-                else:
-                    button_states.append(True)  # Nhấn thường
-                self.last_press_time[i] = time.ticks_ms()
-            else:
-                button_states.append(False)  # Không nhấn
-        return button_states
+            list: Mỗi nút một phần tử: True nếu có lần nhấn, "long" nếu nhấn giữ, "double" nếu nhấn đúp,
+                  False nếu không có sự kiện.
+        """
+        self.check_events()
+        states = [False] * len(self.buttons)
+        for index, kind in self._events:
+            states[index] = True if kind == PRESS else ("long" if kind == LONG_PRESS else "double")
+        del self._events[:]
+        return states
+
+    def stats(self):
+        """
+        Returns:
+            dict: Số cạnh bị bỏ do hàng đợi đầy và số cạnh đang chờ xử lý.
+        """
+        return {
+            'dropped': self.dropped,
+            'pending': (self._ev_head - self._ev_tail) % len(self._ev_code),
+        }
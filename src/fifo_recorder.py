@@ -0,0 +1,83 @@
+# fifo_recorder.py
+# Ghi lại luồng FIFO thô của MAX30102: bọc đối tượng I2C, mọi giao dịch đi qua bình thường, các byte
+# đọc từ FIFO_DATA (0x07) được chép thêm vào file để phát lại trên máy tính (bench/replay.py).
+import struct
+
+REC_MAGIC = b'MXR1'
+REC_HEADER_FORMAT = '<4sHH'   # magic, tần số lấy mẫu (Hz), số byte mỗi mẫu
+REC_HEADER_SIZE = 8
+REG_FIFO_DATA = 0x07
+
+
+class RecordingI2C:
+    def __init__(self, i2c, path, sample_rate=100, bytes_per_sample=6, buffer_size=1536):
+        """
+        Bọc một đối tượng machine.I2C và ghi dữ liệu FIFO đọc được ra file.
+        Định dạng file: header REC_HEADER_FORMAT, sau đó là các mẫu FIFO nguyên bản
+        (3 byte RED + 3 byte IR, big-endian như trong thanh ghi).
+        Args:
+            i2c (I2C): Bus I2C thật nối với cảm biến.
+            path (str): File ghi (ví dụ '/sd/rec0001.raw').
+            sample_rate (int, optional): Tần số lấy mẫu đã cấu hình (Hz). Mặc định là 100.
+            bytes_per_sample (int, optional): Số byte mỗi mẫu FIFO. Mặc định là 6 (chế độ SpO2).
+            buffer_size (int, optional): Bộ đệm RAM trước khi ghi ra file (byte, bội số của
+                bytes_per_sample). Mặc định là 1536 (256 mẫu).
+        """
+        self.i2c = i2c
+        self.path = path
+        self.bytes_per_sample = bytes_per_sample
+        self._buf = bytearray(buffer_size - buffer_size % bytes_per_sample)
+        self._mv = memoryview(self._buf)
+        self._fill = 0
+        self.bytes_recorded = 0
+        self._file = open(path, 'wb')
+        self._file.write(struct.pack(REC_HEADER_FORMAT, REC_MAGIC, sample_rate, bytes_per_sample))
+
+    def _record(self, data):
+        n = len(data)
+        pos = 0
+        while pos < n:
+            k = min(n - pos, len(self._buf) - self._fill)
+            self._mv[self._fill:self._fill + k] = data[pos:pos + k]
+            self._fill += k
+            pos += k
+            if self._fill == len(self._buf):
+                self.flush()
+        self.bytes_recorded += n
+
+    def flush(self):
+        """
+        Ghi phần dữ liệu đang đệm ra file.
+        """
+        if self._fill and self._file is not None:
+            self._file.write(self._mv[:self._fill])
+            self._file.flush()
+        self._fill = 0
+
+    def close(self):
+        """
+        Ghi nốt dữ liệu còn lại và đóng file.
+        """
+        self.flush()
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+    # Giao diện giống machine.I2C
+    def writeto_mem(self, addr, reg, buf):
+        return self.i2c.writeto_mem(addr, reg, buf)
+
+    def readfrom_mem(self, addr, reg, nbytes):
+        data = self.i2c.readfrom_mem(addr, reg, nbytes)
+        if reg == REG_FIFO_DATA:
+            self._record(data)
+        return data
+
+    def readfrom_mem_into(self, addr, reg, buf):
+        self.i2c.readfrom_mem_into(addr, reg, buf)
+        if reg == REG_FIFO_DATA:
+            self._record(buf)
+
+    def __getattr__(self, name):
+        # Các phương thức I2C khác (scan, writeto, readfrom...) chuyển thẳng cho bus thật
+        return getattr(self.i2c, name)
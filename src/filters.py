@@ -0,0 +1,233 @@
+# filters.py
+import math
+from array import array
+
+_np = None
+_np_checked = False
+
+
+def _numpy():
+    # Import numpy khi cần lần đầu; trên thiết bị không có numpy thì dùng vòng lặp thuần Python
+    global _np, _np_checked
+    if not _np_checked:
+        _np_checked = True
+        try:
+            import numpy
+            if hasattr(numpy, 'cumsum'):
+                _np = numpy
+        except ImportError:
+            pass
+    return _np
+
+
+class KalmanFilter:
+    def __init__(self, q=1e-5, r=0.1**2, p0=1.0):
+        """
+        Bộ lọc Kalman 1 chiều có trạng thái, cập nhật theo từng mẫu hoặc theo lô.
+        Chỉ giữ lại trạng thái vô hướng (ước lượng x và sai số P) giữa các lần gọi.
+        Args:
+            q (float, optional): Phương sai quá trình. Mặc định là 1e-5.
+            r (float, optional): Phương sai đo. Mặc định là 0.01.
+            p0 (float, optional): Sai số ước lượng ban đầu. Mặc định là 1.0.
+        """
+        self.q = q
+        self.r = r
+        self.p0 = p0
+        # Sai số hậu nghiệm và độ lợi ở trạng thái ổn định (nghiệm phương trình Riccati)
+        self.p_ss = (-q + math.sqrt(q * q + 4 * q * r)) / 2
+        self.k_ss = (self.p_ss + q) / (self.p_ss + q + r)
+        self.reset()
+
+    def reset(self):
+        """
+        Xóa trạng thái, mẫu tiếp theo sẽ được dùng làm ước lượng ban đầu.
+        """
+        self.x = None
+        self.p = self.p0
+
+    def converged(self, tol=1e-3):
+        """
+        Kiểm tra sai số P đã hội tụ về trạng thái ổn định hay chưa.
+        Returns:
+            bool: True nếu có thể dùng độ lợi ổn định k_ss.
+        """
+        return self.x is not None and abs(self.p - self.p_ss) <= tol * self.p_ss
+
+    def update(self, z):
+        """
+        Cập nhật bộ lọc với một mẫu đo.
+        Args:
+            z (float): Giá trị đo.
+        Returns:
+            float: Ước lượng sau khi lọc.
+        """
+        if self.x is None:
+            self.x = float(z)
+            return self.x
+        p_minus = self.p + self.q
+        k = p_minus / (p_minus + self.r)
+        self.x += k * (z - self.x)
+        self.p = (1 - k) * p_minus
+        return self.x
+
+    def update_block(self, data, out=None, n=None):
+        """
+        Lọc một lô mẫu. Các mẫu đầu được cập nhật từng bước cho đến khi P hội tụ,
+        phần còn lại dùng độ lợi ổn định và được vector hóa bằng numpy nếu có.
+        Args:
+            data (list/array): Các giá trị đo.
+            out (array, optional): Bộ đệm nhận kết quả (>= n). Mặc định tạo array('f') mới.
+            n (int, optional): Số mẫu cần lọc. Mặc định là len(data).
+        Returns:
+            array: Các ước lượng sau khi lọc.
+        """
+        if n is None:
+            n = len(data)
+        if out is None:
+            out = array('f', bytearray(4 * n))
+        i = 0
+        while i < n and not self.converged():
+            out[i] = self.update(data[i])
+            i += 1
+        if i >= n:
+            return out
+        # Ở trạng thái ổn định P không đổi, mỗi bước chỉ còn x = x + k_ss * (z - x)
+        self.p = self.p_ss
+        if n - i > 8 and _numpy() is not None:
+            self._steady_block_np(data, out, i, n)
+        else:
+            k = self.k_ss
+            x = self.x
+            for j in range(i, n):
+                x += k * (data[j] - x)
+                out[j] = x
+            self.x = x
+        return out
+
+    def _steady_block_np(self, data, out, start, n):
+        # x_j = a^(j+1) * x_-1 + k * sum(a^(j-m) * z_m), a = 1 - k.
+        # Chia khối để a^-m không vượt quá ~1e6, tránh mất độ chính xác.
+        np = _np
+        k = self.k_ss
+        a = 1.0 - k
+        chunk = max(1, int(math.log(1e6) / -math.log(a))) if a > 0 else n
+        z_all = np.asarray(data[start:n], dtype=np.float64)
+        res = np.empty(n - start, dtype=np.float64)
+        x = self.x
+        for c0 in range(0, n - start, chunk):
+            z = z_all[c0:c0 + chunk]
+            m = np.arange(1, len(z) + 1, dtype=np.float64)
+            grow = a ** m
+            res[c0:c0 + len(z)] = grow * (x + k * np.cumsum(z / grow))
+            x = float(res[c0 + len(z) - 1])
+        self.x = x
+        if isinstance(out, array):
+            out[start:n] = array(out.typecode, res.tolist())
+        else:
+            out[start:n] = res
+
+
+class StreamingWiener:
+    def __init__(self, window=5, noise=None, noise_alpha=0.01):
+        """
+        Bộ khử nhiễu Wiener thích nghi chạy trên cửa sổ trượt của luồng mẫu.
+        Mỗi mẫu ra là mẫu ở giữa cửa sổ (trễ window // 2 mẫu), giống scipy.signal.wiener.
+        Trạng thái bị giới hạn: một vòng đệm dài `window` và vài tổng tích lũy.
+        Args:
+            window (int, optional): Số mẫu của cửa sổ trượt. Mặc định là 5.
+            noise (float, optional): Phương sai nhiễu. Mặc định là None (tự ước lượng
+                bằng trung bình trượt của phương sai cục bộ, giống scipy.signal.wiener).
+            noise_alpha (float, optional): Hệ số cập nhật ước lượng nhiễu. Mặc định là 0.01.
+        """
+        self.window = window
+        self.noise = noise
+        self.noise_alpha = noise_alpha
+        self._ring = array('f', [0.0] * window)
+        self.reset()
+
+    def reset(self):
+        """
+        Xóa trạng thái của bộ lọc.
+        """
+        self._pos = 0
+        self._count = 0
+        self._ref = 0.0   # Giá trị tham chiếu để các tổng giữ độ chính xác với số thực 32-bit
+        self._s1 = 0.0    # Tổng (x - ref) trong cửa sổ
+        self._s2 = 0.0    # Tổng (x - ref)^2 trong cửa sổ
+        self._since_anchor = 0
+        self.noise_estimate = self.noise if self.noise is not None else 0.0
+
+    def _reanchor(self):
+        # Tính lại tổng quanh trung bình hiện tại: O(window) mỗi `window` mẫu, tức O(1) trung bình
+        ring = self._ring
+        cnt = self._count
+        ref = self._ref + self._s1 / cnt
+        s1 = 0.0
+        s2 = 0.0
+        for i in range(cnt):
+            d = ring[i] - ref
+            s1 += d
+            s2 += d * d
+        self._ref = ref
+        self._s1 = s1
+        self._s2 = s2
+        self._since_anchor = 0
+
+    def update(self, x):
+        """
+        Khử nhiễu một mẫu.
+        Args:
+            x (float): Giá trị mẫu mới.
+        Returns:
+            float: Giá trị đã khử nhiễu của mẫu ở giữa cửa sổ.
+        """
+        ring = self._ring
+        if self._count == 0:
+            self._ref = float(x)
+        if self._count == self.window:
+            old = ring[self._pos] - self._ref
+            self._s1 -= old
+            self._s2 -= old * old
+        else:
+            self._count += 1
+        ring[self._pos] = x
+        self._pos += 1
+        if self._pos == self.window:
+            self._pos = 0
+        d = x - self._ref
+        self._s1 += d
+        self._s2 += d * d
+        self._since_anchor += 1
+        if self._since_anchor >= self.window:
+            self._reanchor()
+
+        cnt = self._count
+        mean = self._s1 / cnt
+        var = self._s2 / cnt - mean * mean
+        if self.noise is None:
+            self.noise_estimate += self.noise_alpha * (var - self.noise_estimate)
+        noise = self.noise_estimate
+        mean += self._ref
+        if var <= noise or var <= 0:
+            return mean
+        center = ring[(self._pos - 1 - cnt // 2) % self.window]
+        return mean + (1 - noise / var) * (center - mean)
+
+    def process_block(self, data, out=None, n=None):
+        """
+        Khử nhiễu một lô mẫu (ví dụ toàn bộ một lần đọc FIFO).
+        Args:
+            data (list/array): Các mẫu đầu vào.
+            out (array, optional): Bộ đệm nhận kết quả (>= n). Mặc định tạo array('f') mới.
+            n (int, optional): Số mẫu cần xử lý. Mặc định là len(data).
+        Returns:
+            array: Các mẫu sau khi khử nhiễu.
+        """
+        if n is None:
+            n = len(data)
+        if out is None:
+            out = array('f', bytearray(4 * n))
+        update = self.update
+        for i in range(n):
+            out[i] = update(data[i])
+        return out
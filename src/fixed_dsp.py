@@ -0,0 +1,402 @@
+# fixed_dsp.py
+# Chuỗi xử lý tín hiệu bằng số nguyên (fixed-point) cho MAX30102: lọc thông thấp IIR, bỏ thành phần DC,
+# phát hiện đỉnh, tỉ số R và tra bảng SpO2. Mọi phép tính theo từng mẫu là số nguyên nhỏ (< 2^30) nên không
+# cấp phát bộ nhớ trên MicroPython; chỉ các kết quả công bố (HR, SpO2, khoảng 1 lần/giây) là số thực.
+# Các vòng lặp theo lô dùng @micropython.native khi có, trên máy tính là Python thuần.
+from array import array
+
+try:
+    import micropython
+    native = micropython.native
+    NATIVE = True
+except (ImportError, AttributeError):
+    def native(f):
+        return f
+    NATIVE = False
+
+SAMPLE_BITS = 18    # Mẫu ADC của MAX30102
+Q = 4           # Trạng thái bộ lọc lưu dạng x * 2^Q (mẫu 18-bit -> nhỏ hơn 2^22)
+COEF_BITS = 8   # Hệ số bộ lọc a = alpha * 2^8, giới hạn ở 2^8 - 1: |x - y| * a + ROUND < 2^22 * 255 < 2^30
+ROUND = 1 << (COEF_BITS - 1)   # Làm tròn thay vì cắt (tránh lệch một phía của phép dịch phải)
+DECAY_BITS = 12
+R_BITS = 10     # Tỉ số R dạng R * 2^10
+LUT_SHIFT = 4   # Bảng SpO2 có một phần tử mỗi 2^4 bước của R (R = 1/64)
+LUT_MAX_R = 4   # R lớn nhất trong bảng
+MAX_WINDOW = (1 << (30 - SAMPLE_BITS)) - 1   # Tổng của cửa sổ mẫu 18-bit phải nhỏ hơn 2^30 (tối đa 4095 mẫu)
+MAX_DETREND = (1 << (29 - SAMPLE_BITS)) - 1  # detrend * x - tổng đường nền trong (-2^29, 2^29): hiệu max - min < 2^30
+
+# Sai số cho phép so với chuỗi số thực (bench/validate_fixed.py kiểm tra trên tín hiệu tổng hợp)
+TOLERANCE_HR = 2.0      # bpm, sai lệch trung bình
+TOLERANCE_SPO2 = 1.0    # %, sai lệch trung bình
+
+
+def coef(alpha):
+    # Hệ số thực trong (0, 1] -> số nguyên theo COEF_BITS (1 đến 2^COEF_BITS - 1 để tích còn là số nguyên nhỏ)
+    return max(1, min((1 << COEF_BITS) - 1, int(alpha * (1 << COEF_BITS) + 0.5)))
+
+
+class FixedIIR:
+    def __init__(self, alpha):
+        """
+        Bộ lọc thông thấp bậc 1 y += alpha * (x - y) bằng số nguyên. Cùng giao diện với KalmanFilter
+        (update_block, reset) để thay thế bộ lọc Kalman ở trạng thái ổn định (alpha = k_ss).
+        Args:
+            alpha (float): Hệ số lọc (0-1).
+        """
+        self.alpha = alpha
+        self.a = coef(alpha)
+        self.reset()
+
+    def reset(self):
+        self.y = 0
+        self.started = False
+
+    @native
+    def update_block(self, data, out=None, n=None):
+        """
+        Lọc một lô mẫu nguyên.
+        Args:
+            data (array): Các mẫu (số nguyên).
+            out (array, optional): Bộ đệm nhận kết quả ('i', >= n). Mặc định tạo mới.
+            n (int, optional): Số mẫu. Mặc định là len(data).
+        Returns:
+            array: Các giá trị sau lọc (cùng thang với đầu vào, làm tròn xuống).
+        """
+        if n is None:
+            n = len(data)
+        if out is None:
+            out = array('i', [0] * n)
+        if n == 0:
+            return out
+        a = self.a
+        y = self.y
+        i = 0
+        if not self.started:
+            y = int(data[0]) << Q
+            self.started = True
+        while i < n:
+            y += (((int(data[i]) << Q) - y) * a + ROUND) >> COEF_BITS
+            out[i] = y >> Q
+            i += 1
+        self.y = y
+        return out
+
+
+class FixedBeatDetector:
+    def __init__(self, sample_rate=100, avg_beats=4, refractory_ms=300, threshold_ratio=0.5,
+                 lp_alpha=0.25, dc_alpha=0.02, envelope_halflife=1.5, invert=True,
+                 min_bpm=30, max_bpm=220, on_beat=None):
+        """
+        Bộ phát hiện nhịp giống BeatDetector (cùng tham số và thuộc tính) nhưng tính bằng số nguyên:
+        đường nền DC và tín hiệu làm mượt là IIR Q4, đường bao suy giảm theo hệ số 2^-12,
+        ngưỡng so sánh bằng phép nhân nguyên.
+        """
+        self.sample_rate = sample_rate
+        self.avg_beats = avg_beats
+        self.refractory = int(refractory_ms * sample_rate / 1000)
+        self.threshold = coef(threshold_ratio)
+        self.lp_a = coef(lp_alpha)
+        self.dc_a = coef(dc_alpha)
+        decay = 0.5 ** (1 / (envelope_halflife * sample_rate))
+        self.decay_m = max(1, int((1 - decay) * (1 << DECAY_BITS) + 0.5))
+        self.sign = -1 if invert else 1
+        self.min_rr_ms = 60000 // max_bpm
+        self.max_rr_ms = 60000 // min_bpm
+        self.on_beat = on_beat
+        self._rr = array('i', [0] * avg_beats)
+        self.reset()
+
+    def reset(self):
+        """
+        Xóa trạng thái, bắt đầu một phiên đo mới.
+        """
+        self.n = 0
+        self._started = False
+        self._baseline = 0
+        self._lp = 0
+        self._envelope = 0
+        self._in_peak = False
+        self._peak_value = 0
+        self._peak_index = 0
+        self._last_beat_index = -1
+        self._rr_pos = 0
+        self._rr_count = 0
+        self._rr_sum = 0
+        self.beat_count = 0
+        self.last_beat = None
+        self.heart_rate = 0
+
+    def _emit(self, index):
+        rate = self.sample_rate
+        rr_ms = 0
+        if self._last_beat_index >= 0:
+            rr_ms = (index - self._last_beat_index) * 1000 // rate
+            if self.min_rr_ms <= rr_ms <= self.max_rr_ms:
+                rr = self._rr
+                if self._rr_count == self.avg_beats:
+                    self._rr_sum -= rr[self._rr_pos]
+                else:
+                    self._rr_count += 1
+                rr[self._rr_pos] = rr_ms
+                self._rr_sum += rr_ms
+                self._rr_pos = (self._rr_pos + 1) % self.avg_beats
+                # Số thực duy nhất, chỉ tạo khi có nhịp
+                self.heart_rate = 60000 * self._rr_count / self._rr_sum
+        self._last_beat_index = index
+        self.beat_count += 1
+        timestamp_ms = index * 1000 // rate
+        self.last_beat = (timestamp_ms, rr_ms)
+        if self.on_beat:
+            self.on_beat(timestamp_ms, rr_ms)
+
+    @native
+    def process_block(self, data, n=None):
+        """
+        Xử lý một lô mẫu IR (số nguyên).
+        Returns:
+            int: Số nhịp phát hiện được trong lô.
+        """
+        if n is None:
+            n = len(data)
+        beats = 0
+        index = self.n
+        baseline = self._baseline
+        lp = self._lp
+        env = self._envelope
+        sign = self.sign
+        dc_a = self.dc_a
+        lp_a = self.lp_a
+        decay_m = self.decay_m
+        threshold = self.threshold
+        warmup = self.sample_rate
+        i = 0
+        if n and not self._started:
+            baseline = lp = int(data[0]) << Q
+            self._started = True
+            index += 1
+            i = 1
+        while i < n:
+            x = int(data[i]) << Q
+            i += 1
+            baseline += ((x - baseline) * dc_a + ROUND) >> COEF_BITS
+            lp += ((x - lp) * lp_a + ROUND) >> COEF_BITS
+            ac = sign * (lp - baseline)
+            env -= (env * decay_m) >> DECAY_BITS
+            if ac > env:
+                env = ac
+            if index < warmup:
+                index += 1
+                continue
+            if ac > (env * threshold) >> COEF_BITS:
+                if not self._in_peak or ac > self._peak_value:
+                    self._peak_value = ac
+                    self._peak_index = index
+                self._in_peak = True
+            elif self._in_peak:
+                self._in_peak = False
+                peak = self._peak_index
+                if self._last_beat_index < 0 or peak - self._last_beat_index >= self.refractory:
+                    self._emit(peak)
+                    beats += 1
+            index += 1
+        self.n = index
+        self._baseline = baseline
+        self._lp = lp
+        self._envelope = env
+        return beats
+
+
+class _FixedChannel:
+    def __init__(self, window, detrend):
+        # DC là tổng nguyên của cửa sổ; AC lấy từ hàng đợi đơn điệu max/min của tín hiệu đã trừ đường nền
+        # (trung bình đối xứng của detrend mẫu, như _ChannelStats). Để không chia, hàng đợi lưu
+        # detrend * x - tổng đường nền, nên ac() lớn gấp detrend lần AC thật.
+        self.window = window
+        self.detrend = max(1, min(detrend, window - 1, MAX_DETREND))
+        self._half = self.detrend // 2
+        self._ring = array('i', [0] * window)
+        self._max_idx = array('i', [0] * window)
+        self._max_val = array('i', [0] * window)
+        self._min_idx = array('i', [0] * window)
+        self._min_val = array('i', [0] * window)
+        self.clear()
+
+    def clear(self):
+        self.sum = 0
+        self.base = 0
+        self._max_front = self._max_size = 0
+        self._min_front = self._min_size = 0
+
+    @native
+    def push(self, index, value, count):
+        w = self.window
+        d = self.detrend
+        ring = self._ring
+        pos = index % w
+        if count > w:
+            self.sum -= ring[pos]
+        if count > d:
+            self.base -= ring[(index - d) % w]
+        ring[pos] = value
+        self.sum += value
+        self.base += value
+        if count < d:
+            return
+        center = index - self._half
+        x = ring[center % w] * d - self.base
+        oldest = center - w + 1
+        # Hàng đợi max
+        idx = self._max_idx
+        val = self._max_val
+        front = self._max_front
+        size = self._max_size
+        while size and idx[front] < oldest:   # Bỏ phần tử đã ra khỏi cửa sổ trước khi thêm
+            front = (front + 1) % w
+            size -= 1
+        while size and val[(front + size - 1) % w] <= x:
+            size -= 1
+        p = (front + size) % w
+        idx[p] = center
+        val[p] = x
+        size += 1
+        self._max_front = front
+        self._max_size = size
+        # Hàng đợi min
+        idx = self._min_idx
+        val = self._min_val
+        front = self._min_front
+        size = self._min_size
+        while size and idx[front] < oldest:
+            front = (front + 1) % w
+            size -= 1
+        while size and val[(front + size - 1) % w] >= x:
+            size -= 1
+        p = (front + size) % w
+        idx[p] = center
+        val[p] = x
+        size += 1
+        self._min_front = front
+        self._min_size = size
+
+    def ac(self):
+        if not self._max_size:
+            return 0
+        return self._max_val[self._max_front] - self._min_val[self._min_front]
+
+
+def _perfusion(ac, dc):
+    # AC/DC dạng Q16; thu nhỏ cả hai cho đến khi ac << 16 còn là số nguyên nhỏ
+    while ac >= (1 << 13):
+        ac >>= 1
+        dc >>= 1
+    if dc <= 0:
+        return 0
+    return (ac << 16) // dc
+
+
+class FixedSpO2Engine:
+    def __init__(self, sample_rate=100, window_seconds=4, update_every=None, min_seconds=1,
+                 coeff_a=110, coeff_b=25, table=None, detrend_seconds=0.3):
+        """
+        Bộ tính SpO2 giống SpO2Engine (cùng tham số và thuộc tính) bằng số nguyên:
+        DC trung bình và AC đỉnh - đáy (sau khi trừ đường nền) trên cửa sổ trượt,
+        R = (AC_red/DC_red)/(AC_ir/DC_ir) dạng Q10, SpO2 tra bảng theo R (nội suy tuyến tính giữa các phần tử).
+        Args:
+            table (array, optional): Bảng SpO2 x10 theo R (mỗi phần tử cách nhau 1/64). Mặc định dựng từ
+                công thức coeff_a - coeff_b * R; có thể thay bằng đường hiệu chuẩn đo được.
+            detrend_seconds (float, optional): Độ dài đường nền như SpO2Engine. Mặc định là 0.3.
+        Cửa sổ bị giới hạn ở MAX_WINDOW mẫu (khoảng 40 giây ở 100 Hz) để tổng DC còn là số nguyên nhỏ.
+        """
+        self.sample_rate = sample_rate
+        self.window = min(int(window_seconds * sample_rate), MAX_WINDOW)
+        self.update_every = update_every or sample_rate
+        self.min_samples = int(min_seconds * sample_rate)
+        self.coeff_a = coeff_a
+        self.coeff_b = coeff_b
+        if table is None:
+            steps = LUT_MAX_R << (R_BITS - LUT_SHIFT)
+            table = array('H', [0] * (steps + 1))
+            for k in range(steps + 1):
+                spo2 = coeff_a - coeff_b * k / (1 << (R_BITS - LUT_SHIFT))
+                table[k] = int(max(0, min(spo2, 100)) * 10 + 0.5)
+        self.table = table
+        detrend = int(detrend_seconds * sample_rate)
+        self.red = _FixedChannel(self.window, detrend)
+        self.ir = _FixedChannel(self.window, detrend)
+        self.reset()
+
+    def reset(self):
+        self.n = 0
+        self.red.clear()
+        self.ir.clear()
+        self._since_update = 0
+        self.spo2 = 0
+        self.r_ratio = 0
+        self.r_q = 0
+        self.window_samples = 0
+        self.updated_at = -1
+
+    def process_block(self, red, ir, n=None):
+        """
+        Thêm một lô mẫu RED/IR (số nguyên).
+        Returns:
+            bool: True nếu SpO2 được cập nhật ít nhất một lần trong lô.
+        """
+        if n is None:
+            n = len(ir)
+        updated = False
+        red_ch = self.red
+        ir_ch = self.ir
+        for i in range(n):
+            index = self.n
+            self.n = index + 1
+            red_ch.push(index, int(red[i]), self.n)
+            ir_ch.push(index, int(ir[i]), self.n)
+            self._since_update += 1
+            if self._since_update >= self.update_every and self.n >= self.min_samples:
+                if self.compute():
+                    updated = True
+        return updated
+
+    def lookup(self, r_q):
+        """
+        SpO2 x10 theo R dạng Q10 (nội suy giữa hai phần tử của bảng).
+        """
+        table = self.table
+        k = r_q >> LUT_SHIFT
+        if k >= len(table) - 1:
+            return table[len(table) - 1]
+        frac = r_q & ((1 << LUT_SHIFT) - 1)
+        return table[k] + (((table[k + 1] - table[k]) * frac) >> LUT_SHIFT)
+
+    def compute(self):
+        """
+        Tính SpO2 từ cửa sổ hiện tại.
+        Returns:
+            bool: True nếu tính được giá trị hợp lệ.
+        """
+        self._since_update = 0
+        count = min(self.n, self.window)
+        if count == 0:
+            return False
+        red_dc = self.red.sum // count
+        ir_dc = self.ir.sum // count
+        # ac() lớn gấp detrend lần nên DC cũng được nhân lên (detrend * DC < 2^30)
+        red_p = _perfusion(self.red.ac(), red_dc * self.red.detrend)
+        ir_p = _perfusion(self.ir.ac(), ir_dc * self.ir.detrend)
+        if red_dc <= 0 or ir_dc <= 0 or ir_p <= 0:
+            return False
+        while red_p >= (1 << 19):   # Giữ red_p << 10 là số nguyên nhỏ
+            red_p >>= 1
+            ir_p >>= 1
+        if ir_p <= 0:
+            return False
+        self.r_q = (red_p << R_BITS) // ir_p
+        self.r_ratio = self.r_q / (1 << R_BITS)
+        self.spo2 = self.lookup(self.r_q) / 10
+        self.window_samples = count
+        self.updated_at = self.n - 1
+        return True
+
+    def window_seconds(self):
+        return self.window_samples / self.sample_rate
@@ -0,0 +1,105 @@
+# frame.py
+# Ghép khung hình cho SSD1306: so sánh framebuffer với khung đã gửi trước đó theo từng page,
+# chỉ gửi vùng cột thay đổi của mỗi page trong một giao dịch I2C duy nhất.
+
+SET_COL_ADDR = 0x21
+SET_PAGE_ADDR = 0x22
+CTRL_CMD = 0x80   # Co = 1: một byte lệnh, sau đó còn byte điều khiển khác
+CTRL_DATA = 0x40  # Co = 0, D/C = 1: phần còn lại của giao dịch là dữ liệu
+
+
+def _dirty_span(buf, prev, start, end):
+    # Tìm cột đầu và cuối khác nhau trong [start, end), trả về (-1, -1) nếu page không đổi
+    i = start
+    while i < end and buf[i] == prev[i]:
+        i += 1
+    if i == end:
+        return -1, -1
+    j = end - 1
+    while buf[j] == prev[j]:
+        j -= 1
+    return i - start, j - start
+
+
+class FrameComposer:
+    def __init__(self, oled):
+        """
+        Khởi tạo bộ ghép khung hình cho màn hình SSD1306_I2C.
+        Args:
+            oled (SSD1306_I2C): Màn hình (cần các thuộc tính buffer, width, pages, i2c, addr).
+        """
+        self.oled = oled
+        self.width = oled.width
+        self.pages = oled.pages
+        self.col_offset = (128 - oled.width) // 2 if oled.width != 128 else 0
+        self._buf = memoryview(oled.buffer)
+        self._prev = bytearray(len(oled.buffer))
+        self._prev_mv = memoryview(self._prev)
+        # Byte điều khiển + lệnh đặt vùng cột/page, dùng lại cho mọi page
+        self._cmd = bytearray((CTRL_CMD, SET_COL_ADDR, CTRL_CMD, 0, CTRL_CMD, 0,
+                               CTRL_CMD, SET_PAGE_ADDR, CTRL_CMD, 0, CTRL_CMD, 0, CTRL_DATA))
+        self._write_list = [self._cmd, None]
+        self.full_refresh = True   # Khung đầu tiên luôn gửi toàn bộ
+        self.frames = 0
+        self.bytes_last_frame = 0
+        self.pages_last_frame = 0
+        self.bytes_total = 0
+
+    def invalidate(self):
+        """
+        Buộc khung hình tiếp theo gửi toàn bộ (ví dụ sau khi màn hình được khởi tạo lại).
+        """
+        self.full_refresh = True
+
+    def _send(self, page, c0, c1):
+        cmd = self._cmd
+        cmd[3] = c0 + self.col_offset
+        cmd[5] = c1 + self.col_offset
+        cmd[9] = page
+        cmd[11] = page
+        start = page * self.width
+        self._write_list[1] = self._buf[start + c0:start + c1 + 1]
+        self.oled.i2c.writevto(self.oled.addr, self._write_list)
+        return 1 + len(cmd) + c1 - c0 + 1  # Byte địa chỉ + lệnh + dữ liệu
+
+    def commit(self):
+        """
+        Gửi các vùng đã thay đổi so với khung trước rồi lưu lại khung hiện tại.
+        Returns:
+            int: Số byte đã gửi qua I2C trong khung này.
+        """
+        width = self.width
+        buf = self._buf
+        prev = self._prev
+        sent = 0
+        pages = 0
+        for page in range(self.pages):
+            start = page * width
+            end = start + width
+            if self.full_refresh:
+                c0, c1 = 0, width - 1
+            else:
+                c0, c1 = _dirty_span(buf, prev, start, end)
+                if c0 < 0:
+                    continue
+            sent += self._send(page, c0, c1)
+            pages += 1
+            self._prev_mv[start + c0:start + c1 + 1] = buf[start + c0:start + c1 + 1]
+        self.full_refresh = False
+        self.frames += 1
+        self.bytes_last_frame = sent
+        self.pages_last_frame = pages
+        self.bytes_total += sent
+        return sent
+
+    def stats(self):
+        """
+        Returns:
+            dict: Số khung, số byte của khung gần nhất, trung bình byte mỗi khung.
+        """
+        return {
+            'frames': self.frames,
+            'bytes_last_frame': self.bytes_last_frame,
+            'pages_last_frame': self.pages_last_frame,
+            'bytes_per_frame': self.bytes_total // self.frames if self.frames else 0,
+        }
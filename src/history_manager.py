@@ -1,24 +1,175 @@
 # history_manager.py
-from collections import deque
+# Lịch sử đo lưu dạng bản ghi nhị phân cố định trong một file vòng (flash hoặc thẻ nhớ) hoặc trong RAM:
+# truy cập theo chỉ số (0 là mới nhất) với chi phí O(1), đọc theo trang cho màn hình lịch sử.
+import struct
+import time
+
+from history_rollup import Rollups
+
+MAGIC = b'HIS1'
+VERSION = 1
+HEADER_FORMAT = '<4sHHIII'   # magic, phiên bản, kích thước bản ghi, dung lượng, head, count
+HEADER_SIZE = 20
+RECORD_FORMAT = '<IHHH'      # epoch (giây), HR x10, SpO2 x10, cờ
+RECORD_SIZE = 10
+
+# Cờ của bản ghi
+FLAG_HR_ALERT = 0x01     # Nhịp tim ngoài ngưỡng cảnh báo
+FLAG_SPO2_ALERT = 0x02   # SpO2 dưới ngưỡng cảnh báo
+
+
+def parse_timestamp(timestamp):
+    """
+    Chuyển thời gian "YYYY-MM-DD HH:MM:SS" sang số giây (theo time.mktime của thiết bị).
+    Số nguyên được giữ nguyên.
+    """
+    if isinstance(timestamp, int):
+        return timestamp
+    if isinstance(timestamp, float):
+        return int(timestamp)
+    date, clock = timestamp.split(" ")
+    y, mo, d = date.split("-")
+    h, mi, s = clock.split(":")
+    return int(time.mktime((int(y), int(mo), int(d), int(h), int(mi), int(s), 0, 0, -1)))
+
+
+def format_timestamp(epoch):
+    t = time.localtime(epoch)
+    return "{:04d}-{:02d}-{:02d} {:02d}:{:02d}:{:02d}".format(t[0], t[1], t[2], t[3], t[4], t[5])
+
 
 class HistoryManager:
-    def __init__(self, max_entries=30):
+    def __init__(self, max_entries=30, path=None, page_size=4, hourly_buckets=48, daily_buckets=90):
         """
         Khởi tạo HistoryManager.
         Args:
             max_entries (int, optional): Số lượng kết quả đo tối đa được lưu trữ. Mặc định là 30.
+                Nếu file đã tồn tại, dung lượng ghi trong header của file được dùng.
+            path (str, optional): File lưu lịch sử (ví dụ '/history.bin' trên flash hoặc
+                '/sd/history.bin'). Mặc định là None (chỉ lưu trong RAM, mất khi khởi động lại).
+            page_size (int, optional): Số bản ghi đọc mỗi lần cho màn hình lịch sử. Mặc định là 4.
+            hourly_buckets (int, optional): Số giờ gần nhất có thống kê theo giờ. Mặc định là 48.
+            daily_buckets (int, optional): Số ngày gần nhất có thống kê theo ngày. Mặc định là 90.
+                Thống kê được lưu cạnh file lịch sử (path + '.rol') và giữ lâu hơn các bản ghi thô.
         """
-        self.history = deque(maxlen=max_entries)
+        self.capacity = max_entries
+        self.path = path
+        self.head = 0    # Vị trí (slot) sẽ ghi bản ghi tiếp theo
+        self.count = 0
+        self._file = None
+        self._mem = None
+        self._header = bytearray(HEADER_SIZE)
+        self.page_size = page_size
+        self._page = bytearray(page_size * RECORD_SIZE)
+        self._page_mv = memoryview(self._page)
+        self._page_start = 0    # Chỉ số (mới nhất = 0) của bản ghi đầu trang đang đệm
+        self._page_len = 0      # 0 khi chưa có trang hợp lệ
+        if path is None:
+            self._mem = bytearray(self.capacity * RECORD_SIZE)
+            self.rollups = Rollups(hourly_buckets, daily_buckets)
+        else:
+            self._open(path)
+            self.rollups = Rollups(hourly_buckets, daily_buckets, path + '.rol')
+            if not self.rollups.loaded and self.count:
+                self._rebuild_rollups()
+
+    def _open(self, path):
+        try:
+            self._file = open(path, 'r+b')
+            self._file.readinto(self._header)
+            magic, version, size, capacity, head, count = struct.unpack(HEADER_FORMAT, self._header)
+            if magic != MAGIC or size != RECORD_SIZE or capacity == 0:
+                raise ValueError("Not a history file")
+            if capacity != self.capacity:
+                print("History file capacity", capacity, "used instead of", self.capacity)
+            self.capacity = capacity
+            self.head = head % capacity
+            self.count = min(count, capacity)
+        except (OSError, ValueError):
+            # Chưa có file (hoặc file hỏng): tạo mới với header rỗng
+            if self._file is not None:
+                self._file.close()
+            self._file = open(path, 'w+b')
+            self.head = 0
+            self.count = 0
+            self._write_header()
+
+    def _write_header(self):
+        struct.pack_into(HEADER_FORMAT, self._header, 0, MAGIC, VERSION, RECORD_SIZE,
+                         self.capacity, self.head, self.count)
+        self._file.seek(0)
+        self._file.write(self._header)
+        self._file.flush()
 
-    def add_record(self, timestamp, hr, spo2):
+    def _slot(self, index):
+        # Chỉ số logic (0 là mới nhất) -> vị trí trong file vòng
+        return (self.head - 1 - index) % self.capacity
+
+    def _read_slots(self, slot, n, mv):
+        # Đọc n bản ghi liên tiếp bắt đầu từ slot (không vòng qua cuối) vào mv
+        nbytes = n * RECORD_SIZE
+        if self._mem is not None:
+            start = slot * RECORD_SIZE
+            mv[:nbytes] = memoryview(self._mem)[start:start + nbytes]
+        else:
+            self._file.seek(HEADER_SIZE + slot * RECORD_SIZE)
+            self._file.readinto(mv[:nbytes])
+
+    def add_record(self, timestamp, hr, spo2, flags=0):
         """
-        Thêm một kết quả đo vào lịch sử.
+        Thêm một kết quả đo vào lịch sử (ghi đè kết quả cũ nhất khi đầy).
         Args:
-            timestamp (str): Thời gian đo (ví dụ: "2024-06-16 10:00:00").
-            hr (int): Nhịp tim.
-            spo2 (int): SpO2.
+            timestamp (str/int): Thời gian đo ("2024-06-16 10:00:00" hoặc số giây).
+            hr (float): Nhịp tim.
+            spo2 (float): SpO2.
+            flags (int, optional): Các cờ FLAG_*. Mặc định là 0.
         """
-        self.history.append({'timestamp': timestamp, 'hr': hr, 'spo2': spo2})
+        epoch = parse_timestamp(timestamp)
+        hr10 = _scaled(hr)
+        spo2_10 = _scaled(spo2)
+        record = struct.pack(RECORD_FORMAT, epoch & 0xFFFFFFFF, hr10, spo2_10, flags)
+        if self._mem is not None:
+            start = self.head * RECORD_SIZE
+            self._mem[start:start + RECORD_SIZE] = record
+        else:
+            # Ghi bản ghi trước rồi mới cập nhật header: mất điện giữa chừng chỉ mất bản ghi mới
+            self._file.seek(HEADER_SIZE + self.head * RECORD_SIZE)
+            self._file.write(record)
+        self.head = (self.head + 1) % self.capacity
+        if self.count < self.capacity:
+            self.count += 1
+        if self._file is not None:
+            self._write_header()
+        self._page_len = 0   # Chỉ số logic của mọi bản ghi đã dịch đi một: bỏ trang đang đệm
+        self.rollups.add(epoch, hr10, spo2_10)
+
+    def _rebuild_rollups(self):
+        # File thống kê mất hoặc không khớp: dựng lại từ các bản ghi thô còn lại (cũ -> mới)
+        for index in range(self.count - 1, -1, -1):
+            epoch, hr, spo2, flags = self._unpack(index)
+            self.rollups.add(epoch, hr, spo2)
+
+    def _load_page(self, start):
+        n = min(self.page_size, self.count - start)
+        mv = self._page_mv
+        # Bản ghi mới -> cũ nằm ở các slot giảm dần; đọc thành tối đa hai đoạn liên tục
+        slot_newest = self._slot(start)
+        slot_oldest = self._slot(start + n - 1)
+        if slot_oldest <= slot_newest:
+            self._read_slots(slot_oldest, n, mv)
+        else:
+            first = self.capacity - slot_oldest
+            self._read_slots(slot_oldest, first, mv)
+            self._read_slots(0, n - first, mv[first * RECORD_SIZE:])
+        self._page_start = start
+        self._page_len = n
+
+    def _unpack(self, index):
+        if not self._page_start <= index < self._page_start + self._page_len:
+            self._load_page(index - index % self.page_size)
+        # Trong trang, bản ghi được đọc theo thứ tự slot tăng dần (cũ -> mới)
+        pos = self._page_len - 1 - (index - self._page_start)
+        return struct.unpack_from(RECORD_FORMAT, self._page, pos * RECORD_SIZE)
 
     def get_record(self, index):
         """
@@ -28,10 +179,47 @@ class HistoryManager:
         Returns:
             dict: Kết quả đo (hoặc None nếu index không hợp lệ).
         """
-        if 0 <= index < len(self.history):
-            return self.history[index]
-        else:
+        if not 0 <= index < self.count:
             return None
+        epoch, hr, spo2, flags = self._unpack(index)
+        return {'timestamp': format_timestamp(epoch), 'epoch': epoch, 'hr': hr / 10, 'spo2': spo2 / 10,
+                'flags': flags}
+
+    def get_page(self, page):
+        """
+        Lấy một trang kết quả đo (đọc từ file một lần cho cả trang).
+        Args:
+            page (int): Số thứ tự trang (0 là trang mới nhất).
+        Returns:
+            list: Các kết quả đo (dict) của trang, mới nhất trước.
+        """
+        start = page * self.page_size
+        return [self.get_record(i) for i in range(start, min(start + self.page_size, self.count))]
+
+    def query(self, start, end):
+        """
+        Thống kê HR/SpO2 trong một khoảng thời gian, trả lời từ các tầng thống kê giờ/ngày
+        (không quét bản ghi thô). Khoảng được làm tròn ra ngoài theo giờ.
+        Args:
+            start (str/int): Thời điểm bắt đầu ("2024-06-16 10:00:00" hoặc số giây).
+            end (str/int): Thời điểm kết thúc (không bao gồm).
+        Returns:
+            dict: count, hr_min, hr_max, hr_mean, spo2_min, spo2_max, spo2_mean (None nếu không có dữ liệu)
+                  và complete (False nếu một phần khoảng đã ra khỏi thời gian lưu thống kê).
+        """
+        return self.rollups.query(parse_timestamp(start), parse_timestamp(end))
+
+    def trend(self, start, end, tier='hour'):
+        """
+        Chuỗi HR/SpO2 trung bình theo giờ hoặc theo ngày cho đồ thị xu hướng.
+        Args:
+            start (str/int): Thời điểm bắt đầu.
+            end (str/int): Thời điểm kết thúc (không bao gồm).
+            tier (str, optional): 'hour' hoặc 'day'. Mặc định là 'hour'.
+        Returns:
+            list: Các tuple (epoch đầu bucket, số lần đo, HR trung bình, SpO2 trung bình).
+        """
+        return self.rollups.series(parse_timestamp(start), parse_timestamp(end), tier)
 
     def get_history_length(self):
         """
@@ -39,4 +227,27 @@ class HistoryManager:
         Returns:
             int: Số lượng kết quả đo.
         """
-        return len(self.history)
+        return self.count
+
+    def clear(self):
+        """
+        Xóa toàn bộ lịch sử.
+        """
+        self.head = 0
+        self.count = 0
+        self._page_len = 0
+        self.rollups.clear()
+        if self._file is not None:
+            self._write_header()
+
+    def close(self):
+        self.rollups.close()
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+
+def _scaled(value):
+    # HR/SpO2 lưu dạng u16 với độ phân giải 0.1
+    v = int(value * 10 + 0.5)
+    return 0 if v < 0 else (65535 if v > 65535 else v)
@@ -0,0 +1,243 @@
+# history_rollup.py
+# Thống kê gộp của lịch sử đo theo giờ và theo ngày (số lần đo, min, max, trung bình HR/SpO2),
+# cập nhật tăng dần mỗi khi thêm bản ghi, lưu trong các bucket vòng cố định (RAM không đổi).
+import struct
+
+MAGIC = b'ROL1'
+VERSION = 1
+HEADER_FORMAT = '<4sHHH'     # magic, phiên bản, số bucket giờ, số bucket ngày
+HEADER_SIZE = 10
+BUCKET_FORMAT = '<iHHHHHII'  # khóa bucket, số lần đo, HR min/max, SpO2 min/max (x10), tổng HR/SpO2 (x10)
+BUCKET_SIZE = 22
+EMPTY = -1
+
+HOUR = 3600
+DAY = 86400
+
+
+class RollupTier:
+    def __init__(self, seconds, n_buckets):
+        """
+        Một tầng thống kê: mỗi bucket gộp các bản ghi trong `seconds` giây, giữ n_buckets bucket gần nhất.
+        Args:
+            seconds (int): Độ dài một bucket (giây), ví dụ HOUR hoặc DAY.
+            n_buckets (int): Số bucket giữ lại.
+        """
+        self.seconds = seconds
+        self.n_buckets = n_buckets
+        self.data = bytearray(n_buckets * BUCKET_SIZE)
+        self.clear()
+
+    def clear(self):
+        for slot in range(self.n_buckets):
+            struct.pack_into(BUCKET_FORMAT, self.data, slot * BUCKET_SIZE, EMPTY, 0, 0, 0, 0, 0, 0, 0)
+
+    def add(self, epoch, hr, spo2):
+        """
+        Gộp một bản ghi (HR/SpO2 dạng x10) vào bucket của nó.
+        Returns:
+            int: Slot đã thay đổi, hoặc -1 nếu bản ghi cũ hơn mọi bucket còn giữ.
+        """
+        key = epoch // self.seconds
+        slot = key % self.n_buckets
+        off = slot * BUCKET_SIZE
+        old_key, count, hr_min, hr_max, sp_min, sp_max, hr_sum, sp_sum = struct.unpack_from(BUCKET_FORMAT, self.data, off)
+        if old_key != key:
+            if old_key != EMPTY and old_key > key:
+                return -1   # Slot đã thuộc về khoảng thời gian mới hơn
+            count, hr_min, hr_max, sp_min, sp_max, hr_sum, sp_sum = 0, 65535, 0, 65535, 0, 0, 0
+        if count == 65535:
+            return -1
+        struct.pack_into(BUCKET_FORMAT, self.data, off, key, count + 1,
+                         min(hr_min, hr), max(hr_max, hr), min(sp_min, spo2), max(sp_max, spo2),
+                         hr_sum + hr, sp_sum + spo2)
+        return slot
+
+    def bucket(self, key):
+        """
+        Returns:
+            tuple: (count, hr_min, hr_max, spo2_min, spo2_max, hr_sum, spo2_sum) dạng x10,
+                   hoặc None nếu bucket không còn (hoặc chưa từng có dữ liệu).
+        """
+        off = (key % self.n_buckets) * BUCKET_SIZE
+        values = struct.unpack_from(BUCKET_FORMAT, self.data, off)
+        if values[0] != key:
+            return None
+        return values[1:]
+
+    def oldest_key(self, newest_key):
+        return newest_key - self.n_buckets + 1
+
+
+class _Summary:
+    # Bộ cộng dồn kết quả truy vấn
+    def __init__(self):
+        self.count = 0
+        self.hr_min = self.sp_min = 65535
+        self.hr_max = self.sp_max = 0
+        self.hr_sum = self.sp_sum = 0
+        self.complete = True
+
+    def merge(self, b):
+        count, hr_min, hr_max, sp_min, sp_max, hr_sum, sp_sum = b
+        self.count += count
+        self.hr_min = min(self.hr_min, hr_min)
+        self.hr_max = max(self.hr_max, hr_max)
+        self.sp_min = min(self.sp_min, sp_min)
+        self.sp_max = max(self.sp_max, sp_max)
+        self.hr_sum += hr_sum
+        self.sp_sum += sp_sum
+
+    def as_dict(self):
+        n = self.count
+        return {
+            'count': n,
+            'hr_min': self.hr_min / 10 if n else None,
+            'hr_max': self.hr_max / 10 if n else None,
+            'hr_mean': self.hr_sum / n / 10 if n else None,
+            'spo2_min': self.sp_min / 10 if n else None,
+            'spo2_max': self.sp_max / 10 if n else None,
+            'spo2_mean': self.sp_sum / n / 10 if n else None,
+            'complete': self.complete,   # False nếu một phần khoảng thời gian đã bị xoay vòng khỏi các tầng
+        }
+
+
+class Rollups:
+    def __init__(self, hourly_buckets=48, daily_buckets=90, path=None):
+        """
+        Hai tầng thống kê (giờ, ngày), tùy chọn lưu ra file để giữ qua các lần khởi động.
+        Args:
+            hourly_buckets (int, optional): Số giờ gần nhất được giữ. Mặc định là 48.
+            daily_buckets (int, optional): Số ngày gần nhất được giữ. Mặc định là 90.
+            path (str, optional): File lưu thống kê. Mặc định là None (chỉ trong RAM).
+        """
+        self.hourly = RollupTier(HOUR, hourly_buckets)
+        self.daily = RollupTier(DAY, daily_buckets)
+        self.newest = None   # epoch của bản ghi mới nhất đã gộp
+        self.path = path
+        self._file = None
+        self.loaded = False  # True nếu đã nạp được thống kê từ file
+        if path is not None:
+            self._open(path)
+
+    def _open(self, path):
+        header = bytearray(HEADER_SIZE)
+        try:
+            self._file = open(path, 'r+b')
+            self._file.readinto(header)
+            magic, version, nh, nd = struct.unpack(HEADER_FORMAT, header)
+            if magic != MAGIC or nh != self.hourly.n_buckets or nd != self.daily.n_buckets:
+                raise ValueError("Rollup file does not match")
+            self._file.readinto(self.hourly.data)
+            self._file.readinto(self.daily.data)
+            self.loaded = True
+        except (OSError, ValueError):
+            if self._file is not None:
+                self._file.close()
+            self._file = open(path, 'w+b')
+            self._file.write(struct.pack(HEADER_FORMAT, MAGIC, VERSION, self.hourly.n_buckets, self.daily.n_buckets))
+            self._file.write(self.hourly.data)
+            self._file.write(self.daily.data)
+            self._file.flush()
+        # Bản ghi mới nhất: suy ra từ bucket giờ mới nhất (đủ để xác định phạm vi truy vấn)
+        newest_key = -1
+        for slot in range(self.hourly.n_buckets):
+            key = struct.unpack_from('<i', self.hourly.data, slot * BUCKET_SIZE)[0]
+            newest_key = max(newest_key, key)
+        if newest_key >= 0:
+            self.newest = newest_key * HOUR + HOUR - 1
+
+    def _save(self, tier_offset, slot, tier):
+        off = slot * BUCKET_SIZE
+        self._file.seek(HEADER_SIZE + tier_offset + off)
+        self._file.write(memoryview(tier.data)[off:off + BUCKET_SIZE])
+
+    def add(self, epoch, hr, spo2):
+        """
+        Gộp một bản ghi vào cả hai tầng (HR/SpO2 dạng x10).
+        """
+        slot = self.hourly.add(epoch, hr, spo2)
+        slot_day = self.daily.add(epoch, hr, spo2)
+        if self.newest is None or epoch > self.newest:
+            self.newest = epoch
+        if self._file is not None:
+            if slot >= 0:
+                self._save(0, slot, self.hourly)
+            if slot_day >= 0:
+                self._save(len(self.hourly.data), slot_day, self.daily)
+            self._file.flush()
+
+    def clear(self):
+        self.hourly.clear()
+        self.daily.clear()
+        self.newest = None
+        if self._file is not None:
+            self._file.seek(HEADER_SIZE)
+            self._file.write(self.hourly.data)
+            self._file.write(self.daily.data)
+            self._file.flush()
+
+    def _merge_hours(self, summary, first_hour, end_hour):
+        newest = self.newest // HOUR if self.newest is not None else -1
+        oldest = self.hourly.oldest_key(newest)
+        for key in range(first_hour, end_hour):
+            if key > newest:
+                break
+            b = self.hourly.bucket(key)
+            if b is not None:
+                summary.merge(b)
+            elif key < oldest:
+                summary.complete = False
+
+    def query(self, start, end):
+        """
+        Thống kê trong khoảng [start, end) (epoch, giây), làm tròn ra ngoài theo giờ.
+        Các ngày nằm trọn trong khoảng lấy từ tầng ngày, phần lẻ ở hai đầu lấy từ tầng giờ;
+        không đọc bản ghi thô.
+        Returns:
+            dict: count, hr_min/max/mean, spo2_min/max/mean (None nếu không có dữ liệu) và complete.
+        """
+        summary = _Summary()
+        if self.newest is None or end <= start:
+            return summary.as_dict()
+        first_hour = start // HOUR
+        end_hour = (end + HOUR - 1) // HOUR
+        first_day = (first_hour * HOUR + DAY - 1) // DAY   # Ngày trọn vẹn đầu tiên
+        end_day = (end_hour * HOUR) // DAY
+        if first_day >= end_day:
+            self._merge_hours(summary, first_hour, end_hour)
+            return summary.as_dict()
+        self._merge_hours(summary, first_hour, first_day * DAY // HOUR)
+        newest_day = self.newest // DAY
+        oldest_day = self.daily.oldest_key(newest_day)
+        for key in range(first_day, min(end_day, newest_day + 1)):
+            b = self.daily.bucket(key)
+            if b is not None:
+                summary.merge(b)
+            elif key < oldest_day:
+                summary.complete = False
+        self._merge_hours(summary, end_day * DAY // HOUR, end_hour)
+        return summary.as_dict()
+
+    def series(self, start, end, tier='hour'):
+        """
+        Chuỗi thống kê theo từng bucket cho đồ thị xu hướng.
+        Args:
+            start (int): Thời điểm bắt đầu (epoch).
+            end (int): Thời điểm kết thúc (epoch, không bao gồm).
+            tier (str, optional): 'hour' hoặc 'day'. Mặc định là 'hour'.
+        Returns:
+            list: Các tuple (epoch đầu bucket, số lần đo, HR trung bình, SpO2 trung bình) của các bucket có dữ liệu.
+        """
+        t = self.hourly if tier == 'hour' else self.daily
+        out = []
+        for key in range(start // t.seconds, (end + t.seconds - 1) // t.seconds):
+            b = t.bucket(key)
+            if b is not None and b[0]:
+                out.append((key * t.seconds, b[0], b[5] / b[0] / 10, b[6] / b[0] / 10))
+        return out
+
+    def close(self):
+        if self._file is not None:
+            self._file.close()
+            self._file = None
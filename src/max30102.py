@@ -1,22 +1,113 @@
 # max30102.py
-from machine import I2C, Pin
+# Chỉ import các module nhẹ khi nạp; joblib/numpy và mô hình NN được nạp khi dùng lần đầu
 import time
-import numpy as np
-import csv
-import joblib
-from microsd import MicroSD
-from scipy.signal import wiener # Import hàm lọc Wiener
-from machine import SoftI2C
+from array import array
+from filters import KalmanFilter, StreamingWiener
+from ring_buffer import RingBuffer
+from beat_detector import BeatDetector
+from spo2_engine import SpO2Engine
+from fixed_dsp import FixedIIR, FixedBeatDetector, FixedSpO2Engine
+from nn_model import CompactMLP, extract_features, N_FEATURES
+from profiler import profiler, FIFO_READ, FILTER, HR, SPO2, NN
+
+# Thanh ghi FIFO của MAX30102
+REG_FIFO_WR_PTR = 0x04
+REG_OVF_COUNTER = 0x05
+REG_FIFO_RD_PTR = 0x06
+REG_FIFO_DATA = 0x07
+REG_FIFO_CONFIG = 0x08
+REG_MODE_CONFIG = 0x09
+REG_SPO2_CONFIG = 0x0A
+REG_LED1_PA = 0x0C  # LED đỏ
+REG_LED2_PA = 0x0D  # LED hồng ngoại
+
+MODE_RESET = 0x40  # Bit RESET trong thanh ghi Mode Configuration
+MODE_SHDN = 0x80   # Bit SHDN: tắt LED và ADC, giữ nguyên các thanh ghi
+MODE_SPO2 = 0x03
+
+# Mã hóa các trường cấu hình (giá trị -> mã bit)
+SAMPLE_AVERAGING = {1: 0, 2: 1, 4: 2, 8: 3, 16: 4, 32: 5}                            # 0x08 bit 7:5
+ADC_RANGES = {2048: 0, 4096: 1, 8192: 2, 16384: 3}                                   # 0x0A bit 6:5 (nA)
+SAMPLE_RATES = {50: 0, 100: 1, 200: 2, 400: 3, 800: 4, 1000: 5, 1600: 6, 3200: 7}     # 0x0A bit 4:2 (Hz)
+PULSE_WIDTHS = {69: 0, 118: 1, 215: 2, 411: 3}                                      # 0x0A bit 1:0 (us)
+LED_CURRENT_STEP = 0.2  # mA mỗi LSB của thanh ghi LEDx_PA
+
+FIFO_DEPTH = 32  # Số mẫu tối đa trong FIFO
+BYTES_PER_SAMPLE = 6  # 3 byte RED + 3 byte IR (SpO2 mode)
 
 class MAX30102:
-    def __init__(self, i2c, addr=0x57, microsd=None):
+    def __init__(self, i2c, addr=0x57, microsd=None, denoise_window=5, denoise_noise=None,
+                 buffer_seconds=5, hr_avg_beats=4, spo2_window_seconds=4, spo2_update_every=None,
+                 model_path='nn_model.pkl', compact_model_path='nn_model.bin', feature_seconds=4,
+                 reset_timeout_ms=100, dsp='float'):
+        if dsp not in ('float', 'fixed'):
+            raise ValueError("dsp must be 'float' or 'fixed'")
+        self.dsp = dsp
         self.i2c = i2c
         self.addr = addr
+        self.model_path = model_path
+        self.compact_model_path = compact_model_path
+        self.feature_seconds = feature_seconds
+        self._features = array('f', [0.0] * N_FEATURES)
+        self.reset_timeout_ms = reset_timeout_ms
+        self.nn_model = None
+        self._model_loaded = False  # Mô hình chỉ được nạp ở lần dự đoán đầu tiên
+        self.sample_rate = 100  # Hz, tần số mẫu thực tế trong FIFO, cập nhật bởi configure()
+        self.shutdown = False
+        self.config = None
+        self._hr_avg_beats = hr_avg_beats
+        self._spo2_window_seconds = spo2_window_seconds
+        self._spo2_update_every = spo2_update_every
+        self._buffer_seconds = buffer_seconds
+        # Bộ đệm cấp phát sẵn cho đọc FIFO theo lô (tránh cấp phát mỗi lần đọc)
+        self._fifo_buf = bytearray(FIFO_DEPTH * BYTES_PER_SAMPLE)
+        self._fifo_mv = memoryview(self._fifo_buf)
+        self._ptr_buf = bytearray(3)
+        self.fifo_red = array('i', [0] * FIFO_DEPTH)
+        self.fifo_ir = array('i', [0] * FIFO_DEPTH)
+        self.overflow_count = 0  # Tổng số mẫu bị mất do FIFO tràn
+        self.last_red = 0
+        self.last_ir = 0
         self.setup()
-        self.red_buffer = []
-        self.ir_buffer = []
-        self.load_model()
+        # Bộ đệm vòng dung lượng cố định: bộ nhớ không đổi trong suốt phiên đo
+        capacity = self._buffer_seconds * self.sample_rate
+        # Chuỗi số nguyên (dsp='fixed'): mẫu thô đi thẳng vào bộ lọc IIR, mọi bộ đệm là array('i')
+        typecode = 'i' if dsp == 'fixed' else 'f'
+        self.red_buffer = RingBuffer(capacity, typecode)
+        self.ir_buffer = RingBuffer(capacity, typecode)
+        if dsp == 'fixed':
+            self.red_denoiser = self.ir_denoiser = None
+            # IIR có cùng hệ số với bộ lọc Kalman ở trạng thái ổn định
+            k_ss = KalmanFilter().k_ss
+            self.red_kalman = FixedIIR(k_ss)
+            self.ir_kalman = FixedIIR(k_ss)
+        else:
+            # Khâu khử nhiễu Wiener chạy trên cửa sổ trượt của luồng RED/IR
+            self.red_denoiser = StreamingWiener(denoise_window, denoise_noise)
+            self.ir_denoiser = StreamingWiener(denoise_window, denoise_noise)
+            self._red_dn = array('f', [0.0] * FIFO_DEPTH)
+            self._ir_dn = array('f', [0.0] * FIFO_DEPTH)
+            # Bộ lọc Kalman giữ trạng thái cho từng kênh, cập nhật theo mỗi lô FIFO
+            self.red_kalman = KalmanFilter()
+            self.ir_kalman = KalmanFilter()
+        self.red_filtered = RingBuffer(capacity, typecode)
+        self.ir_filtered = RingBuffer(capacity, typecode)
+        self._red_kf = array(typecode, [0] * FIFO_DEPTH)
+        self._ir_kf = array(typecode, [0] * FIFO_DEPTH)
+        # Phát hiện nhịp trực tuyến trên kênh IR, HR là giá trị chạy theo từng nhịp
+        self.beat_detector = self._new_beat_detector(self.sample_rate)
+        # SpO2 trên cửa sổ trượt với thống kê DC/AC chạy
+        self.spo2_engine = self._new_spo2_engine(self.sample_rate)
         self.microsd = microsd
+        self.logger = None  # SDLogger (tùy chọn): ghi mẫu thô của từng lô ra thẻ nhớ
+
+    def _new_beat_detector(self, rate, on_beat=None):
+        cls = FixedBeatDetector if self.dsp == 'fixed' else BeatDetector
+        return cls(rate, avg_beats=self._hr_avg_beats, on_beat=on_beat)
+
+    def _new_spo2_engine(self, rate):
+        cls = FixedSpO2Engine if self.dsp == 'fixed' else SpO2Engine
+        return cls(rate, self._spo2_window_seconds, self._spo2_update_every)
 
     def write_reg(self, reg, value):
         self.i2c.writeto_mem(self.addr, reg, bytes([value]))
@@ -24,83 +115,282 @@ class MAX30102:
     def read_reg(self, reg, nbytes=1):
         return self.i2c.readfrom_mem(self.addr, reg, nbytes)
 
+    def reset(self):
+        """
+        Reset cảm biến và chờ bit RESET (0x09, bit 6) tự xóa thay vì ngủ cố định.
+        Raises:
+            OSError: Nếu cảm biến không hoàn tất reset trong reset_timeout_ms.
+        """
+        self.write_reg(REG_MODE_CONFIG, MODE_RESET)
+        start = time.ticks_ms()
+        while self.read_reg(REG_MODE_CONFIG)[0] & MODE_RESET:
+            if time.ticks_diff(time.ticks_ms(), start) > self.reset_timeout_ms:
+                raise OSError("MAX30102 reset timeout")
+            time.sleep_ms(1)
+
     def setup(self):
         # Reset the sensor
-        self.write_reg(0x09, 0x40)
-        time.sleep(1)
+        self.reset()
 
-        # Set FIFO Configuration
-        self.write_reg(0x08, 0x4F)  # Sample Averaging = 4, FIFO Rolls on Full
+        # Xóa con trỏ FIFO và bộ đếm tràn
+        self.write_reg(REG_FIFO_WR_PTR, 0x00)
+        self.write_reg(REG_OVF_COUNTER, 0x00)
+        self.write_reg(REG_FIFO_RD_PTR, 0x00)
+
+        # FIFO_A_FULL = 15 (ngắt khi còn 15 ô trống), FIFO không ghi đè khi đầy
+        self.write_reg(REG_FIFO_CONFIG, 0x0F)
 
         # Set Mode Configuration
-        self.write_reg(0x09, 0x03)  # SpO2 mode
+        self.write_reg(REG_MODE_CONFIG, MODE_SPO2)
+
+        # ADC Range = 4096nA, Sample Rate = 100Hz, LED Pulse Width = 411µs, LED 7.2mA
+        self.configure()
+
+    def configure(self, sample_rate=100, averaging=1, pulse_width=411, led_current=7.2, ir_current=None,
+                  adc_range=4096):
+        """
+        Cấu hình lại tần số lấy mẫu, lấy trung bình, độ rộng xung và dòng LED (thanh ghi 0x08, 0x0A, 0x0C, 0x0D).
+        Tần số mẫu thực tế trong FIFO là sample_rate / averaging; nếu thay đổi, các bộ đệm vòng được đổi
+        dung lượng theo buffer_seconds, bộ lọc được reset, bộ phát hiện nhịp và bộ tính SpO2 được tạo lại
+        theo tần số mới.
+        Args:
+            sample_rate (int, optional): Tần số ADC (Hz), một trong SAMPLE_RATES. Mặc định là 100.
+            averaging (int, optional): Số mẫu lấy trung bình trong cảm biến. Mặc định là 1.
+            pulse_width (int, optional): Độ rộng xung LED (us), một trong PULSE_WIDTHS. Mặc định là 411.
+            led_current (float, optional): Dòng LED đỏ (mA, 0-51). Mặc định là 7.2.
+            ir_current (float, optional): Dòng LED hồng ngoại (mA). Mặc định bằng led_current.
+            adc_range (int, optional): Dải ADC (nA), một trong ADC_RANGES. Mặc định là 4096.
+        Raises:
+            ValueError: Nếu giá trị không được cảm biến hỗ trợ.
+        """
+        if sample_rate not in SAMPLE_RATES or averaging not in SAMPLE_AVERAGING or \
+                pulse_width not in PULSE_WIDTHS or adc_range not in ADC_RANGES:
+            raise ValueError("Unsupported MAX30102 configuration")
+        if ir_current is None:
+            ir_current = led_current
+        # Giữ nguyên FIFO_ROLLOVER_EN và FIFO_A_FULL (InterruptAcquisition có thể đã đặt ngưỡng)
+        fifo_config = self.read_reg(REG_FIFO_CONFIG)[0] & 0x1F
+        self.write_reg(REG_FIFO_CONFIG, (SAMPLE_AVERAGING[averaging] << 5) | fifo_config)
+        self.write_reg(REG_SPO2_CONFIG, (ADC_RANGES[adc_range] << 5) | (SAMPLE_RATES[sample_rate] << 2) |
+                       PULSE_WIDTHS[pulse_width])
+        self.write_reg(REG_LED1_PA, _led_code(led_current))
+        self.write_reg(REG_LED2_PA, _led_code(ir_current))
+        # Bỏ các mẫu đã lấy theo cấu hình cũ
+        self.write_reg(REG_FIFO_WR_PTR, 0x00)
+        self.write_reg(REG_OVF_COUNTER, 0x00)
+        self.write_reg(REG_FIFO_RD_PTR, 0x00)
+        self.config = {'sample_rate': sample_rate, 'averaging': averaging, 'pulse_width': pulse_width,
+                       'led_current': led_current, 'ir_current': ir_current, 'adc_range': adc_range}
+        rate = sample_rate // averaging
+        if rate != self.sample_rate:
+            self.sample_rate = rate
+            if hasattr(self, 'beat_detector'):
+                # Dung lượng bộ đệm và trạng thái bộ lọc đều tính theo tần số cũ
+                capacity = self._buffer_seconds * rate
+                for buf in (self.red_buffer, self.ir_buffer, self.red_filtered, self.ir_filtered):
+                    buf.resize(capacity)
+                self._reset_filters()
+                self.beat_detector = self._new_beat_detector(rate, self.beat_detector.on_beat)
+                self.spo2_engine = self._new_spo2_engine(rate)
+        if self.shutdown:
+            self.wake()
 
-        # Set SpO2 Configuration
-        self.write_reg(0x0A, 0x27)  # ADC Range = 4096nA, Sample Rate = 100Hz, LED Pulse Width = 411µs
+    def sleep(self):
+        """
+        Đưa cảm biến vào chế độ tiết kiệm năng lượng (bit SHDN của thanh ghi 0x09): LED và ADC tắt.
+        """
+        self.write_reg(REG_MODE_CONFIG, self.read_reg(REG_MODE_CONFIG)[0] | MODE_SHDN)
+        self.shutdown = True
 
-        # Set LED Pulse Amplitude
-        self.write_reg(0x0C, 0x24)  # RED LED
-        self.write_reg(0x0D, 0x24)  # IR LED
+    def wake(self):
+        """
+        Thoát chế độ SHDN và bỏ các mẫu cũ trong FIFO.
+        """
+        self.write_reg(REG_MODE_CONFIG, self.read_reg(REG_MODE_CONFIG)[0] & ~MODE_SHDN & 0xFF)
+        self.write_reg(REG_FIFO_WR_PTR, 0x00)
+        self.write_reg(REG_OVF_COUNTER, 0x00)
+        self.write_reg(REG_FIFO_RD_PTR, 0x00)
+        self.shutdown = False
 
     def load_model(self):
-        self.nn_model = joblib.load('nn_model.pkl')
+        """
+        Nạp mô hình NN. Ưu tiên mô hình rút gọn (compact_model_path, chạy được trên thiết bị),
+        nếu không có thì dùng mô hình joblib (joblib chỉ được import tại đây). Thiếu file hoặc
+        thư viện thì chỉ báo lỗi, phần đo HR/SpO2 vẫn hoạt động bình thường.
+        Returns:
+            object: Mô hình đã nạp hoặc None.
+        """
+        self._model_loaded = True
+        try:
+            self.nn_model = CompactMLP(self.compact_model_path)
+            return self.nn_model
+        except (OSError, ValueError):
+            pass
+        try:
+            import joblib
+            self.nn_model = joblib.load(self.model_path)
+        except (ImportError, OSError) as e:
+            print("Không nạp được mô hình NN:", e)
+            self.nn_model = None
+        return self.nn_model
 
     def read_fifo(self):
-        fifo_data = self.read_reg(0x07, 6) # Read 6 bytes from FIFO_DATA
-        red = (fifo_data[0] << 16) | (fifo_data[1] << 8) | fifo_data[2]
-        ir = (fifo_data[3] << 16) | (fifo_data[4] << 8) | fifo_data[5]
+        fifo_data = self.read_reg(REG_FIFO_DATA, 6) # Read 6 bytes from FIFO_DATA
+        red = ((fifo_data[0] << 16) | (fifo_data[1] << 8) | fifo_data[2]) & 0x3FFFF
+        ir = ((fifo_data[3] << 16) | (fifo_data[4] << 8) | fifo_data[5]) & 0x3FFFF
         return red, ir
 
-    def read_sensor(self):
-        red, ir = self.read_fifo()
-        
-        # Áp dụng lọc Wiener
-        red_filtered = wiener(red)
-        ir_filtered = wiener(ir)
-        self.red_buffer.append(red_filtered)
-        self.ir_buffer.append(ir_filtered)
-        return {'red': red_filtered, 'ir': ir_filtered}
+    def available_samples(self):
+        """
+        Đọc con trỏ ghi/tràn/đọc của FIFO (0x04-0x06) trong một giao dịch I2C.
+        Returns:
+            tuple: (số mẫu đang chờ, số mẫu bị mất do tràn kể từ lần đọc trước).
+        """
+        self.i2c.readfrom_mem_into(self.addr, REG_FIFO_WR_PTR, self._ptr_buf)
+        wr_ptr = self._ptr_buf[0] & 0x1F
+        overflow = self._ptr_buf[1] & 0x1F
+        rd_ptr = self._ptr_buf[2] & 0x1F
+        pending = (wr_ptr - rd_ptr) & 0x1F
+        if pending == 0 and overflow:
+            pending = FIFO_DEPTH  # FIFO đầy: con trỏ ghi đã quay về bằng con trỏ đọc
+        return pending, overflow
 
-    def kalman_filter(self, data):
-        n_iter = len(data)
-        sz = (n_iter,)  # size of array
-        xhat = np.zeros(sz)      # a posteri estimate of x
-        P = np.zeros(sz)         # a posteri error estimate
-        xhatminus = np.zeros(sz) # a priori estimate of x
-        Pminus = np.zeros(sz)    # a priori error estimate
-        K = np.zeros(sz)         # gain or blending factor
+    def read_fifo_burst(self, red_out=None, ir_out=None):
+        """
+        Đọc toàn bộ các mẫu đang chờ trong FIFO bằng một giao dịch I2C duy nhất.
+        Dữ liệu được giải mã 18-bit vào bộ đệm cấp phát sẵn, không cấp phát theo từng mẫu.
+        Args:
+            red_out (array, optional): Bộ đệm nhận giá trị RED (>= 32 phần tử). Mặc định là self.fifo_red.
+            ir_out (array, optional): Bộ đệm nhận giá trị IR (>= 32 phần tử). Mặc định là self.fifo_ir.
+        Returns:
+            int: Số mẫu đã đọc (0-32), được ghi vào red_out[0:n] và ir_out[0:n].
+        """
+        if red_out is None:
+            red_out = self.fifo_red
+        if ir_out is None:
+            ir_out = self.fifo_ir
+        profiler.begin(FIFO_READ)
+        n, overflow = self.available_samples()
+        if overflow:
+            self.overflow_count += overflow
+        if n == 0:
+            profiler.end(FIFO_READ)
+            return 0
+        buf = self._fifo_buf
+        self.i2c.readfrom_mem_into(self.addr, REG_FIFO_DATA, self._fifo_mv[:n * BYTES_PER_SAMPLE])
+        j = 0
+        for i in range(n):
+            red_out[i] = ((buf[j] << 16) | (buf[j + 1] << 8) | buf[j + 2]) & 0x3FFFF
+            ir_out[i] = ((buf[j + 3] << 16) | (buf[j + 4] << 8) | buf[j + 5]) & 0x3FFFF
+            j += BYTES_PER_SAMPLE
+        profiler.end(FIFO_READ)
+        return n
 
-        Q = 1e-5 # process variance
-        R = 0.1**2 # estimate of measurement variance, change to see effect
+    def read_batch(self):
+        """
+        Đọc một lô mẫu từ FIFO.
+        Returns:
+            dict: 'red', 'ir' (memoryview dài n trên bộ đệm nội bộ, chỉ hợp lệ đến lần đọc sau),
+                  'count' (số mẫu) và 'overflow' (tổng số mẫu bị mất do tràn).
+        """
+        n = self.read_fifo_burst()
+        return {
+            'red': memoryview(self.fifo_red)[:n],
+            'ir': memoryview(self.fifo_ir)[:n],
+            'count': n,
+            'overflow': self.overflow_count,
+        }
 
-        # intial guesses
-        xhat[0] = data[0]
-        P[0] = 1.0
+    def read_sensor(self):
+        n = self.process_fifo()
+        return {'red': self.last_red, 'ir': self.last_ir, 'count': n, 'overflow': self.overflow_count}
 
-        for k in range(1, n_iter):
-            # time update
-            xhatminus[k] = xhat[k-1]
-            Pminus[k] = P[k-1] + Q
+    def process_fifo(self):
+        """
+        Đọc một lô từ FIFO và đưa qua toàn bộ chuỗi xử lý (không tạo dict kết quả).
+        Returns:
+            int: Số mẫu đã xử lý.
+        """
+        n = self.read_fifo_burst()
+        if n:
+            self.process_samples(self.fifo_red, self.fifo_ir, n)
+        return n
 
-            # measurement update
-            K[k] = Pminus[k] / (Pminus[k] + R)
-            xhat[k] = xhatminus[k] + K[k] * (data[k] - xhatminus[k])
-            P[k] = (1 - K[k]) * Pminus[k]
+    def process_samples(self, red, ir, n):
+        """
+        Đưa một lô mẫu thô (đã đọc từ FIFO ở nơi khác) qua chuỗi xử lý.
+        Args:
+            red (array): Các mẫu RED thô.
+            ir (array): Các mẫu IR thô.
+            n (int): Số mẫu (tối đa FIFO_DEPTH).
+        """
+        if self.logger is not None:
+            # Chỉ chép vào bộ đệm RAM của logger, việc ghi thẻ nhớ do tác vụ ghi log đảm nhận
+            self.logger.log_batch(red, ir, n, self.beat_detector.heart_rate, self.spo2_engine.spo2,
+                                  1000 // self.sample_rate)
+        # Khử nhiễu Wiener cả lô (chỉ ở chuỗi số thực), sau đó đưa vào bộ đệm và bộ lọc Kalman
+        profiler.begin(FILTER)
+        if self.red_denoiser is not None:
+            red = self.red_denoiser.process_block(red, self._red_dn, n)
+            ir = self.ir_denoiser.process_block(ir, self._ir_dn, n)
+        self.red_buffer.extend(red, n)
+        self.ir_buffer.extend(ir, n)
+        self.last_red = red[n - 1]
+        self.last_ir = ir[n - 1]
+        red_kf, ir_kf = self._kalman_block(red, ir, n)
+        profiler.end(FILTER)
+        profiler.begin(SPO2)
+        self.spo2_engine.process_block(red_kf, ir_kf, n)
+        profiler.end(SPO2)
+        profiler.begin(HR)
+        self.beat_detector.process_block(ir, n)
+        profiler.end(HR)
 
-        return xhat
+    def _kalman_block(self, red, ir, n):
+        red_kf = self.red_kalman.update_block(red, self._red_kf, n)
+        ir_kf = self.ir_kalman.update_block(ir, self._ir_kf, n)
+        self.red_filtered.extend(red_kf, n)
+        self.ir_filtered.extend(ir_kf, n)
+        return red_kf, ir_kf
+
+    def kalman_filter(self, data):
+        # Lọc cả khối bằng một bộ lọc mới (giữ tương thích với cách gọi cũ)
+        return KalmanFilter().update_block(data)
 
     def calculate_heart_rate(self):
-        peaks = self.detect_peaks(self.ir_buffer)
+        """
+        Nhịp tim hiện tại, trung bình trên các nhịp gần nhất của bộ phát hiện trực tuyến.
+        Returns:
+            float: Nhịp tim (bpm), 0 nếu chưa có đủ nhịp.
+        """
+        return self.beat_detector.heart_rate
+
+    def calculate_heart_rate_batch(self):
+        # Cách tính cũ: tìm đỉnh trên toàn bộ bộ đệm IR
+        if len(self.ir_buffer) < 3:
+            return 0
+        peaks = self.detect_peaks(self.ir_buffer.view())
         if len(peaks) >= 2:
             peak_intervals = [peaks[i + 1] - peaks[i] for i in range(len(peaks) - 1)]
             avg_peak_interval = sum(peak_intervals) / len(peak_intervals)
-            heart_rate = 60 / (avg_peak_interval * 0.01)  # Convert to beats per minute
+            heart_rate = 60 / (avg_peak_interval / self.sample_rate)  # Convert to beats per minute
             return heart_rate
         return 0
 
     def calculate_spo2(self):
-        red_filtered = self.kalman_filter(self.red_buffer)
-        ir_filtered = self.kalman_filter(self.ir_buffer)
+        """
+        SpO2 hiện tại của bộ tính cửa sổ trượt (xem spo2_engine.window_seconds()).
+        Returns:
+            float: SpO2 (%), 0 nếu chưa đủ dữ liệu.
+        """
+        return self.spo2_engine.spo2
+
+    def calculate_spo2_batch(self):
+        # Cách tính cũ: DC/AC trên toàn bộ bộ đệm đã lọc
+        if len(self.ir_filtered) == 0:
+            return 0
+        red_filtered = self.red_filtered.view()
+        ir_filtered = self.ir_filtered.view()
         red_dc = sum(red_filtered) / len(red_filtered)
         ir_dc = sum(ir_filtered) / len(ir_filtered)
         red_ac = max(red_filtered) - min(red_filtered)
@@ -124,10 +414,34 @@ class MAX30102:
             filtered_data.append(alpha * data[i] + (1 - alpha) * filtered_data[-1])
         return filtered_data
 
-    def predict_heart_rate(self, data):
-        if hasattr(self, 'nn_model'):
-            return self.nn_model.predict([data])[0]
-        return None
+    def predict_heart_rate(self, data=None):
+        """
+        Dự đoán nhịp tim bằng mô hình NN.
+        Với mô hình rút gọn dùng đặc trưng tính trên feature_seconds giây gần nhất của bộ đệm;
+        mô hình cũ (joblib) nhận vector [red, ir] truyền vào qua data.
+        Args:
+            data (list, optional): Vector đầu vào cho mô hình 2 đặc trưng. Mặc định là mẫu cuối.
+        Returns:
+            float: Nhịp tim dự đoán, hoặc None nếu không có mô hình.
+        """
+        if not self._model_loaded:
+            self.load_model()
+        model = self.nn_model
+        if model is None:
+            return None
+        if data is None:
+            data = [self.last_red, self.last_ir]
+        profiler.begin(NN)
+        if isinstance(model, CompactMLP):
+            if model.n_features == N_FEATURES:
+                n = int(self.feature_seconds * self.sample_rate)
+                data = extract_features(self.red_buffer.view(n), self.ir_buffer.view(n),
+                                        self.sample_rate, self._features)
+            result = model.predict(data)
+        else:
+            result = model.predict([data])[0]
+        profiler.end(NN)
+        return result
 
     def save_data(self, filename, data, timestamp):
         """
@@ -148,9 +462,21 @@ class MAX30102:
         Bắt đầu đo.
         """
         self.measurement_start_time = time.ticks_ms()
-        self.red_buffer = []
-        self.ir_buffer = []
+        self.red_buffer.clear()
+        self.ir_buffer.clear()
+        self.red_filtered.clear()
+        self.ir_filtered.clear()
+        self._reset_filters()
+        self.beat_detector.reset()
+        self.spo2_engine.reset()
         print("Bắt đầu đo...")
+
+    def _reset_filters(self):
+        self.red_kalman.reset()
+        self.ir_kalman.reset()
+        if self.red_denoiser is not None:
+            self.red_denoiser.reset()
+            self.ir_denoiser.reset()
     
     def stop_measurement(self):
         """
@@ -172,3 +498,9 @@ class MAX30102:
         """
         self.display_graph = not self.display_graph
         print(f"Chế độ hiển thị: {'Đồ thị' if self.display_graph else 'Số liệu'}")
+
+
+def _led_code(current_ma):
+    # Dòng LED (mA) -> giá trị thanh ghi LEDx_PA (0.2 mA mỗi LSB)
+    code = int(current_ma / LED_CURRENT_STEP + 0.5)
+    return 0 if code < 0 else (255 if code > 255 else code)
@@ -15,6 +15,7 @@ class MicroSD:
         """
         self.spi = SPI(spi_id, baudrate=1000000, polarity=0, phase=0, sck=Pin(sck_pin), mosi=Pin(mosi_pin), miso=Pin(miso_pin))
         self.cs = Pin(cs_pin, Pin.OUT)
+        self.mount_point = "/sd"
         self.mounted = False
 
     def mount(self):
@@ -22,9 +23,9 @@ class MicroSD:
         Mount thẻ nhớ MicroSD.
         """
         try:
-            os.mount(self.spi, "/sd")
+            os.mount(self.spi, self.mount_point)
             self.mounted = True
-            print("MicroSD mounted at /sd")
+            print("MicroSD mounted at", self.mount_point)
         except OSError:
             print("Error mounting MicroSD")
 
@@ -33,7 +34,7 @@ class MicroSD:
         Unmount thẻ nhớ MicroSD.
         """
         try:
-            os.umount("/sd")
+            os.umount(self.mount_point)
             self.mounted = False
             print("MicroSD unmounted")
         except OSError:
@@ -46,3 +47,34 @@ class MicroSD:
             bool: True nếu đã mount, False nếu chưa.
         """
         return self.mounted
+
+    def path(self, filename):
+        """
+        Lấy đường dẫn đầy đủ của một file trên thẻ nhớ.
+        Args:
+            filename (str): Tên file (ví dụ: 'sensor_data.csv').
+        Returns:
+            str: Đường dẫn (ví dụ: '/sd/sensor_data.csv').
+        """
+        return self.mount_point + "/" + filename
+
+    def save_data(self, filename, data):
+        """
+        Ghi thêm một dòng CSV vào file trên thẻ nhớ (dùng cho kết quả lẻ, không dùng cho luồng mẫu 100 Hz;
+        luồng mẫu dùng SDLogger trong sd_logger.py).
+        Args:
+            filename (str): Tên file CSV.
+            data (list): Các giá trị của dòng.
+        Returns:
+            bool: True nếu ghi thành công.
+        """
+        if not self.mounted:
+            print("MicroSD chưa được mount")
+            return False
+        try:
+            with open(self.path(filename), 'a') as f:
+                f.write(",".join(str(v) for v in data) + "\n")
+            return True
+        except OSError:
+            print("Error writing", filename)
+            return False
@@ -0,0 +1,267 @@
+# nn_model.py
+# Mô hình NN rút gọn: trọng số lượng tử hóa int8 (thang đo theo từng hàng), tính bằng phép toán
+# thuần Python trên thiết bị, không cần scikit-learn/joblib. File được tạo bởi tools/export_model.py.
+import math
+import struct
+from array import array
+
+MAGIC = b'NNQ1'
+
+ACT_RELU = 0
+ACT_TANH = 1
+ACT_LOGISTIC = 2
+ACT_IDENTITY = 3
+
+ACTIVATIONS = {'relu': ACT_RELU, 'tanh': ACT_TANH, 'logistic': ACT_LOGISTIC, 'identity': ACT_IDENTITY}
+
+FEATURE_NAMES = ('ir_dc', 'red_dc', 'ir_ac_ratio', 'red_ac_ratio', 'r_ratio', 'crossing_bpm', 'ir_std_ratio')
+N_FEATURES = len(FEATURE_NAMES)
+
+
+def extract_features(red, ir, sample_rate=100, out=None):
+    """
+    Tính vector đặc trưng từ một cửa sổ tín hiệu (ví dụ view của RingBuffer).
+    Args:
+        red (list/array/memoryview): Cửa sổ mẫu RED.
+        ir (list/array/memoryview): Cửa sổ mẫu IR (cùng độ dài).
+        sample_rate (int, optional): Tần số lấy mẫu (Hz). Mặc định là 100.
+        out (array, optional): Bộ đệm nhận N_FEATURES đặc trưng. Mặc định tạo array('f') mới.
+    Returns:
+        array: Các đặc trưng theo thứ tự FEATURE_NAMES.
+    """
+    if out is None:
+        out = array('f', [0.0] * N_FEATURES)
+    n = len(ir)
+    if n < 2:
+        for i in range(N_FEATURES):
+            out[i] = 0.0
+        return out
+    ir_sum = red_sum = 0.0
+    ir_max = ir_min = ir[0]
+    red_max = red_min = red[0]
+    for i in range(n):
+        x = ir[i]
+        r = red[i]
+        ir_sum += x
+        red_sum += r
+        if x > ir_max:
+            ir_max = x
+        elif x < ir_min:
+            ir_min = x
+        if r > red_max:
+            red_max = r
+        elif r < red_min:
+            red_min = r
+    ir_dc = ir_sum / n
+    red_dc = red_sum / n
+    # Lượt thứ hai: độ lệch chuẩn quanh DC và số lần cắt lên qua DC (ước lượng nhịp)
+    crossings = 0
+    prev = ir[0] - ir_dc
+    ir_sq = prev * prev
+    for i in range(1, n):
+        d = ir[i] - ir_dc
+        ir_sq += d * d
+        if prev < 0 <= d:
+            crossings += 1
+        prev = d
+    ir_ac_ratio = (ir_max - ir_min) / ir_dc if ir_dc else 0.0
+    red_ac_ratio = (red_max - red_min) / red_dc if red_dc else 0.0
+    out[0] = ir_dc
+    out[1] = red_dc
+    out[2] = ir_ac_ratio
+    out[3] = red_ac_ratio
+    out[4] = red_ac_ratio / ir_ac_ratio if ir_ac_ratio else 0.0
+    out[5] = crossings * 60 * sample_rate / n
+    out[6] = math.sqrt(ir_sq / n) / ir_dc if ir_dc else 0.0
+    return out
+
+
+def extract_features_batch(red, ir, window, step, sample_rate=100):
+    """
+    Tính đặc trưng cho nhiều cửa sổ trượt cùng lúc bằng numpy (chỉ dùng trên máy tính).
+    Kết quả trùng với extract_features cho từng cửa sổ.
+    Args:
+        red (array-like): Toàn bộ tín hiệu RED.
+        ir (array-like): Toàn bộ tín hiệu IR.
+        window (int): Độ dài cửa sổ (mẫu).
+        step (int): Bước trượt giữa hai cửa sổ (mẫu).
+        sample_rate (int, optional): Tần số lấy mẫu (Hz). Mặc định là 100.
+    Returns:
+        numpy.ndarray: Ma trận (số cửa sổ, N_FEATURES).
+    """
+    import numpy as np
+    from numpy.lib.stride_tricks import sliding_window_view
+    ir_w = sliding_window_view(np.asarray(ir, dtype=np.float64), window)[::step]
+    red_w = sliding_window_view(np.asarray(red, dtype=np.float64), window)[::step]
+    ir_dc = ir_w.mean(axis=1)
+    red_dc = red_w.mean(axis=1)
+    centered = ir_w - ir_dc[:, None]
+    crossings = np.count_nonzero((centered[:, :-1] < 0) & (centered[:, 1:] >= 0), axis=1)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        ir_ac_ratio = np.where(ir_dc != 0, np.ptp(ir_w, axis=1) / ir_dc, 0.0)
+        red_ac_ratio = np.where(red_dc != 0, np.ptp(red_w, axis=1) / red_dc, 0.0)
+        r_ratio = np.where(ir_ac_ratio != 0, red_ac_ratio / ir_ac_ratio, 0.0)
+        std_ratio = np.where(ir_dc != 0, np.sqrt((centered ** 2).mean(axis=1)) / ir_dc, 0.0)
+    return np.column_stack([ir_dc, red_dc, ir_ac_ratio, red_ac_ratio, r_ratio,
+                            crossings * 60.0 * sample_rate / window, std_ratio])
+
+
+def _read_array(f, typecode, n, itemsize):
+    # Đọc thẳng vào array cấp phát sẵn (chạy được cả trên MicroPython lẫn CPython)
+    a = array(typecode, [0] * n)
+    if f.readinto(a) != n * itemsize:
+        raise ValueError("Truncated compact NN model file")
+    return a
+
+
+def _activate(x, act):
+    if act == ACT_RELU:
+        return x if x > 0 else 0.0
+    if act == ACT_TANH:
+        return math.tanh(x)
+    if act == ACT_LOGISTIC:
+        return 1 / (1 + math.exp(-x))
+    return x
+
+
+class CompactMLP:
+    def __init__(self, path):
+        """
+        Nạp mô hình rút gọn từ file.
+        Định dạng (little-endian):
+            'NNQ1', u8 số lớp, u8 hàm kích hoạt ẩn, u16 số đầu vào,
+            f32[n_in] trung bình và f32[n_in] độ lệch chuẩn để chuẩn hóa đầu vào,
+            f32 y_offset, f32 y_scale cho đầu ra,
+            mỗi lớp: u16 n_in, u16 n_out, f32[n_out] thang đo từng hàng,
+                     i8[n_out * n_in] trọng số (theo hàng), f32[n_out] bias.
+        Args:
+            path (str): Đường dẫn file trọng số.
+        Raises:
+            ValueError: Nếu file không đúng định dạng.
+        """
+        with open(path, 'rb') as f:
+            if f.read(4) != MAGIC:
+                raise ValueError("Not a compact NN model file")
+            n_layers, self.activation, n_in = struct.unpack('<BBH', f.read(4))
+            self.n_features = n_in
+            self.in_mean = _read_array(f, 'f', n_in, 4)
+            self.in_scale = _read_array(f, 'f', n_in, 4)
+            self.y_offset, self.y_scale = struct.unpack('<ff', f.read(8))
+            self.layers = []
+            for _ in range(n_layers):
+                li, lo = struct.unpack('<HH', f.read(4))
+                scales = _read_array(f, 'f', lo, 4)
+                weights = _read_array(f, 'b', li * lo, 1)
+                bias = _read_array(f, 'f', lo, 4)
+                self.layers.append((li, lo, scales, weights, bias))
+        width = max(max(layer[1] for layer in self.layers), n_in)
+        # Hai bộ đệm luân phiên cho đầu vào/đầu ra của từng lớp, cấp phát một lần
+        self._buf_a = array('f', [0.0] * width)
+        self._buf_b = array('f', [0.0] * width)
+        self._dense = None
+
+    def size_bytes(self):
+        """
+        Returns:
+            int: Dung lượng trọng số và bias trong bộ nhớ (byte).
+        """
+        total = 8 * self.n_features
+        for li, lo, scales, weights, bias in self.layers:
+            total += len(weights) + 4 * (len(scales) + len(bias))
+        return total
+
+    def predict(self, features):
+        """
+        Dự đoán cho một vector đặc trưng bằng phép toán thuần Python.
+        Args:
+            features (list/array): N đặc trưng (theo thứ tự lúc huấn luyện).
+        Returns:
+            float: Giá trị dự đoán (nhịp tim, bpm).
+        """
+        x = self._buf_a
+        y = self._buf_b
+        for i in range(self.n_features):
+            x[i] = (features[i] - self.in_mean[i]) / self.in_scale[i]
+        last = len(self.layers) - 1
+        for k, (li, lo, scales, weights, bias) in enumerate(self.layers):
+            act = ACT_IDENTITY if k == last else self.activation
+            row = 0
+            for j in range(lo):
+                acc = 0.0
+                for i in range(li):
+                    acc += weights[row + i] * x[i]
+                y[j] = _activate(bias[j] + scales[j] * acc, act)
+                row += li
+            x, y = y, x
+        return x[0] * self.y_scale + self.y_offset
+
+    def predict_batch(self, X):
+        """
+        Dự đoán cho nhiều vector đặc trưng cùng lúc bằng numpy (chỉ dùng trên máy tính).
+        Args:
+            X (array-like): Ma trận (số mẫu, N đặc trưng).
+        Returns:
+            numpy.ndarray: Các giá trị dự đoán.
+        """
+        import numpy as np
+        if self._dense is None:
+            # Giải lượng tử hóa một lần, các lần gọi sau dùng lại
+            self._dense = [
+                (np.asarray(w, dtype=np.float64).reshape(lo, li) * np.asarray(s, dtype=np.float64)[:, None],
+                 np.asarray(b, dtype=np.float64))
+                for li, lo, s, w, b in self.layers
+            ]
+        x = (np.asarray(X, dtype=np.float64) - np.asarray(self.in_mean)) / np.asarray(self.in_scale)
+        last = len(self._dense) - 1
+        for k, (w, b) in enumerate(self._dense):
+            x = x @ w.T + b
+            act = ACT_IDENTITY if k == last else self.activation
+            if act == ACT_RELU:
+                np.maximum(x, 0, out=x)
+            elif act == ACT_TANH:
+                np.tanh(x, out=x)
+            elif act == ACT_LOGISTIC:
+                x = 1 / (1 + np.exp(-x))
+        return x[:, 0] * self.y_scale + self.y_offset
+
+
+def save_compact_model(path, layers, activation='relu', in_mean=None, in_scale=None,
+                       y_offset=0.0, y_scale=1.0):
+    """
+    Lượng tử hóa và ghi mô hình ra file định dạng CompactMLP (dùng trên máy tính).
+    Args:
+        path (str): File đầu ra.
+        layers (list): Danh sách (W, b) cho từng lớp, W có dạng [n_out][n_in].
+        activation (str, optional): Hàm kích hoạt lớp ẩn. Mặc định là 'relu'.
+        in_mean (list, optional): Trung bình chuẩn hóa đầu vào. Mặc định là 0.
+        in_scale (list, optional): Độ lệch chuẩn chuẩn hóa đầu vào. Mặc định là 1.
+        y_offset (float, optional): Độ dời đầu ra. Mặc định là 0.
+        y_scale (float, optional): Hệ số đầu ra. Mặc định là 1.
+    Returns:
+        int: Kích thước file (byte).
+    """
+    n_in = len(layers[0][0][0])
+    if in_mean is None:
+        in_mean = [0.0] * n_in
+    if in_scale is None:
+        in_scale = [1.0] * n_in
+    chunks = [MAGIC, struct.pack('<BBH', len(layers), ACTIVATIONS[activation], n_in),
+              array('f', in_mean).tobytes(), array('f', [s if s else 1.0 for s in in_scale]).tobytes(),
+              struct.pack('<ff', y_offset, y_scale)]
+    for W, b in layers:
+        lo = len(W)
+        li = len(W[0])
+        scales = []
+        q = []
+        for row in W:
+            # Thang đo đối xứng theo từng hàng: giá trị lớn nhất ánh xạ tới 127
+            peak = max(abs(v) for v in row)
+            s = peak / 127 if peak else 1.0
+            scales.append(s)
+            q.extend(max(-127, min(127, int(round(v / s)))) for v in row)
+        chunks += [struct.pack('<HH', li, lo), array('f', scales).tobytes(),
+                   array('b', q).tobytes(), array('f', b).tobytes()]
+    data = b''.join(chunks)
+    with open(path, 'wb') as f:
+        f.write(data)
+    return len(data)
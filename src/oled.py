@@ -9,20 +9,25 @@ from microsd import MicroSD'''
 
 # oled.py (phần import)
 
-from machine import Pin, SoftI2C
+from machine import Pin, I2C, SoftI2C
 from ssd1306 import SSD1306_I2C
 from writer import Writer, CWriter
 from font8 import font8
-import time
-from collections import deque
+from array import array
 
 # Các module khác cần thiết
+from frame import FrameComposer
+from waveform import ScrollingPlot
+from text_cache import TextCache
+from profiler import profiler, STAGE_NAMES, SHOW
 import max30102
 from microsd import MicroSD
 from battery_and_charge import BatteryCharge
 from button_manager import ButtonManager
 from buzzer import Buzzer
 from history_manager import HistoryManager
+from app import App
+from sd_logger import SDLogger
 
 '''class OLEDDisplay(MAX30102):
     def __init__(self, i2c_max30102, i2c_oled, adc_pin, charge_status_pin, button1_pin, button2_pin, buzzer_pin, oled_width=128, oled_height=64):
@@ -211,15 +216,44 @@ def main():
 if __name__ == "__main__":
     main()'''
 
+# Các chế độ hiển thị khi đo, theo thứ tự chuyển bằng nút 1
+DISPLAY_MODES = ("graph", "numerical", "waveform")
+
+# Nhãn 3 ký tự của các giai đoạn trên trang thống kê (theo thứ tự profiler.STAGE_NAMES)
+STAT_LABELS = ("fif", "flt", "hr ", "spo", "nn ", "rnd", "shw", "sd ")
+
+
 class OLEDDisplay:
-    def __init__(self, i2c_oled, oled_width=128, oled_height=64, microsd=None):
+    def __init__(self, i2c_oled, oled_width=128, oled_height=64, microsd=None, text_cache=True):
         self.oled = SSD1306_I2C(oled_width, oled_height, i2c_oled, addr=0x3c)
         self.oled.init_display()
         self.writer = Writer(self.oled, font8)
         self.cwriter = CWriter(self.oled, font8)
         self.microsd = microsd
-
-        self.data_buffer = deque(maxlen=oled_width)
+        # Nhãn và chữ số dựng sẵn; text_cache=False giữ đường vẽ cũ qua Writer (để so sánh)
+        self.use_text_cache = text_cache
+        self.text = TextCache(font8)
+        self.hr_field = self.text.number(4)
+        self.spo2_field = self.text.number(4)
+        self.nn_hr_field = self.text.number(4)
+        self.battery_field = self.text.number(3)
+        self.record_index_field = self.text.number(3)
+        self.record_count_field = self.text.number(3)
+        self.record_hr_field = self.text.number(4)
+        self.record_spo2_field = self.text.number(4)
+        # Gom mọi lệnh vẽ của một khung hình, chỉ gửi các page/cột thay đổi
+        self.frame = FrameComposer(self.oled)
+        self.in_frame = False
+
+        # Đồ thị cuộn HR/SpO2 (trục tung cố định như trước) và dạng sóng IR thô (tự co giãn),
+        # chừa dòng cuối cho thông tin pin
+        self.hr_plot = ScrollingPlot(oled_width, oled_height, lo=0, hi=200)
+        self.spo2_plot = ScrollingPlot(oled_width, oled_height, lo=0, hi=100, dashed=True)
+        self.wave_plot = ScrollingPlot(oled_width, oled_height - 12)
+        self.waveform_source = None   # RingBuffer mẫu IR của cảm biến, do App gán
+        self.waveform_decimate = 2    # Vẽ 1 trên 2 mẫu: 128 cột ~ 2.56 s ở 100 Hz
+        self._wave_total = 0
+        self._wave_points = array('i', [0] * oled_width)
         self.current_mode = "measurement"
         self.display_mode = "graph"
         self.measurement_mode = "both"
@@ -231,33 +265,214 @@ class OLEDDisplay:
         self.spo2 = 0
         self.nn_hr = 0
 
+    def begin_frame(self):
+        """
+        Bắt đầu một khung hình: xóa framebuffer, các lệnh vẽ sau đó không gửi ra màn hình
+        cho đến end_frame().
+        """
+        self.oled.fill(0)
+        self.in_frame = True
+
+    def end_frame(self):
+        """
+        Kết thúc khung hình và gửi các vùng thay đổi ra màn hình.
+        Returns:
+            int: Số byte đã gửi qua I2C.
+        """
+        self.in_frame = False
+        profiler.begin(SHOW)
+        sent = self.frame.commit()
+        profiler.end(SHOW)
+        return sent
+
+    def _clear(self):
+        # Ngoài khung hình: mỗi lệnh hiển thị tự xóa màn hình như trước
+        if not self.in_frame:
+            self.oled.fill(0)
+
+    def _present(self):
+        if not self.in_frame:
+            profiler.begin(SHOW)
+            self.frame.commit()
+            profiler.end(SHOW)
+
     def clear(self):
         self.oled.fill(0)
-        self.oled.show()
+        self._present()
 
     def display_text(self, text, x, y):
-        self.writer.set_textpos(self.oled, x, y)
+        self.writer.set_textpos(self.oled, y, x)  # Writer nhận (hàng, cột)
         self.writer.printstring(text)
-        self.oled.show()
+        self._present()
+
+    def _label(self, text, x, y):
+        return self.text.label(text).draw(self.oled, x, y)
+
+    def display_battery(self, percentage, x=0, y=54):
+        """
+        Hiển thị phần trăm pin (mặc định ở dòng cuối cùng).
+        """
+        if not self.use_text_cache:
+            self.display_text(f"Battery: {percentage}%", x, y)
+            return
+        self.battery_field.set(percentage)
+        x = self._label("Battery: ", x, y)
+        x = self.battery_field.draw(self.oled, x, y)
+        self._label("%", x, y)
+        self._present()
+
+    def next_display_mode(self):
+        """
+        Chuyển sang chế độ hiển thị tiếp theo trong DISPLAY_MODES.
+        """
+        i = DISPLAY_MODES.index(self.display_mode) if self.display_mode in DISPLAY_MODES else -1
+        self.display_mode = DISPLAY_MODES[(i + 1) % len(DISPLAY_MODES)]
 
     def display_data(self, hr, spo2, nn_hr):
-        self.oled.fill(0)
+        self._clear()
         if self.display_mode == "graph":
             self.display_graph_data(hr, spo2)
+        elif self.display_mode == "waveform":
+            self.display_waveform_data()
         else:
             self.display_numerical_data(hr, spo2, nn_hr)
-        self.oled.show()
+        self._present()
+
+    def display_numerical_data(self, hr, spo2, nn_hr):
+        """
+        Hiển thị dữ liệu số.
+        """
+        if not self.use_text_cache:
+            self.writer.set_textpos(self.oled, 0, 0)
+            self.writer.printstring(f"HR: {hr:.0f}")
+            self.writer.set_textpos(self.oled, 12, 0)
+            self.writer.printstring(f"SpO2: {spo2:.0f}%")
+            if nn_hr is not None:
+                self.writer.set_textpos(self.oled, 24, 0)
+                self.writer.printstring(f"NN HR: {nn_hr:.0f}")
+            return
+        oled = self.oled
+        self.hr_field.set(hr)
+        self.spo2_field.set(spo2)
+        self.hr_field.draw(oled, self._label("HR: ", 0, 0), 0)
+        x = self.spo2_field.draw(oled, self._label("SpO2: ", 0, 12), 12)
+        self._label("%", x, 12)
+        if nn_hr is not None:
+            self.nn_hr_field.set(nn_hr)
+            self.nn_hr_field.draw(oled, self._label("NN HR: ", 0, 24), 24)
+
+    def display_graph_data(self, hr, spo2):
+        """
+        Hiển thị dữ liệu đồ thị (nhịp tim nét liền, SpO2 nét đứt).
+        Mỗi lần gọi chỉ cuộn đồ thị một cột và vẽ đoạn mới nhất.
+        """
+        self.hr_plot.push(hr)
+        self.spo2_plot.push(spo2)
+        self.hr_plot.draw(self.oled)
+        self.spo2_plot.draw(self.oled)
+
+    def display_waveform_data(self, source=None):
+        """
+        Hiển thị dạng sóng IR thô theo tần số lấy mẫu của cảm biến: vẽ các mẫu mới kể từ lần gọi trước.
+        Args:
+            source (RingBuffer, optional): Bộ đệm mẫu IR. Mặc định là waveform_source.
+        """
+        if source is None:
+            source = self.waveform_source
+        if source is None:
+            return
+        plot = self.wave_plot
+        new = source.total - self._wave_total
+        if new < 0:
+            # Bộ đệm đã được xóa (bắt đầu phép đo mới)
+            plot.clear()
+            new = source.total
+        step = self.waveform_decimate
+        new = min(new, len(source), plot.width * step)
+        if new > 0:
+            window = source.view(new)
+            first = source.total - new
+            # Chọn các mẫu có chỉ số tuyệt đối chia hết cho step để nét vẽ liên tục giữa các khung
+            i = (-first) % step
+            points = self._wave_points
+            m = 0
+            while i < new:
+                points[m] = int(window[i])
+                m += 1
+                i += step
+            plot.push_many(points, m)
+        self._wave_total = source.total
+        plot.draw(self.oled)
 
     def display_history_data(self, history_manager):
-        self.oled.fill(0)
-        if history_manager.get_history_length() == 0:
-            self.display_text("No history yet", 0, 0)
-        else:
+        self._clear()
+        in_frame = self.in_frame
+        self.in_frame = True  # Gom các dòng chữ, chỉ gửi một lần ở cuối
+        length = history_manager.get_history_length()
+        if length == 0:
+            if self.use_text_cache:
+                self._label("No history yet", 0, 0)
+            else:
+                self.display_text("No history yet", 0, 0)
+        elif not self.use_text_cache:
             record = history_manager.get_record(self.history_page_index)
-            self.display_text(f"Record {self.history_page_index + 1}/{history_manager.get_history_length()}", 0, 0)
+            self.display_text(f"Record {self.history_page_index + 1}/{length}", 0, 0)
             self.display_text(f"Time: {record['timestamp']}", 0, 10)
             self.display_text(f"HR: {record['hr']}, SpO2: {record['spo2']}", 0, 20)
-        self.oled.show()
+        else:
+            record = history_manager.get_record(self.history_page_index)
+            oled = self.oled
+            self.record_index_field.set(self.history_page_index + 1)
+            self.record_count_field.set(length)
+            self.record_hr_field.set(record['hr'])
+            self.record_spo2_field.set(record['spo2'])
+            x = self.record_index_field.draw(oled, self._label("Record ", 0, 0), 0)
+            self.record_count_field.draw(oled, self._label("/", x, 0), 0)
+            timestamp = record['timestamp']
+            self.text.draw_text(oled, timestamp if isinstance(timestamp, str) else str(timestamp),
+                                self._label("Time: ", 0, 10), 10)
+            x = self.record_hr_field.draw(oled, self._label("HR: ", 0, 20), 20)
+            self.record_spo2_field.draw(oled, self._label(", SpO2: ", x, 20), 20)
+        self.in_frame = in_frame
+        self._present()
+    def display_stats(self, prof=None):
+        """
+        Trang thống kê (chẩn đoán): mỗi giai đoạn được đo hiển thị thời gian trung bình và lớn nhất (us),
+        hai giai đoạn mỗi dòng; dòng cuối là bộ nhớ trống hiện tại/thấp nhất.
+        Args:
+            prof (Profiler, optional): Nguồn số liệu. Mặc định là profiler toàn cục.
+        """
+        if prof is None:
+            prof = profiler
+        self._clear()
+        in_frame = self.in_frame
+        self.in_frame = True
+        if not prof.enabled:
+            self._label("Profiler off", 0, 0)
+        else:
+            # Chuỗi được định dạng mỗi khung vì đây là trang chẩn đoán, không cần bộ đệm chữ số
+            for i in range(len(STAGE_NAMES)):
+                n = prof.count[i]
+                avg = prof.total_us[i] // n if n else 0
+                self.text.draw_text(self.oled, "{}{:>3s} {:>3s}".format(
+                    STAT_LABELS[i], _short_us(avg), _short_us(prof.max_us[i])), (i & 1) * 64, (i >> 1) * 9)
+            mem_free = prof.mem_free()
+            if mem_free is not None:
+                self.text.draw_text(self.oled, "mem {} min {}".format(mem_free, prof.mem_free_min), 0, 38)
+        self.in_frame = in_frame
+        self._present()
+
+
+def _short_us(us):
+    # Giá trị us gọn trong 3 ký tự: 950, 12k, .3M, 2M
+    if us < 1000:
+        return str(us)
+    if us < 100000:
+        return str(us // 1000) + "k"
+    if us < 1000000:
+        return ".{}M".format(us // 100000)
+    return str(us // 1000000) + "M"
+
 
 def main():
     i2c_max30102 = I2C(0, scl=Pin(5), sda=Pin(4), freq=400000)  # I2C bus cho MAX30102
@@ -268,37 +483,17 @@ def main():
     oled_display = OLEDDisplay(i2c_oled, microsd=microsd)
     battery_charge = BatteryCharge(adc_pin=0)
     button_manager = ButtonManager()
-    history_manager = HistoryManager()
+    history_manager = HistoryManager(max_entries=2000, path='/history.bin')  # Giữ lịch sử qua các lần khởi động
     buzzer = Buzzer()
 
-    while True:
-        button_states = button_manager.check_button_press()
-
-        if button_states[0]:  # Nút 1 được nhấn
-            oled_display.display_mode = "graph" if oled_display.display_mode == "numerical" else "numerical"
-
-        elif button_states[1]:  # Nút 2 được nhấn
-            if oled_display.current_mode == "measurement":
-                oled_display.current_mode = "history"
-                oled_display.history_page_index = 0  # Đặt lại chỉ số trang khi chuyển sang chế độ lịch sử
-            elif oled_display.current_mode == "history":
-                oled_display.history_page_index = max(0, oled_display.history_page_index - 1)  # Di chuyển lên
-
-        elif button_states[2]:  # Nút 3 được nhấn
-            if oled_display.current_mode == "history":
-                oled_display.history_page_index = min(oled_display.history_page_index + 1, history_manager.get_history_length() - 1)  # Di chuyển xuống
-
-        if oled_display.current_mode == "measurement":
-            data = max30102_sensor.read_sensor()
-            oled_display.display_data(data['hr'], data['spo2'], data['nn_hr'])
-        elif oled_display.current_mode == "history":
-            oled_display.display_history_data(history_manager)
-
-        # Hiển thị thông tin pin
-        battery_percentage = battery_charge.read_percentage()
-        oled_display.display_text(f"Battery: {battery_percentage}%", 0, 54)  # Hiển thị ở dòng cuối cùng
-
-        time.sleep(0.1)
+    # Các tác vụ (thu mẫu, xử lý, hiển thị, nút nhấn, pin, ghi thẻ nhớ) chạy hợp tác bằng asyncio
+    # Ghi mẫu thô ra thẻ nhớ theo khối 512 byte (đọc lại bằng tools/sd_log_to_csv.py)
+    sample_logger = SDLogger(microsd)
+    if not sample_logger.open():
+        sample_logger = None
+    app = App(max30102_sensor, oled_display, battery_charge, button_manager, history_manager,
+              buzzer, microsd=microsd, sample_logger=sample_logger)
+    app.run()
 
 if __name__ == "__main__":
     main()
@@ -0,0 +1,84 @@
+# power_profiles.py
+# Các cấu hình năng lượng/hiệu năng: tần số lấy mẫu, độ rộng xung, lấy trung bình và dòng LED của MAX30102
+# cùng chu kỳ làm mới màn hình/đọc pin, áp dụng đồng thời bằng App.set_profile().
+# work_model() ước lượng khối lượng CPU/bus mỗi giây của một cấu hình để so sánh (dùng trong benchmark).
+
+# sensor: tham số của MAX30102.configure(), None nghĩa là tắt cảm biến (SHDN)
+# periods: chu kỳ (ms) của các tác vụ trong App
+PROFILES = {
+    'measuring': {
+        'sensor': {'sample_rate': 100, 'averaging': 1, 'pulse_width': 411, 'led_current': 7.2},
+        'periods': {'display': 100, 'battery': 5000, 'acquisition': 50},
+    },
+    # Xem lịch sử / không đo: tắt LED và ADC của cảm biến, màn hình làm mới chậm hơn
+    'idle': {
+        'sensor': None,
+        'periods': {'display': 250, 'battery': 10000, 'acquisition': 1000},
+    },
+    # Pin yếu: vẫn đo được nhưng với 50 Hz, xung ngắn hơn và dòng LED thấp hơn
+    'low_battery': {
+        'sensor': {'sample_rate': 50, 'averaging': 1, 'pulse_width': 215, 'led_current': 4.8},
+        'periods': {'display': 250, 'battery': 30000, 'acquisition': 200},
+    },
+}
+
+I2C_BITS_PER_BYTE = 9       # 8 bit dữ liệu + ACK
+I2C_READ_OVERHEAD = 3       # Byte địa chỉ ghi, địa chỉ thanh ghi, địa chỉ đọc của một lần đọc thanh ghi
+OLED_FRAME_BYTES = 1024 + 8 * 4   # Cả 8 trang 128 byte kèm lệnh đặt vùng ghi (trường hợp xấu nhất)
+
+
+def effective_rate(sensor):
+    """
+    Tần số mẫu thực tế trong FIFO (tần số ADC chia số mẫu lấy trung bình).
+    """
+    if sensor is None:
+        return 0
+    return sensor['sample_rate'] // sensor.get('averaging', 1)
+
+
+def work_model(profile, us_per_sample, frame_us=0, i2c_freq=400000, oled_i2c_freq=400000,
+               battery_oversample=16):
+    """
+    Ước lượng khối lượng công việc mỗi giây của một cấu hình.
+    Args:
+        profile (dict): Một phần tử của PROFILES.
+        us_per_sample (float): Thời gian xử lý một mẫu (us) đo được ở cấu hình này.
+        frame_us (float, optional): Thời gian dựng một khung hình (us). Mặc định là 0 (không tính).
+        i2c_freq (int, optional): Tần số bus I2C của cảm biến (Hz). Mặc định là 400000.
+        oled_i2c_freq (int, optional): Tần số bus I2C của màn hình (Hz). Mặc định là 400000.
+        battery_oversample (int, optional): Số lần đọc ADC mỗi lần lấy mẫu pin. Mặc định là 16.
+    Returns:
+        dict: Tần số mẫu, chu kỳ hoạt động và dòng trung bình của LED, số giao dịch/byte I2C mỗi giây,
+              thời gian bận của bus và CPU (us/s).
+    """
+    sensor = profile['sensor']
+    periods = profile['periods']
+    rate = effective_rate(sensor)
+    polls = 1000 / periods['acquisition'] if sensor is not None else 0
+    # Mỗi lần đọc: con trỏ FIFO (3 byte) và một lần đọc burst các mẫu (6 byte/mẫu)
+    sensor_bytes = rate * 6 + polls * (3 + 2 * I2C_READ_OVERHEAD)
+    fps = 1000 / periods['display']
+    oled_bytes = fps * OLED_FRAME_BYTES
+    led_duty = 0.0
+    led_ma = 0.0
+    if sensor is not None:
+        # Ở chế độ SpO2, mỗi mẫu ADC bật lần lượt LED đỏ và LED hồng ngoại trong pulse_width us
+        led_duty = sensor['sample_rate'] * sensor['pulse_width'] * 1e-6
+        led_ma = 2 * sensor['led_current'] * led_duty
+    sensor_bus_us = sensor_bytes * I2C_BITS_PER_BYTE * 1e6 / i2c_freq
+    oled_bus_us = oled_bytes * I2C_BITS_PER_BYTE * 1e6 / oled_i2c_freq
+    pipeline_us = rate * us_per_sample
+    # I2C của MicroPython chờ hết giao dịch nên thời gian bus cũng là thời gian CPU
+    return {
+        'sample_rate_hz': rate,
+        'led_duty': round(led_duty, 4),
+        'led_avg_ma': round(led_ma, 3),
+        'i2c_transactions_per_s': round(2 * polls, 1),
+        'sensor_i2c_bytes_per_s': round(sensor_bytes),
+        'sensor_bus_us_per_s': round(sensor_bus_us),
+        'display_fps': round(fps, 1),
+        'oled_bus_us_per_s_max': round(oled_bus_us),
+        'adc_reads_per_s': round(battery_oversample * 1000 / periods['battery'], 2),
+        'pipeline_us_per_s': round(pipeline_us),
+        'cpu_us_per_s': round(pipeline_us + fps * frame_us + sensor_bus_us + oled_bus_us),
+    }
@@ -0,0 +1,213 @@
+# profiler.py
+# Đo thời gian các đoạn xử lý chính bằng time.ticks_us: mỗi giai đoạn có histogram log2, trung bình, lớn nhất
+# và lượng bộ nhớ cấp phát (gc.mem_alloc, nếu có). Khi tắt, begin()/end() chỉ kiểm tra một cờ rồi trả về.
+# Dùng chung một đối tượng toàn cục: from profiler import profiler
+import gc
+import time
+
+# Các giai đoạn được đo (chỉ số trong các mảng thống kê)
+FIFO_READ = 0
+FILTER = 1
+HR = 2
+SPO2 = 3
+NN = 4
+RENDER = 5
+SHOW = 6
+SD_FLUSH = 7
+STAGE_NAMES = ('fifo', 'filter', 'hr', 'spo2', 'nn', 'render', 'show', 'sd')
+
+N_BUCKETS = 14          # Ô 0: < 16 us, ô b: < 16 * 2^b us, ô cuối: từ 65.5 ms trở lên
+BUCKET_SHIFT = 4
+MAX_COUNT = 1 << 14     # Khi đạt số lần đo này, thống kê của giai đoạn được chia đôi (ưu tiên số liệu gần đây)
+
+
+class Profiler:
+    def __init__(self, enabled=False):
+        """
+        Args:
+            enabled (bool, optional): Bật đo ngay từ đầu. Mặc định là False.
+        """
+        n = len(STAGE_NAMES)
+        self.enabled = enabled
+        self._mem_alloc = getattr(gc, 'mem_alloc', None)   # Chỉ có trên MicroPython
+        self._mem_free = getattr(gc, 'mem_free', None)
+        self._t0 = [0] * n
+        self._m0 = [0] * n
+        self.count = [0] * n
+        self.total_us = [0] * n
+        self.max_us = [0] * n
+        self.last_us = [0] * n
+        self.alloc = [0] * n
+        self.hist = [0] * (n * N_BUCKETS)
+        self.mem_free_min = None
+
+    def enable(self, enabled=True):
+        self.enabled = enabled
+
+    def reset(self):
+        """
+        Xóa toàn bộ thống kê.
+        """
+        n = len(STAGE_NAMES)
+        for i in range(n):
+            self.count[i] = self.total_us[i] = self.max_us[i] = self.last_us[i] = self.alloc[i] = 0
+        for i in range(n * N_BUCKETS):
+            self.hist[i] = 0
+        self.mem_free_min = None
+
+    def begin(self, stage):
+        if not self.enabled:
+            return
+        if self._mem_alloc is not None:
+            self._m0[stage] = self._mem_alloc()
+        self._t0[stage] = time.ticks_us()
+
+    def end(self, stage):
+        if not self.enabled:
+            return
+        dt = time.ticks_diff(time.ticks_us(), self._t0[stage])
+        if self._mem_alloc is not None:
+            # Âm khi gc chạy giữa chừng: khi đó không biết lượng cấp phát, bỏ qua
+            d = self._mem_alloc() - self._m0[stage]
+            if d > 0:
+                self.alloc[stage] += d
+            free = self._mem_free()
+            if self.mem_free_min is None or free < self.mem_free_min:
+                self.mem_free_min = free
+        if self.count[stage] >= MAX_COUNT:
+            self._halve(stage)
+        self.count[stage] += 1
+        self.total_us[stage] += dt
+        self.last_us[stage] = dt
+        if dt > self.max_us[stage]:
+            self.max_us[stage] = dt
+        b = 0
+        v = dt >> BUCKET_SHIFT
+        while v and b < N_BUCKETS - 1:
+            v >>= 1
+            b += 1
+        self.hist[stage * N_BUCKETS + b] += 1
+
+    def _halve(self, stage):
+        self.count[stage] >>= 1
+        self.total_us[stage] >>= 1
+        self.alloc[stage] >>= 1
+        base = stage * N_BUCKETS
+        for b in range(base, base + N_BUCKETS):
+            self.hist[b] >>= 1
+
+    def mem_free(self):
+        # None trên máy tính (không có gc.mem_free)
+        return self._mem_free() if self._mem_free is not None else None
+
+    def percentile(self, stage, p):
+        """
+        Cận trên (us) của ô histogram chứa phân vị p (0-100) của giai đoạn.
+        """
+        base = stage * N_BUCKETS
+        total = 0
+        for b in range(N_BUCKETS):
+            total += self.hist[base + b]
+        if total == 0:
+            return 0
+        target = total * p / 100
+        seen = 0
+        for b in range(N_BUCKETS):
+            seen += self.hist[base + b]
+            if seen >= target:
+                return self.max_us[stage] if b == N_BUCKETS - 1 else min(1 << (BUCKET_SHIFT + b), self.max_us[stage])
+        return self.max_us[stage]
+
+    def stats(self):
+        """
+        Returns:
+            dict: Theo tên giai đoạn: số lần, trung bình/lớn nhất/gần nhất/p95 (us), byte cấp phát trung bình
+                  (None nếu không đo được); thêm 'mem_free' và 'mem_free_min'.
+        """
+        result = {}
+        for i, name in enumerate(STAGE_NAMES):
+            n = self.count[i]
+            if n == 0:
+                continue
+            result[name] = {
+                'count': n,
+                'avg_us': self.total_us[i] // n,
+                'max_us': self.max_us[i],
+                'last_us': self.last_us[i],
+                'p95_us': self.percentile(i, 95),
+                'alloc_avg_b': self.alloc[i] // n if self._mem_alloc is not None else None,
+            }
+        result['mem_free'] = self.mem_free()
+        result['mem_free_min'] = self.mem_free_min
+        return result
+
+    def dump(self, out=print):
+        """
+        In thống kê ra cổng nối tiếp: mỗi giai đoạn một dòng kèm histogram (số lần theo từng ô).
+        Args:
+            out (function, optional): Hàm in từng dòng. Mặc định là print.
+        """
+        out("stage     n    avg    p95    max  alloc  histogram(<16us,x2..)")
+        for i, name in enumerate(STAGE_NAMES):
+            n = self.count[i]
+            if n == 0:
+                continue
+            alloc = self.alloc[i] // n if self._mem_alloc is not None else '-'
+            base = i * N_BUCKETS
+            out("{:6s}{:6d}{:7d}{:7d}{:7d}{:>7}  {}".format(
+                name, n, self.total_us[i] // n, self.percentile(i, 95), self.max_us[i], alloc,
+                ' '.join(str(c) for c in self.hist[base:base + N_BUCKETS])))
+        if self._mem_free is not None:
+            out("mem_free {} min {}".format(self._mem_free(), self.mem_free_min))
+        if not self.enabled:
+            out("profiler disabled (profiler.enable())")
+
+    def command(self, ch):
+        """
+        Lệnh một ký tự từ cổng nối tiếp: 'p' in thống kê, 'r' xóa, 'e' bật, 'd' tắt.
+        Returns:
+            bool: True nếu là lệnh hợp lệ.
+        """
+        if ch == 'p':
+            self.dump()
+        elif ch == 'r':
+            self.reset()
+        elif ch == 'e':
+            self.enable(True)
+        elif ch == 'd':
+            self.enable(False)
+        else:
+            return False
+        return True
+
+
+class SerialConsole:
+    def __init__(self, profiler, stream=None):
+        """
+        Đọc lệnh một ký tự từ REPL/UART mà không chặn vòng lặp (select.poll với timeout 0).
+        Args:
+            profiler (Profiler): Đối tượng nhận lệnh.
+            stream (optional): Luồng đọc. Mặc định là sys.stdin.
+        """
+        import sys
+        try:
+            import select
+        except ImportError:
+            import uselect as select
+        self.profiler = profiler
+        self.stream = stream if stream is not None else sys.stdin
+        self.poller = select.poll()
+        self.poller.register(self.stream, select.POLLIN)
+
+    def check(self):
+        """
+        Xử lý các ký tự đang chờ (gọi định kỳ).
+        """
+        while self.poller.poll(0):
+            ch = self.stream.read(1)
+            if not ch:
+                return
+            self.profiler.command(ch)
+
+
+profiler = Profiler()
@@ -0,0 +1,136 @@
+# queues.py
+# Hàng đợi có giới hạn cho các tác vụ asyncio (tương thích uasyncio), cấp phát một lần khi khởi tạo.
+from array import array
+
+try:
+    import uasyncio as asyncio
+except ImportError:
+    import asyncio
+
+
+class BoundedQueue:
+    def __init__(self, capacity):
+        """
+        Hàng đợi vòng chứa đối tượng bất kỳ. Khi đầy, phần tử cũ nhất bị bỏ và được đếm vào dropped.
+        Args:
+            capacity (int): Số phần tử tối đa.
+        """
+        self.capacity = capacity
+        self._items = [None] * capacity
+        self._head = 0
+        self._size = 0
+        self.dropped = 0
+        self._event = asyncio.Event()
+
+    def __len__(self):
+        return self._size
+
+    def put_nowait(self, item):
+        """
+        Thêm một phần tử (không chờ).
+        Returns:
+            bool: False nếu hàng đợi đầy và phần tử cũ nhất đã bị bỏ.
+        """
+        ok = True
+        if self._size == self.capacity:
+            self._head = (self._head + 1) % self.capacity
+            self._size -= 1
+            self.dropped += 1
+            ok = False
+        self._items[(self._head + self._size) % self.capacity] = item
+        self._size += 1
+        self._event.set()
+        return ok
+
+    def get_nowait(self):
+        """
+        Lấy phần tử cũ nhất (không chờ).
+        Returns:
+            object: Phần tử, hoặc None nếu hàng đợi rỗng.
+        """
+        if self._size == 0:
+            return None
+        item = self._items[self._head]
+        self._items[self._head] = None
+        self._head = (self._head + 1) % self.capacity
+        self._size -= 1
+        return item
+
+    async def get(self):
+        """
+        Chờ đến khi có phần tử rồi lấy ra.
+        """
+        while self._size == 0:
+            self._event.clear()
+            await self._event.wait()
+        return self.get_nowait()
+
+
+class SampleQueue:
+    def __init__(self, capacity):
+        """
+        Hàng đợi mẫu RED/IR lưu trong array('i'), chuyển mẫu thô giữa tác vụ thu và tác vụ xử lý.
+        Khi đầy, các mẫu cũ nhất bị bỏ và được đếm vào dropped.
+        Args:
+            capacity (int): Số mẫu tối đa.
+        """
+        self.capacity = capacity
+        self._red = array('i', [0] * capacity)
+        self._ir = array('i', [0] * capacity)
+        self._head = 0
+        self._size = 0
+        self.dropped = 0
+        self._event = asyncio.Event()
+
+    def __len__(self):
+        return self._size
+
+    def put_batch(self, red, ir, n):
+        """
+        Thêm n mẫu.
+        """
+        cap = self.capacity
+        for i in range(n):
+            if self._size == cap:
+                self._head = (self._head + 1) % cap
+                self._size -= 1
+                self.dropped += 1
+            pos = (self._head + self._size) % cap
+            self._red[pos] = red[i]
+            self._ir[pos] = ir[i]
+            self._size += 1
+        if n:
+            self._event.set()
+
+    def get_batch(self, red_out, ir_out, max_n):
+        """
+        Lấy tối đa max_n mẫu vào bộ đệm của người gọi.
+        Returns:
+            int: Số mẫu đã lấy.
+        """
+        n = min(self._size, max_n)
+        cap = self.capacity
+        head = self._head
+        for i in range(n):
+            red_out[i] = self._red[head]
+            ir_out[i] = self._ir[head]
+            head += 1
+            if head == cap:
+                head = 0
+        self._head = head
+        self._size -= n
+        return n
+
+    async def wait(self):
+        """
+        Chờ đến khi hàng đợi có mẫu hoặc có lời gọi wake().
+        """
+        if self._size == 0:
+            self._event.clear()
+            await self._event.wait()
+
+    def wake(self):
+        """
+        Đánh thức tác vụ đang chờ (ví dụ khi dừng ứng dụng).
+        """
+        self._event.set()
@@ -0,0 +1,121 @@
+# ring_buffer.py
+from array import array
+
+
+class RingBuffer:
+    def __init__(self, capacity, typecode='f'):
+        """
+        Bộ đệm vòng dung lượng cố định, lưu trong array (không có đối tượng float riêng lẻ).
+        Mỗi mẫu được ghi hai lần (vị trí i và i + capacity) để mọi cửa sổ các mẫu mới nhất
+        luôn là một vùng liên tục, đọc được bằng memoryview mà không cần sao chép.
+        Bộ nhớ sử dụng là hằng số: 2 * capacity phần tử.
+        Args:
+            capacity (int): Số mẫu tối đa được giữ lại.
+            typecode (str, optional): Kiểu phần tử của array ('f', 'i', 'h', ...). Mặc định là 'f'.
+        """
+        self.capacity = capacity
+        self.typecode = typecode
+        self._data = array(typecode, [0] * (2 * capacity))
+        self._mv = memoryview(self._data)
+        self.clear()
+
+    def clear(self):
+        """
+        Xóa toàn bộ dữ liệu (không giải phóng hay cấp phát lại bộ nhớ).
+        """
+        self._head = 0    # Vị trí ghi tiếp theo, trong khoảng [0, capacity)
+        self._count = 0
+        self.total = 0    # Tổng số mẫu đã ghi kể từ lần xóa gần nhất
+
+    def resize(self, capacity):
+        """
+        Đổi dung lượng (ví dụ khi tần số mẫu thay đổi) và xóa dữ liệu. Chỉ cấp phát lại khi dung lượng khác;
+        đối tượng giữ nguyên nên các nơi đang tham chiếu tới bộ đệm không cần cập nhật.
+        Args:
+            capacity (int): Số mẫu tối đa mới.
+        """
+        if capacity != self.capacity:
+            self.capacity = capacity
+            self._mv = None     # Bỏ view cũ trước khi cấp phát mảng mới
+            self._data = array(self.typecode, [0] * (2 * capacity))
+            self._mv = memoryview(self._data)
+        self.clear()
+
+    def append(self, value):
+        """
+        Thêm một mẫu, ghi đè mẫu cũ nhất khi đầy. Độ phức tạp O(1).
+        Args:
+            value (float/int): Giá trị mẫu.
+        """
+        head = self._head
+        self._data[head] = value
+        self._data[head + self.capacity] = value
+        head += 1
+        if head == self.capacity:
+            head = 0
+        self._head = head
+        if self._count < self.capacity:
+            self._count += 1
+        self.total += 1
+
+    def extend(self, values, n=None):
+        """
+        Thêm nhiều mẫu (ví dụ một lô FIFO).
+        Args:
+            values (list/array): Các giá trị mẫu.
+            n (int, optional): Số mẫu cần thêm. Mặc định là len(values).
+        """
+        if n is None:
+            n = len(values)
+        append = self.append
+        for i in range(n):
+            append(values[i])
+
+    def __len__(self):
+        return self._count
+
+    def __getitem__(self, index):
+        """
+        Lấy mẫu theo chỉ số logic (0 là mẫu cũ nhất, -1 là mẫu mới nhất).
+        """
+        count = self._count
+        if index < 0:
+            index += count
+        if not 0 <= index < count:
+            raise IndexError("RingBuffer index out of range")
+        return self._data[self._head - count + index + self.capacity]
+
+    def view(self, n=None):
+        """
+        Lấy n mẫu mới nhất dưới dạng memoryview (không sao chép), theo thứ tự cũ -> mới.
+        View chỉ phản ánh đúng dữ liệu cho đến khi có mẫu mới được ghi đè lên.
+        Trên máy tính có thể chuyển sang numpy không sao chép bằng np.frombuffer(view, dtype).
+        Args:
+            n (int, optional): Số mẫu. Mặc định là toàn bộ các mẫu hiện có.
+        Returns:
+            memoryview: Cửa sổ các mẫu mới nhất.
+        """
+        if n is None or n > self._count:
+            n = self._count
+        start = self._head - n
+        if start < 0:
+            start += self.capacity
+        return self._mv[start:start + n]
+
+    def last_seconds(self, seconds, sample_rate):
+        """
+        Lấy cửa sổ các mẫu trong `seconds` giây gần nhất.
+        Args:
+            seconds (float): Độ dài cửa sổ (giây).
+            sample_rate (int): Tần số lấy mẫu (Hz).
+        Returns:
+            memoryview: Cửa sổ các mẫu mới nhất.
+        """
+        return self.view(int(seconds * sample_rate))
+
+    def is_full(self):
+        """
+        Returns:
+            bool: True nếu bộ đệm đã đầy.
+        """
+        return self._count == self.capacity
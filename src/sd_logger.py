@@ -0,0 +1,314 @@
+# sd_logger.py
+# Ghi mẫu ra thẻ nhớ dạng nhị phân: bản ghi cố định 16 byte được gom trong RAM thành các khối
+# 512 byte (đúng một sector) có CRC32, chỉ ghi ra thẻ theo nguyên khối, xoay vòng file theo dung lượng.
+# Khối cuối bị ghi dở do mất điện được bỏ qua khi đọc lại.
+import os
+import struct
+import time
+
+try:
+    from binascii import crc32
+except ImportError:
+    def crc32(data, crc=0):
+        # Dự phòng cho bản firmware không có binascii.crc32 (chậm hơn nhưng cùng kết quả)
+        crc ^= 0xFFFFFFFF
+        for b in data:
+            crc ^= b
+            for _ in range(8):
+                crc = (crc >> 1) ^ (0xEDB88320 & -(crc & 1))
+        return crc ^ 0xFFFFFFFF
+
+BLOCK_SIZE = 512
+MAGIC = b'PPGL'
+HEADER_FORMAT = '<4sIHH'   # magic, số thứ tự khối, số bản ghi, dự phòng
+HEADER_SIZE = 12
+RECORD_FORMAT = '<IiiHH'   # ticks_ms, red, ir, HR x10, SpO2 x10
+RECORD_SIZE = 16
+CRC_OFFSET = BLOCK_SIZE - 4
+RECORDS_PER_BLOCK = (CRC_OFFSET - HEADER_SIZE) // RECORD_SIZE   # 31
+
+
+def _scaled(value):
+    # HR/SpO2 lưu dạng u16 với độ phân giải 0.1
+    v = int(value * 10 + 0.5)
+    return 0 if v < 0 else (65535 if v > 65535 else v)
+
+
+def check_block(block):
+    """
+    Kiểm tra một khối 512 byte.
+    Args:
+        block (bytes/memoryview): Dữ liệu khối.
+    Returns:
+        tuple: (số thứ tự, số bản ghi) nếu khối hợp lệ, None nếu sai magic/CRC hoặc thiếu byte.
+    """
+    if len(block) != BLOCK_SIZE:
+        return None
+    magic, seq, count, _ = struct.unpack_from(HEADER_FORMAT, block, 0)
+    if magic != MAGIC or count > RECORDS_PER_BLOCK:
+        return None
+    if struct.unpack_from('<I', block, CRC_OFFSET)[0] != crc32(memoryview(block)[:CRC_OFFSET]) & 0xFFFFFFFF:
+        return None
+    return seq, count
+
+
+def scan_file(path):
+    """
+    Quét một file log, trả về các khối hợp lệ theo thứ tự trong file.
+    Args:
+        path (str): Đường dẫn file.
+    Returns:
+        tuple: (danh sách (offset, seq, count), thống kê dict gồm blocks, bad_blocks, torn_bytes).
+    """
+    blocks = []
+    bad = 0
+    torn = 0
+    buf = bytearray(BLOCK_SIZE)
+    offset = 0
+    with open(path, 'rb') as f:
+        while True:
+            n = f.readinto(buf)
+            if not n:
+                break
+            if n < BLOCK_SIZE:
+                torn = n   # Khối cuối ghi dở
+                break
+            info = check_block(buf)
+            if info is None:
+                bad += 1
+            else:
+                blocks.append((offset, info[0], info[1]))
+            offset += BLOCK_SIZE
+    return blocks, {'blocks': len(blocks), 'bad_blocks': bad, 'torn_bytes': torn}
+
+
+def read_records(path):
+    """
+    Đọc lần lượt các bản ghi trong các khối hợp lệ của một file log.
+    Args:
+        path (str): Đường dẫn file.
+    Yields:
+        tuple: (seq, ticks_ms, red, ir, hr, spo2).
+    """
+    buf = bytearray(BLOCK_SIZE)
+    with open(path, 'rb') as f:
+        while f.readinto(buf) == BLOCK_SIZE:
+            info = check_block(buf)
+            if info is None:
+                continue
+            seq, count = info
+            for i in range(count):
+                t, red, ir, hr, spo2 = struct.unpack_from(RECORD_FORMAT, buf, HEADER_SIZE + i * RECORD_SIZE)
+                yield seq, t, red, ir, hr / 10, spo2 / 10
+
+
+class SDLogger:
+    def __init__(self, microsd, directory='log', prefix='ppg', buffer_blocks=8, max_file_bytes=4 * 1024 * 1024):
+        """
+        Khởi tạo bộ ghi log nhị phân trên thẻ nhớ.
+        Args:
+            microsd (MicroSD): Thẻ nhớ (đã mount).
+            directory (str, optional): Thư mục log trên thẻ nhớ. Mặc định là 'log'.
+            prefix (str, optional): Tiền tố tên file (ppg0000.bin, ppg0001.bin...). Mặc định là 'ppg'.
+            buffer_blocks (int, optional): Số khối 512 byte giữ trong RAM. Mặc định là 8 (4 KB).
+            max_file_bytes (int, optional): Dung lượng tối đa mỗi file trước khi xoay vòng. Mặc định là 4 MB.
+        """
+        self.microsd = microsd
+        self.directory = microsd.path(directory)
+        self.prefix = prefix
+        self.buffer_blocks = buffer_blocks
+        self.max_file_bytes = max_file_bytes - max_file_bytes % BLOCK_SIZE
+        self._buf = bytearray(buffer_blocks * BLOCK_SIZE)
+        self._mv = memoryview(self._buf)
+        self._start = 0      # Khối cũ nhất chưa ghi ra thẻ
+        self._sealed = 0     # Số khối đã đầy/đã đóng đang chờ ghi
+        self._fill = 0       # Số bản ghi trong khối đang ghi
+        self.seq = 0
+        self.file_index = 0
+        self.file_bytes = 0
+        self._file = None
+        self.records = 0
+        self.dropped = 0     # Bản ghi bị bỏ vì bộ đệm RAM đầy (flush() không được gọi kịp)
+        self.blocks_written = 0
+        self.write_errors = 0
+
+    def _path(self, index):
+        return "{}/{}{:04d}.bin".format(self.directory, self.prefix, index)
+
+    def open(self):
+        """
+        Mở file log: tiếp tục file mới nhất nếu nó rỗng hoặc kết thúc bằng một khối hợp lệ, ngược lại
+        (khối cuối ghi dở hoặc hỏng) chuyển sang file mới để các khối sau vẫn thẳng hàng sector.
+        Số thứ tự khối tiếp nối khối lớn nhất của file mới nhất còn khối hợp lệ (các file rỗng do khởi động
+        lại trước lần flush đầu tiên không làm số thứ tự quay về 0).
+        Returns:
+            bool: True nếu mở được.
+        """
+        if not self.microsd.is_mounted():
+            print("MicroSD chưa được mount, không ghi log")
+            return False
+        try:
+            os.mkdir(self.directory)
+        except OSError:
+            pass  # Thư mục đã tồn tại
+        indices = []
+        for name in os.listdir(self.directory):
+            if name.startswith(self.prefix) and name.endswith('.bin'):
+                try:
+                    indices.append(int(name[len(self.prefix):-4]))
+                except ValueError:
+                    pass
+        indices.sort()
+        self.file_index = 0
+        self.seq = 0
+        if indices:
+            last = indices[-1]
+            size = os.stat(self._path(last))[6]
+            blocks, info = scan_file(self._path(last))
+            intact = size == 0 or (info['torn_bytes'] == 0 and blocks and blocks[-1][0] == size - BLOCK_SIZE)
+            self.file_index = last if intact else last + 1
+            for index in reversed(indices):
+                if index != last:
+                    blocks = scan_file(self._path(index))[0]
+                if blocks:
+                    self.seq = (max(b[1] for b in blocks) + 1) & 0xFFFFFFFF
+                    break
+        return self._open_file()
+
+    def _open_file(self):
+        try:
+            path = self._path(self.file_index)
+            self._file = open(path, 'ab')
+            try:
+                self.file_bytes = os.stat(path)[6]
+            except OSError:
+                self.file_bytes = 0
+            return True
+        except OSError:
+            print("Error opening", self._path(self.file_index))
+            self._file = None
+            return False
+
+    def _rotate(self):
+        try:
+            self._file.close()
+        except OSError:
+            pass  # File hỏng vẫn được bỏ, các khối tiếp theo sang file mới
+        self.file_index += 1
+        return self._open_file()
+
+    def _seal(self):
+        # Đóng khối đang ghi: điền header, xóa phần thừa và tính CRC
+        block = (self._start + self._sealed) % self.buffer_blocks
+        base = block * BLOCK_SIZE
+        mv = self._mv
+        end = base + HEADER_SIZE + self._fill * RECORD_SIZE
+        for i in range(end, base + CRC_OFFSET):
+            mv[i] = 0
+        struct.pack_into(HEADER_FORMAT, mv, base, MAGIC, self.seq, self._fill, 0)
+        struct.pack_into('<I', mv, base + CRC_OFFSET, crc32(mv[base:base + CRC_OFFSET]) & 0xFFFFFFFF)
+        self.seq = (self.seq + 1) & 0xFFFFFFFF
+        self._sealed += 1
+        self._fill = 0
+
+    def log(self, t_ms, red, ir, hr=0, spo2=0):
+        """
+        Thêm một bản ghi vào bộ đệm RAM (không ghi thẻ nhớ).
+        Returns:
+            bool: False nếu bộ đệm đầy và bản ghi bị bỏ.
+        """
+        if self._sealed == self.buffer_blocks:
+            self.dropped += 1
+            return False
+        block = (self._start + self._sealed) % self.buffer_blocks
+        struct.pack_into(RECORD_FORMAT, self._mv, block * BLOCK_SIZE + HEADER_SIZE + self._fill * RECORD_SIZE,
+                         t_ms & 0xFFFFFFFF, red, ir, _scaled(hr), _scaled(spo2))
+        self._fill += 1
+        self.records += 1
+        if self._fill == RECORDS_PER_BLOCK:
+            self._seal()
+        return True
+
+    def log_batch(self, red, ir, n, hr=0, spo2=0, sample_period_ms=10, t_ms=None):
+        """
+        Thêm một lô mẫu, thời gian của từng mẫu suy ra ngược từ thời điểm của mẫu cuối.
+        Args:
+            red (array): Các mẫu RED.
+            ir (array): Các mẫu IR.
+            n (int): Số mẫu.
+            hr (float, optional): Nhịp tim hiện tại. Mặc định là 0.
+            spo2 (float, optional): SpO2 hiện tại. Mặc định là 0.
+            sample_period_ms (int, optional): Chu kỳ lấy mẫu (ms). Mặc định là 10.
+            t_ms (int, optional): Thời điểm của mẫu cuối. Mặc định là time.ticks_ms().
+        """
+        if t_ms is None:
+            t_ms = time.ticks_ms()
+        t = t_ms - (n - 1) * sample_period_ms
+        for i in range(n):
+            self.log(t, red[i], ir[i], hr, spo2)
+            t += sample_period_ms
+
+    def flush(self, force=False):
+        """
+        Ghi các khối đã đầy ra thẻ nhớ (các khối liền nhau được ghi trong một lần write).
+        Args:
+            force (bool, optional): Đóng cả khối đang ghi dở (ví dụ khi dừng đo). Mặc định là False.
+        Returns:
+            int: Số khối đã ghi.
+        """
+        if force and self._fill:
+            self._seal()
+        if self._file is None or self._sealed == 0:
+            return 0
+        written = 0
+        while self._sealed:
+            # Số khối liên tục (không vòng qua cuối bộ đệm) và còn chỗ trong file hiện tại
+            n = min(self._sealed, self.buffer_blocks - self._start)
+            room = (self.max_file_bytes - self.file_bytes) // BLOCK_SIZE
+            if room <= 0:
+                if not self._rotate():
+                    break
+                continue
+            n = min(n, room)
+            base = self._start * BLOCK_SIZE
+            try:
+                self._file.write(self._mv[base:base + n * BLOCK_SIZE])
+            except OSError:
+                # Có thể đã ghi được một phần: ghi lại vào file này sẽ lệch sector và hỏng cả phần sau,
+                # nên các khối còn chờ được ghi sang file mới ở lần flush sau
+                self.write_errors += 1
+                print("Error writing", self._path(self.file_index))
+                self._rotate()
+                break
+            self.file_bytes += n * BLOCK_SIZE
+            self._start = (self._start + n) % self.buffer_blocks
+            self._sealed -= n
+            written += n
+        if written and self._file is not None:
+            self._file.flush()
+            self.blocks_written += written
+        return written
+
+    def close(self):
+        """
+        Ghi nốt dữ liệu còn lại và đóng file.
+        """
+        self.flush(force=True)
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+    def stats(self):
+        """
+        Returns:
+            dict: Số bản ghi, số khối đã ghi, số bản ghi bị bỏ, file hiện tại.
+        """
+        return {
+            'records': self.records,
+            'blocks_written': self.blocks_written,
+            'pending_blocks': self._sealed,
+            'dropped': self.dropped,
+            'write_errors': self.write_errors,
+            'file': self._path(self.file_index),
+            'file_bytes': self.file_bytes,
+        }
@@ -0,0 +1,256 @@
+# sensor_array.py
+# Nhiều MAX30102 trên một bus I2C qua bộ chọn kênh TCA9548A (mọi MAX30102 có cùng địa chỉ 0x57).
+# SensorArray đọc FIFO của từng cảm biến theo vòng tròn, mỗi lần một giao dịch burst, và đưa mỗi lô vào
+# chuỗi xử lý riêng của cảm biến đó. capacity() ước lượng số kênh một bus chịu được ở một tần số mẫu.
+import time
+from max30102 import MAX30102, FIFO_DEPTH, BYTES_PER_SAMPLE
+from power_profiles import I2C_BITS_PER_BYTE, I2C_READ_OVERHEAD
+
+TCA9548A_ADDR = 0x70
+MUX_CHANNELS = 8
+MUX_SELECT_BYTES = 2      # Byte địa chỉ + byte điều khiển của một lần chọn kênh
+PTR_READ_BYTES = 3        # Con trỏ ghi/tràn/đọc của FIFO
+
+
+class TCA9548A:
+    def __init__(self, i2c, addr=TCA9548A_ADDR):
+        """
+        Bộ chọn kênh I2C 8 cổng. Kênh đang chọn được ghi nhớ để không ghi lại thanh ghi điều khiển
+        khi hai giao dịch liên tiếp cùng một kênh.
+        Args:
+            i2c (I2C): Bus phía trên của bộ chọn kênh.
+            addr (int, optional): Địa chỉ I2C (0x70-0x77 theo chân A0-A2). Mặc định là 0x70.
+        """
+        self.i2c = i2c
+        self.addr = addr
+        self.channel = None
+        self.switches = 0
+        self._ctrl = bytearray(1)
+
+    def select(self, channel, force=False):
+        """
+        Chọn một kênh (None: ngắt tất cả các kênh).
+        Args:
+            channel (int): Kênh 0-7 hoặc None.
+            force (bool, optional): Ghi lại kể cả khi kênh đã được chọn (sau khi thiết bị khác dùng
+                bộ chọn kênh, hoặc sau khi bộ chọn kênh bị reset). Mặc định là False.
+        """
+        if channel == self.channel and not force:
+            return
+        if channel is not None and not 0 <= channel < MUX_CHANNELS:
+            raise ValueError("TCA9548A channel must be 0-7")
+        self._ctrl[0] = 0 if channel is None else 1 << channel
+        self.i2c.writeto(self.addr, self._ctrl)
+        self.channel = channel
+        self.switches += 1
+
+    def channel_bus(self, channel):
+        """
+        Returns:
+            MuxChannel: Đối tượng dùng như machine.I2C cho các thiết bị sau kênh này.
+        """
+        return MuxChannel(self, channel)
+
+
+class MuxChannel:
+    def __init__(self, mux, channel):
+        """
+        Giao diện giống machine.I2C cho một kênh của bộ chọn kênh: chọn kênh trước mỗi giao dịch.
+        Đếm số giao dịch và số byte để báo cáo tải của bus.
+        """
+        self.mux = mux
+        self.channel = channel
+        self.transactions = 0
+        self.bytes = 0
+
+    def writeto_mem(self, addr, memaddr, buf, addrsize=8):
+        self.mux.select(self.channel)
+        self.transactions += 1
+        self.bytes += len(buf)
+        return self.mux.i2c.writeto_mem(addr, memaddr, buf)
+
+    def readfrom_mem(self, addr, memaddr, nbytes, addrsize=8):
+        self.mux.select(self.channel)
+        self.transactions += 1
+        self.bytes += nbytes
+        return self.mux.i2c.readfrom_mem(addr, memaddr, nbytes)
+
+    def readfrom_mem_into(self, addr, memaddr, buf, addrsize=8):
+        self.mux.select(self.channel)
+        self.transactions += 1
+        self.bytes += len(buf)
+        return self.mux.i2c.readfrom_mem_into(addr, memaddr, buf)
+
+    def writeto(self, addr, buf, stop=True):
+        self.mux.select(self.channel)
+        self.transactions += 1
+        self.bytes += len(buf)
+        return self.mux.i2c.writeto(addr, buf, stop)
+
+    def readfrom_into(self, addr, buf, stop=True):
+        self.mux.select(self.channel)
+        self.transactions += 1
+        self.bytes += len(buf)
+        return self.mux.i2c.readfrom_into(addr, buf, stop)
+
+
+def capacity(sample_rate, poll_ms=50, i2c_freq=400000, us_per_sample=0, bus_budget=0.7, cpu_budget=0.7,
+             channels=MUX_CHANNELS):
+    """
+    Ước lượng số kênh duy trì được trên một bus ở một tần số mẫu.
+    Mỗi kênh, mỗi chu kỳ đọc: một lần chọn kênh, một lần đọc con trỏ FIFO và một lần đọc burst.
+    Args:
+        sample_rate (int): Tần số mẫu thực tế trong FIFO của mỗi cảm biến (Hz).
+        poll_ms (int, optional): Chu kỳ đọc một vòng qua tất cả các kênh (ms). Mặc định là 50.
+        i2c_freq (int, optional): Tần số bus (Hz). Mặc định là 400000.
+        us_per_sample (float, optional): Thời gian xử lý một mẫu (us); 0 thì không tính giới hạn CPU.
+        bus_budget (float, optional): Tỉ lệ thời gian bus được dùng (phần còn lại cho màn hình,
+            lúc chờ...). Mặc định là 0.7.
+        cpu_budget (float, optional): Tỉ lệ thời gian CPU dành cho xử lý mẫu. Mặc định là 0.7.
+        channels (int, optional): Số kênh có trên phần cứng. Mặc định là 8.
+    Returns:
+        dict: Thời gian bus mỗi kênh (us/s), hạn chót đọc trước khi FIFO tràn (ms), số kênh tối đa
+              theo bus, theo CPU và số kênh duy trì được.
+    """
+    polls = 1000 / poll_ms
+    per_read = MUX_SELECT_BYTES + PTR_READ_BYTES + 2 * I2C_READ_OVERHEAD
+    channel_bytes = sample_rate * BYTES_PER_SAMPLE + polls * per_read
+    channel_bus_us = channel_bytes * I2C_BITS_PER_BYTE * 1e6 / i2c_freq
+    fifo_deadline_ms = FIFO_DEPTH * 1000 / sample_rate if sample_rate else None
+    by_bus = int(bus_budget * 1e6 / channel_bus_us)
+    # I2C của MicroPython chờ hết giao dịch: thời gian bus cũng chiếm CPU
+    channel_cpu_us = channel_bus_us + sample_rate * us_per_sample
+    by_cpu = int(cpu_budget * 1e6 / channel_cpu_us)
+    sustained = min(by_bus, by_cpu, channels)
+    if fifo_deadline_ms is not None and poll_ms >= fifo_deadline_ms:
+        sustained = 0   # FIFO tràn giữa hai lần đọc, bất kể số kênh
+    return {
+        'sample_rate_hz': sample_rate,
+        'poll_ms': poll_ms,
+        'channel_bus_us_per_s': round(channel_bus_us),
+        'channel_cpu_us_per_s': round(channel_cpu_us),
+        'fifo_deadline_ms': round(fifo_deadline_ms, 1) if fifo_deadline_ms else None,
+        'max_channels_bus': by_bus,
+        'max_channels_cpu': by_cpu,
+        'sustained_channels': sustained,
+    }
+
+
+class SensorArray:
+    def __init__(self, i2c, channels=(0, 1), mux_addr=TCA9548A_ADDR, on_batch=None, **sensor_kwargs):
+        """
+        Khởi tạo một MAX30102 cho mỗi kênh của bộ chọn kênh; mỗi cảm biến có bộ đệm, bộ lọc,
+        bộ phát hiện nhịp và bộ tính SpO2 riêng.
+        Args:
+            i2c (I2C): Bus nối với TCA9548A.
+            channels (tuple, optional): Các kênh có cảm biến. Mặc định là (0, 1).
+            mux_addr (int, optional): Địa chỉ của TCA9548A. Mặc định là 0x70.
+            on_batch (function, optional): Hàm gọi lại on_batch(index, sensor, n) sau mỗi lô được xử lý.
+            **sensor_kwargs: Tham số truyền cho từng MAX30102 (ví dụ dsp='fixed').
+        """
+        self.mux = TCA9548A(i2c, mux_addr)
+        self.mux.select(None, force=True)   # Trạng thái đã biết sau khi khởi động
+        self.channels = tuple(channels)
+        self.buses = [self.mux.channel_bus(ch) for ch in self.channels]
+        self.sensors = [MAX30102(bus, **sensor_kwargs) for bus in self.buses]
+        self.on_batch = on_batch
+        n = len(self.sensors)
+        self.samples = [0] * n
+        self.batches = [0] * n
+        self.rounds = 0
+        self._next = 0
+        self._more = bytearray(n)   # Cảm biến vừa đọc đủ FIFO_DEPTH mẫu: có thể còn mẫu trong FIFO
+        self._start_ms = time.ticks_ms()
+
+    def __len__(self):
+        return len(self.sensors)
+
+    def configure(self, **config):
+        """
+        Áp dụng cùng một cấu hình MAX30102.configure() cho mọi cảm biến.
+        """
+        for sensor in self.sensors:
+            sensor.configure(**config)
+
+    def start_measurement(self):
+        for sensor in self.sensors:
+            sensor.start_measurement()
+        for i in range(len(self.sensors)):
+            self.samples[i] = self.batches[i] = 0
+        self.rounds = 0
+        self._start_ms = time.ticks_ms()
+
+    def poll(self, max_rounds=2):
+        """
+        Đọc FIFO của các cảm biến theo vòng tròn, mỗi cảm biến một lần đọc burst mỗi vòng, rồi xử lý
+        lô vừa đọc. Cảm biến bắt đầu vòng được xoay sau mỗi lần gọi để không kênh nào luôn bị đọc sau cùng.
+        Các vòng sau chỉ đọc lại những cảm biến vừa trả về đủ FIFO_DEPTH mẫu (FIFO có thể chưa cạn),
+        tối đa max_rounds vòng.
+        Returns:
+            int: Tổng số mẫu đã xử lý.
+        """
+        sensors = self.sensors
+        count = len(sensors)
+        more = self._more
+        total = 0
+        for r in range(max_rounds):
+            got = 0
+            again = False
+            for k in range(count):
+                i = (self._next + k) % count
+                sensor = sensors[i]
+                if sensor.shutdown or (r and not more[i]):
+                    continue
+                n = sensor.read_fifo_burst()
+                more[i] = n == FIFO_DEPTH
+                if n == 0:
+                    continue
+                again = again or more[i]
+                sensor.process_samples(sensor.fifo_red, sensor.fifo_ir, n)
+                self.samples[i] += n
+                self.batches[i] += 1
+                got += n
+                if self.on_batch:
+                    self.on_batch(i, sensor, n)
+            self.rounds += 1
+            total += got
+            if not again:
+                break
+        self._next = (self._next + 1) % count if count else 0
+        return total
+
+    def results(self):
+        """
+        Returns:
+            list: Mỗi cảm biến một bộ (kênh, nhịp tim, SpO2).
+        """
+        return [(ch, sensor.calculate_heart_rate(), sensor.calculate_spo2())
+                for ch, sensor in zip(self.channels, self.sensors)]
+
+    def report(self, us_per_sample=0, poll_ms=50, i2c_freq=400000):
+        """
+        Báo cáo thông lượng đo được của từng kênh kèm ước lượng capacity() ở tần số mẫu hiện tại.
+        Returns:
+            dict: 'channels' (mẫu, lô, mẫu/giây, mẫu bị mất do tràn, giao dịch và byte I2C),
+                  'mux_switches', 'rounds' và 'capacity'.
+        """
+        elapsed = time.ticks_diff(time.ticks_ms(), self._start_ms) / 1000
+        channels = []
+        for i, sensor in enumerate(self.sensors):
+            bus = self.buses[i]
+            channels.append({
+                'channel': self.channels[i],
+                'samples': self.samples[i],
+                'batches': self.batches[i],
+                'samples_per_s': round(self.samples[i] / elapsed, 1) if elapsed > 0 else None,
+                'overflow': sensor.overflow_count,
+                'i2c_transactions': bus.transactions,
+                'i2c_bytes': bus.bytes,
+            })
+        rate = self.sensors[0].sample_rate if self.sensors else 0
+        return {
+            'channels': channels,
+            'mux_switches': self.mux.switches,
+            'rounds': self.rounds,
+            'capacity': capacity(rate, poll_ms, i2c_freq, us_per_sample),
+        }
@@ -0,0 +1,210 @@
+# spo2_engine.py
+from array import array
+
+
+class _MonotonicQueue:
+    def __init__(self, capacity, keep_max=True):
+        """
+        Hàng đợi đơn điệu cấp phát sẵn để lấy max/min của cửa sổ trượt với chi phí O(1) trung bình.
+        Args:
+            capacity (int): Số phần tử tối đa (bằng độ dài cửa sổ).
+            keep_max (bool, optional): True để lấy max, False để lấy min. Mặc định là True.
+        """
+        self.capacity = capacity
+        self.keep_max = keep_max
+        self._idx = array('i', [0] * capacity)
+        self._val = array('f', [0.0] * capacity)
+        self.clear()
+
+    def clear(self):
+        self._front = 0
+        self._size = 0
+
+    def push(self, index, value):
+        cap = self.capacity
+        idx = self._idx
+        val = self._val
+        # Bỏ các phần tử ở cuối không thể còn là max/min khi phần tử mới vào cửa sổ
+        while self._size:
+            back = (self._front + self._size - 1) % cap
+            if (val[back] <= value) if self.keep_max else (val[back] >= value):
+                self._size -= 1
+            else:
+                break
+        pos = (self._front + self._size) % cap
+        idx[pos] = index
+        val[pos] = value
+        self._size += 1
+
+    def expire(self, oldest_index):
+        # Bỏ các phần tử ở đầu đã trượt ra khỏi cửa sổ
+        while self._size and self._idx[self._front] < oldest_index:
+            self._front = (self._front + 1) % self.capacity
+            self._size -= 1
+
+    def value(self):
+        return self._val[self._front]
+
+
+class _ChannelStats:
+    def __init__(self, window, detrend):
+        """
+        Thống kê cửa sổ trượt của một kênh: DC (trung bình) và AC (đỉnh - đáy của tín hiệu đã bỏ đường nền).
+        Đường nền là trung bình trượt của `detrend` mẫu, lấy đối xứng quanh mẫu (trễ detrend // 2 mẫu),
+        để trôi nền do hô hấp và chuyển động chậm không bị tính vào AC.
+        """
+        self.window = window
+        self.detrend = max(1, min(detrend, window - 1))
+        self._half = self.detrend // 2
+        self._ring = array('f', [0.0] * window)
+        self._max = _MonotonicQueue(window, True)
+        self._min = _MonotonicQueue(window, False)
+        self.clear()
+
+    def clear(self):
+        self._sum = 0.0
+        self._base = 0.0
+        self._since_resum = 0
+        self._max.clear()
+        self._min.clear()
+
+    def push(self, index, value, count):
+        w = self.window
+        d = self.detrend
+        ring = self._ring
+        pos = index % w
+        if count > w:
+            self._sum -= ring[pos]
+        if count > d:
+            self._base -= ring[(index - d) % w]
+        ring[pos] = value
+        self._sum += value
+        self._base += value
+        self._since_resum += 1
+        if self._since_resum >= w:
+            # Tính lại tổng định kỳ để sai số làm tròn của số thực không tích lũy
+            self._sum = sum(ring[:min(count, w)])
+            self._base = 0.0
+            for k in range(min(count, d)):
+                self._base += ring[(index - k) % w]
+            self._since_resum = 0
+        if count < d:
+            return
+        # Mẫu ở giữa đoạn trung bình trừ đi đường nền; bỏ phần tử đã ra khỏi cửa sổ trước khi thêm
+        # (hàng đợi chỉ có window ô, với chuỗi đơn điệu nó đầy và phần tử mới sẽ ghi đè lên đầu hàng đợi)
+        center = index - self._half
+        x = ring[center % w] - self._base / d
+        oldest = center - w + 1
+        self._max.expire(oldest)
+        self._max.push(center, x)
+        self._min.expire(oldest)
+        self._min.push(center, x)
+
+    def dc(self, count):
+        return self._sum / min(count, self.window)
+
+    def ac(self):
+        if not self._max._size:
+            return 0.0
+        return self._max.value() - self._min.value()
+
+
+class SpO2Engine:
+    def __init__(self, sample_rate=100, window_seconds=4, update_every=None, min_seconds=1,
+                 coeff_a=110, coeff_b=25, detrend_seconds=0.3):
+        """
+        Tính SpO2 liên tục trên cửa sổ trượt với chi phí không đổi cho mỗi mẫu.
+        DC là trung bình chạy, AC là đỉnh - đáy (lấy từ hàng đợi đơn điệu max/min) của tín hiệu đã trừ
+        đường nền ngắn, nên trôi nền do hô hấp không làm R lệch về 1.
+        SpO2 = coeff_a - coeff_b * R, với R = (AC_red / DC_red) / (AC_ir / DC_ir).
+        Args:
+            sample_rate (int, optional): Tần số lấy mẫu (Hz). Mặc định là 100.
+            window_seconds (float, optional): Độ dài cửa sổ trượt (giây). Mặc định là 4.
+            update_every (int, optional): Số mẫu giữa hai lần cập nhật SpO2. Mặc định là sample_rate (1 lần/giây).
+            min_seconds (float, optional): Lượng dữ liệu tối thiểu trước khi báo SpO2 (giây). Mặc định là 1.
+            coeff_a (float, optional): Hệ số a của công thức hiệu chuẩn. Mặc định là 110.
+            coeff_b (float, optional): Hệ số b của công thức hiệu chuẩn. Mặc định là 25.
+            detrend_seconds (float, optional): Độ dài trung bình trượt làm đường nền (giây), ngắn hơn một nhịp
+                để giữ sườn lên của xung mạch. Mặc định là 0.3.
+        """
+        self.sample_rate = sample_rate
+        self.window = int(window_seconds * sample_rate)
+        self.update_every = update_every or sample_rate
+        self.min_samples = int(min_seconds * sample_rate)
+        self.coeff_a = coeff_a
+        self.coeff_b = coeff_b
+        detrend = int(detrend_seconds * sample_rate)
+        self.red = _ChannelStats(self.window, detrend)
+        self.ir = _ChannelStats(self.window, detrend)
+        self.reset()
+
+    def reset(self):
+        """
+        Xóa trạng thái, bắt đầu một phiên đo mới.
+        """
+        self.n = 0
+        self.red.clear()
+        self.ir.clear()
+        self._since_update = 0
+        self.spo2 = 0
+        self.r_ratio = 0
+        self.window_samples = 0   # Số mẫu của cửa sổ đã dùng cho giá trị SpO2 hiện tại
+        self.updated_at = -1      # Chỉ số mẫu cuối cùng của cửa sổ đó
+
+    def update(self, red, ir):
+        """
+        Thêm một cặp mẫu RED/IR.
+        Returns:
+            bool: True nếu SpO2 vừa được cập nhật.
+        """
+        index = self.n
+        self.n = index + 1
+        self.red.push(index, red, self.n)
+        self.ir.push(index, ir, self.n)
+        self._since_update += 1
+        if self._since_update >= self.update_every and self.n >= self.min_samples:
+            return self.compute()
+        return False
+
+    def process_block(self, red, ir, n=None):
+        """
+        Thêm một lô mẫu RED/IR.
+        Returns:
+            bool: True nếu SpO2 được cập nhật ít nhất một lần trong lô.
+        """
+        if n is None:
+            n = len(ir)
+        updated = False
+        for i in range(n):
+            if self.update(red[i], ir[i]):
+                updated = True
+        return updated
+
+    def compute(self):
+        """
+        Tính SpO2 từ cửa sổ hiện tại (có thể gọi trực tiếp, ví dụ sau mỗi nhịp tim).
+        Returns:
+            bool: True nếu tính được giá trị hợp lệ.
+        """
+        self._since_update = 0
+        if self.n == 0:
+            return False
+        red_dc = self.red.dc(self.n)
+        ir_dc = self.ir.dc(self.n)
+        red_ac = self.red.ac()
+        ir_ac = self.ir.ac()
+        if red_dc <= 0 or ir_dc <= 0 or ir_ac <= 0:
+            return False
+        self.r_ratio = (red_ac / red_dc) / (ir_ac / ir_dc)
+        spo2 = self.coeff_a - self.coeff_b * self.r_ratio
+        self.spo2 = max(0, min(spo2, 100))
+        self.window_samples = min(self.n, self.window)
+        self.updated_at = self.n - 1
+        return True
+
+    def window_seconds(self):
+        """
+        Returns:
+            float: Độ dài (giây) của cửa sổ đã dùng cho giá trị SpO2 hiện tại.
+        """
+        return self.window_samples / self.sample_rate
@@ -0,0 +1,191 @@
+# text_cache.py
+# Bộ đệm chữ cho OLED: glyph của font (định dạng font_to_py, như font8) và các nhãn cố định được
+# dựng thành framebuffer một lần rồi chỉ blit; trường số chỉ vẽ lại khi giá trị thay đổi.
+import framebuf
+
+DEFAULT_PRELOAD = "0123456789.-%/: "
+
+
+class Label:
+    def __init__(self, cache, text):
+        """
+        Nhãn cố định đã dựng sẵn thành framebuffer.
+        Args:
+            cache (TextCache): Bộ đệm glyph.
+            text (str): Nội dung nhãn.
+        """
+        self.text = text
+        self.height = cache.height
+        self.width = max(1, cache.text_width(text))
+        self.buffer = bytearray(self.width * ((self.height + 7) // 8))
+        self.fb = framebuf.FrameBuffer(self.buffer, self.width, self.height, framebuf.MONO_VLSB)
+        cache.draw_text(self.fb, text, 0, 0)
+
+    def draw(self, target, x, y):
+        """
+        Returns:
+            int: Tọa độ x ngay sau nhãn.
+        """
+        target.blit(self.fb, x, y)
+        return x + self.width
+
+
+class NumberField:
+    def __init__(self, cache, max_chars=5, decimals=0):
+        """
+        Trường số hiển thị: chỉ dựng lại framebuffer của trường khi giá trị (sau làm tròn) thay đổi,
+        không tạo chuỗi mới.
+        Args:
+            cache (TextCache): Bộ đệm glyph.
+            max_chars (int, optional): Số ký tự tối đa (kể cả dấu '-' và '.'). Mặc định là 5.
+            decimals (int, optional): Số chữ số thập phân. Mặc định là 0.
+        """
+        self.cache = cache
+        self.max_chars = max_chars
+        self.decimals = decimals
+        self._scale = 10 ** decimals
+        self.height = cache.height
+        self._box = max_chars * cache.max_width
+        self.buffer = bytearray(self._box * ((self.height + 7) // 8))
+        self.fb = framebuf.FrameBuffer(self.buffer, self._box, self.height, framebuf.MONO_VLSB)
+        self._digits = bytearray(max_chars)
+        self.width = 0
+        self.value = None
+        self._key = 0
+        self._valid = False
+        self.renders = 0   # Số lần trường thực sự được vẽ lại
+
+    def set(self, value):
+        """
+        Cập nhật giá trị.
+        Args:
+            value (float/int/None): Giá trị mới (None hiển thị "--").
+        Returns:
+            bool: True nếu trường được vẽ lại.
+        """
+        if value is None:
+            key = None
+        else:
+            key = int(value * self._scale + (0.5 if value >= 0 else -0.5))
+        if self._valid and key == self._key:
+            return False
+        self._key = key
+        self._valid = True
+        self.value = value
+        self._render(key)
+        return True
+
+    def _render(self, key):
+        cache = self.cache
+        fb = self.fb
+        fb.fill(0)
+        if key is None:
+            x = cache.blit_char(fb, '-', 0, 0)
+            self.width = cache.blit_char(fb, '-', x, 0)
+            self.renders += 1
+            return
+        # Tách chữ số từ phải sang trái vào bộ đệm cấp phát sẵn
+        digits = self._digits
+        v = -key if key < 0 else key
+        n = 0
+        while n < self.max_chars:
+            v, d = divmod(v, 10)
+            digits[n] = d
+            n += 1
+            if v == 0 and n > self.decimals:
+                break
+        x = 0
+        if key < 0:
+            x = cache.blit_char(fb, '-', x, 0)
+        glyphs = cache.digit_glyphs
+        for i in range(n - 1, -1, -1):
+            if i == self.decimals - 1:
+                x = cache.blit_char(fb, '.', x, 0)
+            g, w = glyphs[digits[i]]
+            fb.blit(g, x, 0)
+            x += w
+        self.width = x
+        self.renders += 1
+
+    def draw(self, target, x, y):
+        """
+        Returns:
+            int: Tọa độ x ngay sau trường.
+        """
+        target.blit(self.fb, x, y)
+        return x + self.width
+
+
+class TextCache:
+    def __init__(self, font, preload=DEFAULT_PRELOAD):
+        """
+        Khởi tạo bộ đệm glyph cho một font.
+        Args:
+            font (module): Font dạng font_to_py (có height(), max_width(), hmap(), reverse(), get_ch()).
+            preload (str, optional): Các ký tự dựng sẵn khi khởi tạo. Mặc định là chữ số và dấu.
+        """
+        self.font = font
+        self.height = font.height()
+        self.max_width = font.max_width()
+        if font.hmap():
+            self._map = framebuf.MONO_HMSB if font.reverse() else framebuf.MONO_HLSB
+        else:
+            self._map = framebuf.MONO_VLSB
+        self._glyphs = {}
+        self._labels = {}
+        for ch in preload:
+            self.glyph(ch)
+        self.digit_glyphs = [self.glyph(ch) for ch in "0123456789"]
+
+    def glyph(self, ch):
+        """
+        Lấy glyph của một ký tự (dựng framebuffer ở lần đầu).
+        Returns:
+            tuple: (FrameBuffer, chiều rộng).
+        """
+        g = self._glyphs.get(ch)
+        if g is None:
+            data, height, width = self.font.get_ch(ch)
+            g = (framebuf.FrameBuffer(bytearray(data), width, height, self._map), width)
+            self._glyphs[ch] = g
+        return g
+
+    def blit_char(self, target, ch, x, y):
+        g, w = self.glyph(ch)
+        target.blit(g, x, y)
+        return x + w
+
+    def text_width(self, text):
+        width = 0
+        for ch in text:
+            width += self.glyph(ch)[1]
+        return width
+
+    def draw_text(self, target, text, x, y):
+        """
+        Vẽ chuỗi bất kỳ bằng các glyph đã dựng sẵn (dùng cho chuỗi có sẵn, ví dụ thời gian của bản ghi).
+        Returns:
+            int: Tọa độ x ngay sau chuỗi.
+        """
+        for ch in text:
+            x = self.blit_char(target, ch, x, y)
+        return x
+
+    def label(self, text):
+        """
+        Lấy nhãn cố định đã dựng sẵn (dựng ở lần gọi đầu tiên với cùng nội dung).
+        Returns:
+            Label: Nhãn.
+        """
+        lbl = self._labels.get(text)
+        if lbl is None:
+            lbl = self._labels[text] = Label(self, text)
+        return lbl
+
+    def number(self, max_chars=5, decimals=0):
+        """
+        Tạo một trường số dùng các glyph của bộ đệm này.
+        Returns:
+            NumberField: Trường số.
+        """
+        return NumberField(self, max_chars, decimals)
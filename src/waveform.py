@@ -0,0 +1,175 @@
+# waveform.py
+# Đồ thị cuộn cho OLED: mỗi điểm mới chỉ cuộn vùng đồ thị sang trái và vẽ thêm đoạn mới nhất,
+# tỉ lệ trục tung tra bảng (LUT) và chỉ tính lại khi dải giá trị thay đổi.
+import framebuf
+from ring_buffer import RingBuffer
+
+LUT_BINS = 256
+
+
+class ScrollingPlot:
+    def __init__(self, width=128, height=64, lo=None, hi=None, dashed=False):
+        """
+        Khởi tạo đồ thị cuộn.
+        Args:
+            width (int, optional): Chiều rộng vùng đồ thị (pixel, cũng là số điểm hiển thị). Mặc định là 128.
+            height (int, optional): Chiều cao vùng đồ thị (pixel). Mặc định là 64.
+            lo (int, optional): Giá trị nhỏ nhất của trục tung. Mặc định là None (tự co giãn).
+            hi (int, optional): Giá trị lớn nhất của trục tung. Mặc định là None (tự co giãn).
+            dashed (bool, optional): Vẽ nét đứt (bỏ qua mỗi đoạn thứ hai). Mặc định là False.
+        """
+        self.width = width
+        self.height = height
+        self.dashed = dashed
+        self.autoscale = lo is None or hi is None
+        self.buffer = bytearray(width * ((height + 7) // 8))
+        self.fb = framebuf.FrameBuffer(self.buffer, width, height, framebuf.MONO_VLSB)
+        # Thêm một điểm để đoạn đang cuộn ra khỏi cột 0 vẫn được vẽ lại đúng
+        self.history = RingBuffer(width + 1, 'i')
+        self._lut = bytearray(LUT_BINS)
+        self.rescales = 0   # Số lần phải tính lại LUT và vẽ lại toàn bộ
+        self._set_range(lo if lo is not None else 0, hi if hi is not None else 1)
+
+    def _set_range(self, lo, hi):
+        # Dựng bảng tra: giá trị v -> bin (v - lo) >> shift -> tọa độ y
+        lo = int(lo)
+        span = max(1, int(hi) - lo)
+        shift = 0
+        while (span >> shift) >= LUT_BINS:
+            shift += 1
+        self.lo = lo
+        self.hi = lo + span
+        self._shift = shift
+        self._max_bin = span >> shift
+        h = self.height - 1
+        half = (1 << shift) >> 1
+        lut = self._lut
+        for q in range(self._max_bin + 1):
+            v = (q << shift) + half
+            y = h - (v * h) // span
+            lut[q] = y if y > 0 else 0
+        self.rescales += 1
+
+    def _y(self, value):
+        q = (int(value) - self.lo) >> self._shift
+        if q < 0:
+            q = 0
+        elif q > self._max_bin:
+            q = self._max_bin
+        return self._lut[q]
+
+    def _fit_range(self, lo, hi):
+        # Mở rộng dải thêm 10% mỗi phía để không phải co giãn lại với từng điểm vượt ngưỡng
+        margin = max(1, (hi - lo) // 10)
+        self._set_range(lo - margin, hi + margin)
+
+    def _redraw(self):
+        fb = self.fb
+        fb.fill(0)
+        hist = self.history
+        n = len(hist)
+        x0 = self.width - n   # Có thể là -1 khi lịch sử đầy, line() tự cắt phần ngoài vùng vẽ
+        first = hist.total - n
+        prev_y = self._y(hist[0]) if n else 0
+        for i in range(1, n):
+            y = self._y(hist[i])
+            if not self.dashed or (first + i) % 2 == 0:
+                fb.line(x0 + i - 1, prev_y, x0 + i, y, 1)
+            prev_y = y
+
+    def _check_range(self, value):
+        # Trả về True nếu dải trục tung đã đổi (cần vẽ lại toàn bộ)
+        if not self.autoscale:
+            return False
+        v = int(value)
+        hist = self.history
+        if len(hist) == 1:
+            self._fit_range(v, v + 1)
+            return True
+        if v < self.lo or v > self.hi:
+            lo, hi = self._hist_min_max()
+            self._fit_range(lo, hi)
+            return True
+        # Mỗi khi cuộn hết một màn hình, co dải lại nếu tín hiệu chỉ còn chiếm dưới một nửa
+        if hist.total % self.width == 0:
+            lo, hi = self._hist_min_max()
+            if (hi - lo) * 2 < self.hi - self.lo:
+                self._fit_range(lo, hi)
+                return True
+        return False
+
+    def _hist_min_max(self):
+        view = self.history.view()
+        return min(view), max(view)
+
+    def push(self, value):
+        """
+        Thêm một điểm: cuộn vùng đồ thị sang trái một cột và vẽ đoạn mới nhất.
+        Args:
+            value (float/int): Giá trị mới.
+        Returns:
+            bool: True nếu dải trục tung thay đổi và đồ thị được vẽ lại toàn bộ.
+        """
+        hist = self.history
+        prev = hist[-1] if len(hist) else None
+        hist.append(int(value))
+        if self._check_range(value):
+            self._redraw()
+            return True
+        fb = self.fb
+        w = self.width
+        fb.scroll(-1, 0)
+        fb.vline(w - 1, 0, self.height, 0)  # scroll() không xóa cột vừa được giải phóng
+        if prev is not None and (not self.dashed or hist.total % 2 == 1):
+            fb.line(w - 2, self._y(prev), w - 1, self._y(value), 1)
+        return False
+
+    def push_many(self, values, n=None):
+        """
+        Thêm nhiều điểm (ví dụ các mẫu IR mới từ lần vẽ trước), cuộn một lần n cột.
+        Args:
+            values (list/array/memoryview): Các giá trị mới.
+            n (int, optional): Số điểm. Mặc định là len(values).
+        """
+        if n is None:
+            n = len(values)
+        if n == 0:
+            return
+        hist = self.history
+        had_prev = len(hist) > 0
+        redraw = n >= self.width   # Cả màn hình đã được thay mới
+        for i in range(n):
+            hist.append(int(values[i]))
+            if self._check_range(values[i]):
+                redraw = True
+        if redraw:
+            self._redraw()
+            return
+        fb = self.fb
+        w = self.width
+        fb.scroll(-n, 0)
+        fb.fill_rect(w - n, 0, n, self.height, 0)
+        total = hist.total
+        start = 0 if had_prev else 1
+        for i in range(start, n):
+            # Đoạn nối điểm thứ (n - i) tính từ cuối với điểm trước nó
+            k = n - i
+            if not self.dashed or (total - k) % 2 == 0:
+                fb.line(w - k - 1, self._y(hist[-k - 1]), w - k, self._y(hist[-k]), 1)
+
+    def clear(self):
+        """
+        Xóa đồ thị và lịch sử điểm.
+        """
+        self.history.clear()
+        self.fb.fill(0)
+
+    def draw(self, target, x=0, y=0):
+        """
+        Chép vùng đồ thị lên framebuffer đích (pixel 0 trong suốt, có thể chồng nhiều đồ thị).
+        Args:
+            target (FrameBuffer): Framebuffer đích (ví dụ màn hình SSD1306).
+            x (int, optional): Tọa độ x. Mặc định là 0.
+            y (int, optional): Tọa độ y. Mặc định là 0.
+        """
+        target.blit(self.fb, x, y, 0)
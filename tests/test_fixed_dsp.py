@@ -0,0 +1,52 @@
+# test_fixed_dsp.py
+# Kiểm tra cửa sổ trượt và giới hạn số nguyên nhỏ của fixed_dsp.
+# Chạy: python -m pytest tests
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'src'))
+
+from fixed_dsp import (_FixedChannel, FixedSpO2Engine, FixedIIR, MAX_WINDOW, MAX_DETREND, SAMPLE_BITS, Q,
+                       ROUND)
+
+WINDOW = 10
+DETREND = 3
+SMALL_INT = 1 << 30     # Số nguyên nhỏ của MicroPython trên cổng 32-bit
+
+
+def _check_monotonic(sign):
+    # Như tests/test_spo2_engine.py: x = i^3 sau khi bỏ đường nền là chuỗi đơn điệu thật sự
+    channel = _FixedChannel(WINDOW, DETREND)
+    raw = []
+    detrended = []
+    for i in range(5 * WINDOW):
+        raw.append(50000 + sign * i ** 3)
+        channel.push(i, raw[-1], i + 1)
+        assert channel.sum == sum(raw[-WINDOW:])
+        if i >= DETREND - 1:
+            detrended.append(DETREND * raw[i - DETREND // 2] - sum(raw[i - DETREND + 1:i + 1]))
+            window = detrended[-WINDOW:]
+            assert channel.ac() == max(window) - min(window), (i, channel.ac())
+        assert channel._max_size <= WINDOW and channel._min_size <= WINDOW
+
+
+def test_strictly_decreasing():
+    _check_monotonic(1)
+
+
+def test_strictly_increasing():
+    _check_monotonic(-1)
+
+
+def test_window_sum_fits_small_int():
+    engine = FixedSpO2Engine(sample_rate=400, window_seconds=60)
+    assert engine.window == MAX_WINDOW
+    assert ((1 << SAMPLE_BITS) - 1) * engine.window < SMALL_INT
+    assert 2 * ((1 << SAMPLE_BITS) - 1) * MAX_DETREND < SMALL_INT
+    assert engine.red.detrend <= MAX_DETREND
+
+
+def test_iir_product_fits_small_int():
+    iir = FixedIIR(1.0)
+    step = ((1 << SAMPLE_BITS) - 1) << Q
+    assert step * iir.a + ROUND < SMALL_INT
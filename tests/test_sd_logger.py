@@ -0,0 +1,135 @@
+# test_sd_logger.py
+# Kiểm tra định dạng log của sd_logger: đọc lại, khối cuối ghi dở, mở lại để ghi tiếp, xoay vòng file
+# và lỗi ghi giữa chừng.
+# Chạy: python -m pytest tests
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'src'))
+
+from sd_logger import SDLogger, BLOCK_SIZE, RECORDS_PER_BLOCK, read_records, scan_file
+
+
+class _Card:
+    # Thay cho MicroSD: thư mục tạm đã "mount"
+    def __init__(self, root):
+        self.mount_point = str(root)
+
+    def is_mounted(self):
+        return True
+
+    def path(self, filename):
+        return self.mount_point + "/" + filename
+
+
+class _FailingFile:
+    # Ghi được một phần rồi báo lỗi, như thẻ nhớ bị rút hoặc mất điện giữa lần ghi
+    def __init__(self, f, partial):
+        self.f = f
+        self.partial = partial
+
+    def write(self, data):
+        self.f.write(bytes(data[:self.partial]))
+        raise OSError(5)
+
+    def flush(self):
+        self.f.flush()
+
+    def close(self):
+        self.f.close()
+
+
+def _log(logger, start, n):
+    for k in range(start, start + n):
+        logger.log(k, 1000 + k, 2000 + k, 75, 97)
+
+
+def _files(logger):
+    return sorted(os.path.join(logger.directory, name) for name in os.listdir(logger.directory))
+
+
+def _records(logger):
+    return [r for path in _files(logger) for r in read_records(path)]
+
+
+def test_round_trip(tmp_path):
+    logger = SDLogger(_Card(tmp_path))
+    assert logger.open()
+    _log(logger, 0, 3 * RECORDS_PER_BLOCK + 5)
+    logger.close()
+    records = _records(logger)
+    assert [r[1] for r in records] == list(range(3 * RECORDS_PER_BLOCK + 5))
+    assert records[7][1:] == (7, 1007, 2007, 75.0, 97.0)
+    assert [r[0] for r in records[::RECORDS_PER_BLOCK]] == [0, 1, 2, 3]
+    assert os.path.getsize(_files(logger)[0]) == 4 * BLOCK_SIZE
+
+
+def test_torn_tail_starts_new_file(tmp_path):
+    logger = SDLogger(_Card(tmp_path))
+    logger.open()
+    _log(logger, 0, 2 * RECORDS_PER_BLOCK)
+    logger.close()
+    path = _files(logger)[0]
+    with open(path, 'ab') as f:
+        f.write(b'\x00' * 100)          # Khối cuối ghi dở do mất điện
+    blocks, info = scan_file(path)
+    assert len(blocks) == 2 and info['torn_bytes'] == 100
+    logger = SDLogger(_Card(tmp_path))
+    logger.open()
+    assert logger.file_index == 1 and logger.seq == 2
+    _log(logger, 100, RECORDS_PER_BLOCK)
+    logger.close()
+    assert [r[0] for r in read_records(_files(logger)[1])][0] == 2
+
+
+def test_reopen_resumes_and_reuses_empty_file(tmp_path):
+    logger = SDLogger(_Card(tmp_path))
+    logger.open()
+    _log(logger, 0, RECORDS_PER_BLOCK)
+    logger.close()
+    # File tiếp tục được nếu kết thúc bằng khối hợp lệ
+    logger = SDLogger(_Card(tmp_path))
+    logger.open()
+    assert logger.file_index == 0 and logger.seq == 1
+    logger.close()
+    # Khối ghi dở, rồi nhiều lần khởi động lại trước lần flush đầu tiên
+    with open(_files(logger)[0], 'ab') as f:
+        f.write(b'\x01' * 10)
+    for _ in range(3):
+        logger = SDLogger(_Card(tmp_path))
+        logger.open()
+        logger.close()
+    assert len(_files(logger)) == 2 and os.path.getsize(_files(logger)[1]) == 0
+    logger = SDLogger(_Card(tmp_path))
+    logger.open()
+    assert logger.file_index == 1 and logger.seq == 1
+    _log(logger, 0, RECORDS_PER_BLOCK)
+    logger.close()
+    assert [r[0] for r in _records(logger)[::RECORDS_PER_BLOCK]] == [0, 1]
+
+
+def test_rotation(tmp_path):
+    logger = SDLogger(_Card(tmp_path), max_file_bytes=2 * BLOCK_SIZE)
+    logger.open()
+    _log(logger, 0, 5 * RECORDS_PER_BLOCK)
+    logger.close()
+    files = _files(logger)
+    assert [os.path.getsize(p) for p in files] == [2 * BLOCK_SIZE, 2 * BLOCK_SIZE, BLOCK_SIZE]
+    assert [r[0] for r in _records(logger)[::RECORDS_PER_BLOCK]] == [0, 1, 2, 3, 4]
+
+
+def test_write_error_moves_to_new_file(tmp_path):
+    logger = SDLogger(_Card(tmp_path))
+    logger.open()
+    _log(logger, 0, RECORDS_PER_BLOCK)
+    logger.flush()
+    _log(logger, 100, 2 * RECORDS_PER_BLOCK)
+    logger._file = _FailingFile(logger._file, 300)
+    assert logger.flush() == 0
+    assert logger.write_errors == 1 and logger.file_index == 1
+    logger.close()
+    files = _files(logger)
+    blocks, info = scan_file(files[0])
+    assert len(blocks) == 1 and info['torn_bytes'] == 300
+    assert [r[0] for r in read_records(files[1])][::RECORDS_PER_BLOCK] == [1, 2]
+    assert os.path.getsize(files[1]) == 2 * BLOCK_SIZE
@@ -0,0 +1,37 @@
+# test_spo2_engine.py
+# Kiểm tra thống kê cửa sổ trượt của spo2_engine với chuỗi đơn điệu (trường hợp hàng đợi max/min đầy nhất).
+# Chạy: python -m pytest tests
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'src'))
+
+from spo2_engine import _ChannelStats
+
+WINDOW = 10
+DETREND = 3
+
+
+def _check_monotonic(sign):
+    # x = i^3 trừ trung bình đối xứng 3 mẫu còn -2i: tín hiệu sau khi bỏ đường nền đơn điệu thật sự
+    stats = _ChannelStats(WINDOW, DETREND)
+    raw = []
+    detrended = []
+    for i in range(5 * WINDOW):
+        raw.append(float(sign * i ** 3))
+        stats.push(i, raw[-1], i + 1)
+        if i >= DETREND - 1:
+            c = i - DETREND // 2
+            detrended.append(raw[c] - sum(raw[i - DETREND + 1:i + 1]) / DETREND)
+            window = detrended[-WINDOW:]
+            assert abs(stats.ac() - (max(window) - min(window))) < 1e-6, (i, stats.ac())
+        assert stats._max._size <= WINDOW
+        assert stats._min._size <= WINDOW
+
+
+def test_strictly_decreasing():
+    _check_monotonic(1)
+
+
+def test_strictly_increasing():
+    _check_monotonic(-1)
@@ -0,0 +1,476 @@
+# batch_analyze.py
+# Phân tích hàng loạt các phiên đo đã ghi (.raw của RecordingI2C, .bin của SDLogger) trên máy tính:
+# cùng chuỗi xử lý với thiết bị (Wiener -> Kalman -> SpO2, Wiener -> BeatDetector, đặc trưng NN) nhưng
+# vector hóa bằng numpy trên toàn bộ bản ghi, nhiều phiên chạy song song bằng ProcessPoolExecutor.
+# Kết quả theo từng cửa sổ (HR, SpO2, R, đặc trưng) được ghi dần ra định dạng cột:
+#   - thư mục: mỗi cột một file nhị phân <tên>.bin + schema.json (đọc lại bằng read_columns());
+#   - file .parquet nếu có pyarrow.
+# Chạy: python tools/batch_analyze.py <thư mục log | file ...> -o results [--jobs N] [--step 1] [--scaling]
+import argparse
+import json
+import math
+import os
+import struct
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'src'))
+
+import numpy as np
+from numpy.lib.stride_tricks import sliding_window_view
+
+from beat_detector import BeatDetector
+from fifo_recorder import REC_MAGIC, REC_HEADER_FORMAT, REC_HEADER_SIZE
+from filters import KalmanFilter, StreamingWiener
+from nn_model import FEATURE_NAMES, extract_features_batch
+from sd_logger import MAGIC as LOG_MAGIC, BLOCK_SIZE, HEADER_SIZE, check_block
+from spo2_engine import SpO2Engine
+
+EXTENSIONS = ('.raw', '.bin')
+RECORD_DTYPE = np.dtype([('t', '<u4'), ('red', '<i4'), ('ir', '<i4'), ('hr', '<u2'), ('spo2', '<u2')])
+MAX_GROWTH = 1e6    # Giới hạn a^-m trong các phép lọc đệ quy vector hóa (giữ độ chính xác float64)
+
+# Các cột kết quả và kiểu dữ liệu
+COLUMNS = (('session', 'int32'), ('t_s', 'float32'), ('hr', 'float32'), ('spo2', 'float32'),
+           ('r_ratio', 'float32'), ('beats', 'int32'), ('ref_hr', 'float32'), ('ref_spo2', 'float32')) + \
+          tuple((name, 'float32') for name in FEATURE_NAMES)
+
+
+def load_session(path):
+    """
+    Nạp một bản ghi vào mảng numpy (giải mã vector hóa, không lặp theo mẫu).
+    Args:
+        path (str): File .raw (RecordingI2C) hoặc .bin (SDLogger).
+    Returns:
+        dict: 'rate', 'red', 'ir' (int64) và 'ref_hr', 'ref_spo2' (giá trị thiết bị đã ghi, None với .raw).
+    Raises:
+        ValueError: Nếu file không đúng định dạng.
+    """
+    with open(path, 'rb') as f:
+        data = f.read()
+    if data[:4] == REC_MAGIC:
+        _, rate, bps = struct.unpack(REC_HEADER_FORMAT, data[:REC_HEADER_SIZE])
+        n = (len(data) - REC_HEADER_SIZE) // bps
+        raw = np.frombuffer(data, np.uint8, n * bps, REC_HEADER_SIZE).reshape(n, bps).astype(np.int64)
+        red = ((raw[:, 0] << 16) | (raw[:, 1] << 8) | raw[:, 2]) & 0x3FFFF
+        ir = ((raw[:, 3] << 16) | (raw[:, 4] << 8) | raw[:, 5]) & 0x3FFFF
+        return {'rate': rate, 'red': red, 'ir': ir, 'ref_hr': None, 'ref_spo2': None}
+    if data[:4] != LOG_MAGIC:
+        raise ValueError("Unknown recording format: {}".format(path))
+    parts = []
+    mv = memoryview(data)
+    for off in range(0, len(data) - BLOCK_SIZE + 1, BLOCK_SIZE):
+        info = check_block(mv[off:off + BLOCK_SIZE])
+        if info is not None:
+            parts.append(np.frombuffer(data, RECORD_DTYPE, info[1], off + HEADER_SIZE))
+    rec = np.concatenate(parts) if parts else np.zeros(0, RECORD_DTYPE)
+    # Tần số lấy mẫu từ trung vị khoảng cách ticks_ms (không bị ảnh hưởng bởi khối hỏng bị bỏ qua)
+    rate = 100
+    if len(rec) > 1:
+        dt = np.median(np.diff(rec['t'].astype(np.int64)) & 0xFFFFFFFF)
+        if dt > 0:
+            rate = int(round(1000 / dt))
+    return {'rate': rate, 'red': rec['red'].astype(np.int64), 'ir': rec['ir'].astype(np.int64),
+            'ref_hr': rec['hr'] / 10.0, 'ref_spo2': rec['spo2'] / 10.0}
+
+
+def ema(x, alpha, y0):
+    """
+    y_j = y_(j-1) + alpha * (x_j - y_(j-1)) với y_(-1) = y0, vector hóa theo khối
+    (cùng cách làm với KalmanFilter._steady_block_np, tính trên độ lệch so với đầu khối).
+    """
+    x = np.asarray(x, dtype=np.float64)
+    n = len(x)
+    out = np.empty(n)
+    a = 1.0 - alpha
+    chunk = max(1, int(math.log(MAX_GROWTH) / -math.log(a))) if 0 < a < 1 else n
+    y = float(y0)
+    for c0 in range(0, n, max(chunk, 1)):
+        z = x[c0:c0 + chunk] - y
+        grow = a ** np.arange(1, len(z) + 1, dtype=np.float64)
+        out[c0:c0 + len(z)] = y + grow * (alpha * np.cumsum(z / grow))
+        y = out[c0 + len(z) - 1]
+    return out
+
+
+def decaying_max(x, decay):
+    """
+    env_j = max(x_j, env_(j-1) * decay) với env_(-1) = 0 (đường bao của BeatDetector), vector hóa theo khối.
+    """
+    n = len(x)
+    out = np.empty(n)
+    chunk = max(1, int(math.log(1e100) / -math.log(decay))) if 0 < decay < 1 else n
+    env = 0.0
+    for c0 in range(0, n, chunk):
+        z = x[c0:c0 + chunk]
+        grow = decay ** np.arange(1, len(z) + 1, dtype=np.float64)
+        out[c0:c0 + len(z)] = grow * np.maximum(env, np.maximum.accumulate(z / grow))
+        env = out[c0 + len(z) - 1]
+    return out
+
+
+def moving_stats(x, window):
+    # Trung bình và phương sai của `window` mẫu gần nhất (ít hơn ở đầu chuỗi), tính quanh x[0]
+    d = np.asarray(x, dtype=np.float64) - float(x[0])
+    n = len(d)
+    c1 = np.concatenate(([0.0], np.cumsum(d)))
+    c2 = np.concatenate(([0.0], np.cumsum(d * d)))
+    hi = np.arange(1, n + 1)
+    lo = np.maximum(0, hi - window)
+    cnt = hi - lo
+    mean = (c1[hi] - c1[lo]) / cnt
+    var = (c2[hi] - c2[lo]) / cnt - mean * mean
+    return mean + float(x[0]), var, cnt
+
+
+def wiener(x, window=5, noise=None, noise_alpha=0.01):
+    """
+    StreamingWiener.process_block trên cả bản ghi: mẫu ra thứ i là mẫu ở giữa cửa sổ kết thúc tại i.
+    """
+    x = np.asarray(x, dtype=np.float64)
+    mean, var, cnt = moving_stats(x, window)
+    if noise is None:
+        noise_est = ema(var, noise_alpha, 0.0)
+    else:
+        noise_est = np.full(len(x), float(noise))
+    center = x[np.arange(len(x)) - cnt // 2]
+    with np.errstate(divide='ignore', invalid='ignore'):
+        gain = np.where((var > noise_est) & (var > 0), 1 - noise_est / var, 0.0)
+    return mean + gain * (center - mean)
+
+
+def kalman(x):
+    # Dùng chính KalmanFilter: vài trăm bước đầu từng mẫu đến khi P hội tụ, phần còn lại vector hóa
+    x = np.asarray(x, dtype=np.float64)
+    return KalmanFilter().update_block(x, np.empty(len(x)))
+
+
+def detect_beats(ir, rate, avg_beats=4):
+    """
+    BeatDetector trên cả bản ghi: lọc DC/thông thấp/đường bao vector hóa, chỉ các vùng vượt ngưỡng
+    (khoảng một vùng mỗi nhịp) được duyệt tuần tự để áp dụng thời gian trơ.
+    Returns:
+        tuple: (chỉ số mẫu phát hiện nhịp, HR sau nhịp đó hoặc nan nếu RR ngoài khoảng hợp lệ).
+    """
+    det = BeatDetector(rate, avg_beats=avg_beats)
+    x = np.asarray(ir, dtype=np.float64)
+    n = len(x)
+    if n < 2:
+        return np.zeros(0, np.int64), np.zeros(0)
+    baseline = np.concatenate(([x[0]], ema(x[1:], det.dc_alpha, x[0])))
+    lp = np.concatenate(([x[0]], ema(x[1:], det.lp_alpha, x[0])))
+    ac = det.sign * (lp - baseline)
+    env = decaying_max(ac, det.decay)
+    above = np.zeros(n, bool)
+    warm = det.sample_rate
+    above[warm:] = ac[warm:] > det.threshold_ratio * env[warm:]
+    edges = np.diff(above.astype(np.int8))
+    starts = np.flatnonzero(edges == 1) + 1
+    ends = np.flatnonzero(edges == -1) + 1      # Mẫu đầu tiên dưới ngưỡng: thời điểm báo nhịp
+    starts = starts[:len(ends)]
+    emitted = []
+    peaks = []
+    last = -1
+    for s, e in zip(starts.tolist(), ends.tolist()):
+        peak = s + int(np.argmax(ac[s:e]))
+        if last < 0 or peak - last >= det.refractory:
+            peaks.append(peak)
+            emitted.append(e)
+            last = peak
+    peaks = np.asarray(peaks, np.int64)
+    emitted = np.asarray(emitted, np.int64)
+    hr = np.full(len(peaks), np.nan)
+    if len(peaks) > 1:
+        rr = np.diff(peaks) * 1000 / rate
+        valid = np.flatnonzero((rr >= det.min_rr_ms) & (rr <= det.max_rr_ms))
+        if len(valid):
+            v = rr[valid]
+            c = np.concatenate(([0.0], np.cumsum(v)))
+            q = np.arange(1, len(v) + 1)
+            lo = np.maximum(0, q - avg_beats)
+            hr[valid + 1] = 60000 * (q - lo) / (c[q] - c[lo])
+    return emitted, hr
+
+
+def spo2_series(red, ir, rate, window_seconds=4, update_every=None):
+    """
+    SpO2Engine trên cả bản ghi: DC trên cửa sổ kết thúc tại mỗi lần cập nhật, AC là đỉnh - đáy của tín hiệu
+    đã trừ trung bình trượt đối xứng (đường nền) trên cửa sổ cùng độ dài, trễ detrend // 2 mẫu.
+    Returns:
+        tuple: (số mẫu đã xử lý tại mỗi lần cập nhật, SpO2, R); lần cập nhật không hợp lệ giữ giá trị trước.
+    """
+    eng = SpO2Engine(rate, window_seconds, update_every)
+    n = len(ir)
+    w = eng.window
+    d = eng.ir.detrend
+    updates = np.arange(max(eng.update_every, eng.min_samples), n + 1, eng.update_every)
+    stats = {}
+    for name, x in (('red', red), ('ir', ir)):
+        x = np.asarray(x, dtype=np.float64)
+        dc = np.empty(len(updates))
+        span = np.zeros(len(updates))
+        full = updates >= w
+        for k in np.flatnonzero(~full):     # Các cửa sổ chưa đủ dài ở đầu bản ghi
+            dc[k] = x[:updates[k]].mean()
+        if full.any():
+            dc[full] = sliding_window_view(x, w)[updates[full] - w].mean(axis=1)
+        # y[j]: mẫu ở giữa đoạn trung bình kết thúc tại j + d - 1, trừ đi trung bình của đoạn đó
+        if n >= d:
+            c = np.concatenate(([0.0], np.cumsum(x - x[0])))
+            y = x[d - 1 - d // 2:n - d // 2] - (x[0] + (c[d:] - c[:-d]) / d)
+            last = updates - d                  # Phần tử cuối của y trong cửa sổ tại mỗi lần cập nhật
+            whole = last >= w - 1
+            for k in np.flatnonzero(~whole & (last >= 0)):
+                seg = y[:last[k] + 1]
+                span[k] = seg.max() - seg.min()
+            if whole.any():
+                rows = sliding_window_view(y, w)[last[whole] - w + 1]
+                span[whole] = rows.max(axis=1) - rows.min(axis=1)
+        stats[name] = (dc, span)
+    red_dc, red_ac = stats['red']
+    ir_dc, ir_ac = stats['ir']
+    valid = (red_dc > 0) & (ir_dc > 0) & (ir_ac > 0)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        r = np.where(valid, (red_ac / red_dc) / (ir_ac / ir_dc), np.nan)
+    spo2 = np.clip(eng.coeff_a - eng.coeff_b * r, 0, 100)
+    # Giữ giá trị của lần hợp lệ gần nhất (0 trước lần đầu tiên), như SpO2Engine
+    idx = np.where(valid, np.arange(len(valid)), -1)
+    idx = np.maximum.accumulate(idx) if len(idx) else idx
+    spo2 = np.where(idx >= 0, spo2[np.maximum(idx, 0)], 0.0)
+    r = np.where(idx >= 0, r[np.maximum(idx, 0)], 0.0)
+    return updates, spo2, r
+
+
+def analyze(path, session=0, step_s=1.0, feature_seconds=4, denoise_window=5, hr_avg_beats=4,
+            spo2_window_seconds=4):
+    """
+    Chạy toàn bộ chuỗi xử lý trên một bản ghi.
+    Returns:
+        tuple: (dict cột -> mảng numpy, một hàng mỗi step_s giây; số mẫu của bản ghi).
+    Raises:
+        ValueError: Nếu file không đúng định dạng hoặc có ít hơn 2 mẫu (ví dụ .raw chỉ có header,
+            .bin không có khối hợp lệ).
+    """
+    rec = load_session(path)
+    rate = rec['rate']
+    n = len(rec['ir'])
+    if n < 2 or rate <= 0:
+        raise ValueError("Recording has too few samples ({}) or no sample rate: {}".format(n, path))
+    step = max(1, int(step_s * rate))
+    ends = np.arange(step, n + 1, step)      # Số mẫu đã xử lý tại mỗi hàng kết quả
+    wf = StreamingWiener(denoise_window)
+    red_dn = wiener(rec['red'], wf.window, wf.noise, wf.noise_alpha)
+    ir_dn = wiener(rec['ir'], wf.window, wf.noise, wf.noise_alpha)
+    emitted, beat_hr = detect_beats(ir_dn, rate, hr_avg_beats)
+    red_kf = kalman(red_dn)
+    ir_kf = kalman(ir_dn)
+    updates, spo2, r = spo2_series(red_kf, ir_kf, rate, spo2_window_seconds)
+
+    cols = {}
+    cols['session'] = np.full(len(ends), session, np.int32)
+    cols['t_s'] = (ends / rate).astype(np.float32)
+    # HR của nhịp hợp lệ gần nhất đã được báo trước thời điểm của hàng (emitted < ends)
+    valid = ~np.isnan(beat_hr)
+    k = np.searchsorted(emitted[valid], ends, 'left') - 1
+    cols['hr'] = np.where(k >= 0, beat_hr[valid][np.maximum(k, 0)] if valid.any() else 0.0, 0.0).astype(np.float32)
+    cols['beats'] = np.searchsorted(emitted, ends, 'left').astype(np.int32)
+    u = np.searchsorted(updates, ends, 'right') - 1
+    cols['spo2'] = np.where(u >= 0, spo2[np.maximum(u, 0)] if len(updates) else 0.0, 0.0).astype(np.float32)
+    cols['r_ratio'] = np.where(u >= 0, r[np.maximum(u, 0)] if len(updates) else 0.0, 0.0).astype(np.float32)
+    for name in ('ref_hr', 'ref_spo2'):
+        ref = rec[name]
+        cols[name] = (ref[ends - 1] if ref is not None and len(ends) else np.full(len(ends), np.nan)).astype(np.float32)
+    # Đặc trưng NN trên feature_seconds giây gần nhất của tín hiệu đã khử nhiễu (nan khi chưa đủ dữ liệu)
+    w = int(feature_seconds * rate)
+    feats = np.full((len(ends), len(FEATURE_NAMES)), np.nan)
+    full = np.flatnonzero(ends >= w)
+    if len(full):
+        first = ends[full[0]] - w
+        feats[full] = extract_features_batch(red_dn[first:], ir_dn[first:], w, step, rate)[:len(full)]
+    for i, name in enumerate(FEATURE_NAMES):
+        cols[name] = feats[:, i].astype(np.float32)
+    return cols, n
+
+
+def _worker(args):
+    path, session, options = args
+    t0 = time.perf_counter()
+    cols, n = analyze(path, session, **options)
+    return session, cols, n, time.perf_counter() - t0
+
+
+class ColumnWriter:
+    def __init__(self, path):
+        """
+        Ghi kết quả theo cột, từng lô một (không giữ toàn bộ kết quả trong RAM).
+        Args:
+            path (str): Thư mục đích, hoặc file .parquet (cần pyarrow).
+        Raises:
+            ImportError: Nếu ghi .parquet mà chưa cài pyarrow.
+        """
+        self.path = path
+        self.rows = 0
+        self.sessions = []      # Đường dẫn các phiên theo chỉ số của cột 'session'
+        self._parquet = None
+        self._files = None
+        if path.endswith('.parquet'):
+            try:
+                import pyarrow
+                import pyarrow.parquet
+            except ImportError:
+                raise ImportError("Writing .parquet requires pyarrow (pip install pyarrow); "
+                                  "use a directory output instead")
+            self._pa = pyarrow
+            self._schema = pyarrow.schema([(name, pyarrow.from_numpy_dtype(np.dtype(dt))) for name, dt in COLUMNS])
+            self._parquet = pyarrow.parquet.ParquetWriter(path, self._schema)
+        else:
+            os.makedirs(path, exist_ok=True)
+            self._files = {name: open(os.path.join(path, name + '.bin'), 'wb') for name, _ in COLUMNS}
+
+    def write(self, cols):
+        """
+        Thêm các hàng của một phiên.
+        """
+        count = len(cols['t_s'])
+        if self._parquet is not None:
+            table = self._pa.Table.from_arrays([self._pa.array(cols[name].astype(dt)) for name, dt in COLUMNS],
+                                               schema=self._schema)
+            self._parquet.write_table(table)
+        else:
+            for name, dt in COLUMNS:
+                self._files[name].write(np.ascontiguousarray(cols[name], dtype=np.dtype(dt).newbyteorder('<')).tobytes())
+        self.rows += count
+
+    def close(self):
+        if self._parquet is not None:
+            self._parquet.close()
+            with open(self.path + '.sessions.json', 'w') as f:
+                json.dump(self.sessions, f, indent=1)
+            return
+        for f in self._files.values():
+            f.close()
+        with open(os.path.join(self.path, 'schema.json'), 'w') as f:
+            json.dump({'rows': self.rows, 'columns': [[name, '<' + np.dtype(dt).str[1:]] for name, dt in COLUMNS],
+                       'sessions': self.sessions}, f, indent=1)
+
+
+def read_columns(path, names=None):
+    """
+    Đọc lại thư mục kết quả của ColumnWriter (ánh xạ bộ nhớ, chỉ đọc các cột cần dùng).
+    Args:
+        path (str): Thư mục kết quả.
+        names (list, optional): Các cột cần đọc. Mặc định là tất cả.
+    Returns:
+        tuple: (dict cột -> numpy.memmap, danh sách đường dẫn phiên theo chỉ số cột 'session').
+    """
+    with open(os.path.join(path, 'schema.json')) as f:
+        schema = json.load(f)
+    cols = {}
+    for name, dt in schema['columns']:
+        if names is None or name in names:
+            file = os.path.join(path, name + '.bin')
+            cols[name] = np.memmap(file, dtype=dt, mode='r') if schema['rows'] else np.zeros(0, dt)
+    return cols, schema['sessions']
+
+
+def collect_files(args):
+    files = []
+    for arg in args:
+        if os.path.isdir(arg):
+            files += sorted(os.path.join(arg, name) for name in os.listdir(arg) if name.endswith(EXTENSIONS))
+        else:
+            files.append(arg)
+    return files
+
+
+def run(files, jobs, writer=None, options=None):
+    """
+    Phân tích các phiên song song; kết quả được ghi ngay khi từng phiên xong (thứ tự hoàn thành).
+    Returns:
+        dict: Số phiên, số mẫu, số hàng, thời gian và thông lượng (mẫu/giây), lỗi theo file.
+    """
+    options = options or {}
+    t0 = time.perf_counter()
+    samples = 0
+    rows = 0
+    busy = 0.0
+    errors = {}
+    tasks = [(path, i, options) for i, path in enumerate(files)]
+    if writer is not None:
+        writer.sessions = list(files)
+    with ProcessPoolExecutor(max_workers=jobs) as pool:
+        futures = {pool.submit(_worker, task): task[0] for task in tasks}
+        for fut in as_completed(futures):
+            path = futures[fut]
+            try:
+                session, cols, n, elapsed = fut.result()
+            except Exception as e:     # Một file hỏng không được dừng cả lô
+                errors[path] = "{}: {}".format(type(e).__name__, e)
+                continue
+            samples += n
+            rows += len(cols['t_s'])
+            busy += elapsed
+            if writer is not None:
+                writer.write(cols)
+    wall = time.perf_counter() - t0
+    return {
+        'jobs': jobs,
+        'sessions': len(files) - len(errors),
+        'samples': samples,
+        'rows': rows,
+        'wall_s': round(wall, 3),
+        'samples_per_s': round(samples / wall) if wall else None,
+        'samples_per_s_per_worker': round(samples / busy) if busy else None,
+        'errors': errors,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Vectorized batch analysis of recorded PPG sessions")
+    parser.add_argument('inputs', nargs='+', help="Thư mục log hoặc các file .raw/.bin")
+    parser.add_argument('-o', '--out', default='analysis', help="Thư mục kết quả hoặc file .parquet")
+    parser.add_argument('-j', '--jobs', type=int, default=os.cpu_count() or 1, help="Số tiến trình")
+    parser.add_argument('--step', type=float, default=1.0, help="Khoảng thời gian giữa hai hàng kết quả (giây)")
+    parser.add_argument('--feature-seconds', type=float, default=4, help="Độ dài cửa sổ đặc trưng NN (giây)")
+    parser.add_argument('--scaling', action='store_true',
+                        help="Đo thông lượng với 1, 2, 4... tiến trình (không ghi kết quả)")
+    args = parser.parse_args()
+    files = collect_files(args.inputs)
+    if not files:
+        print("No recordings found")
+        sys.exit(1)
+    options = {'step_s': args.step, 'feature_seconds': args.feature_seconds}
+    if args.scaling:
+        counts = []
+        j = 1
+        while j < args.jobs:
+            counts.append(j)
+            j *= 2
+        counts.append(args.jobs)
+        base = None
+        print("jobs  samples/s  speedup")
+        for jobs in counts:
+            result = run(files, jobs, None, options)
+            base = base or result['samples_per_s']
+            print("{:4d} {:10d} {:8.2f}".format(jobs, result['samples_per_s'], result['samples_per_s'] / base))
+        return
+    try:
+        writer = ColumnWriter(args.out)
+    except ImportError as e:
+        print(e)
+        sys.exit(1)
+    try:
+        result = run(files, args.jobs, writer, options)
+    finally:
+        writer.close()
+    for path, err in result.pop('errors').items():
+        print("Skipped {}: {}".format(path, err))
+    print("Wrote {} rows from {} sessions to {}".format(result['rows'], result['sessions'], args.out))
+    print("{} samples in {} s with {} jobs: {} samples/s ({} per worker)".format(
+        result['samples'], result['wall_s'], result['jobs'], result['samples_per_s'],
+        result['samples_per_s_per_worker']))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,64 @@
+# export_model.py
+# Chuyển mô hình scikit-learn (joblib) sang file trọng số rút gọn int8 cho nn_model.CompactMLP.
+# Chạy trên máy tính: python tools/export_model.py nn_model.pkl nn_model.bin
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'src'))
+
+import joblib
+import numpy as np
+from nn_model import CompactMLP, save_compact_model
+
+
+def model_to_layers(model):
+    """
+    Tách trọng số và tham số chuẩn hóa từ mô hình scikit-learn.
+    Hỗ trợ MLPRegressor, mô hình tuyến tính (coef_/intercept_) và Pipeline có StandardScaler phía trước.
+    Returns:
+        dict: Tham số cho save_compact_model.
+    """
+    params = {}
+    if hasattr(model, 'steps'):
+        for name, step in model.steps[:-1]:
+            if hasattr(step, 'mean_') and hasattr(step, 'scale_'):
+                params['in_mean'] = [float(v) for v in step.mean_]
+                params['in_scale'] = [float(v) for v in step.scale_]
+            else:
+                raise ValueError("Unsupported pipeline step: {}".format(name))
+        model = model.steps[-1][1]
+    if hasattr(model, 'coefs_'):
+        if getattr(model, 'out_activation_', 'identity') != 'identity':
+            raise ValueError("Only regressors with identity output are supported")
+        params['layers'] = [(np.asarray(w).T.tolist(), np.asarray(b).tolist())
+                            for w, b in zip(model.coefs_, model.intercepts_)]
+        params['activation'] = model.activation
+    elif hasattr(model, 'coef_'):
+        coef = np.atleast_2d(model.coef_)
+        intercept = np.atleast_1d(model.intercept_)
+        params['layers'] = [(coef.tolist(), intercept.tolist())]
+        params['activation'] = 'identity'
+    else:
+        raise ValueError("Unsupported model type: {}".format(type(model).__name__))
+    return params
+
+
+def main():
+    if len(sys.argv) != 3:
+        print("Usage: python tools/export_model.py <nn_model.pkl> <nn_model.bin>")
+        sys.exit(1)
+    src, dst = sys.argv[1], sys.argv[2]
+    model = joblib.load(src)
+    size = save_compact_model(dst, **model_to_layers(model))
+
+    # Kiểm tra sai số lượng tử hóa trên đầu vào ngẫu nhiên quanh vùng chuẩn hóa
+    compact = CompactMLP(dst)
+    rng = np.random.default_rng(0)
+    X = rng.normal(np.asarray(compact.in_mean), np.asarray(compact.in_scale), (256, compact.n_features))
+    err = np.abs(compact.predict_batch(X) - model.predict(X))
+    print("Wrote {} ({} bytes, {} features)".format(dst, size, compact.n_features))
+    print("Quantization error: mean {:.4f}, max {:.4f}".format(err.mean(), err.max()))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,58 @@
+# sd_log_to_csv.py
+# Chuyển log nhị phân của SDLogger (ppg0000.bin, ppg0001.bin...) sang CSV, bỏ qua khối hỏng/ghi dở.
+# Chạy trên máy tính: python tools/sd_log_to_csv.py <thư mục log | file.bin ...> <output.csv>
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'src'))
+
+from sd_logger import read_records, scan_file
+
+
+def collect_files(args):
+    files = []
+    for arg in args:
+        if os.path.isdir(arg):
+            files += sorted(os.path.join(arg, name) for name in os.listdir(arg) if name.endswith('.bin'))
+        else:
+            files.append(arg)
+    return files
+
+
+def export(files, out_path):
+    """
+    Ghi các bản ghi của các file log ra một file CSV.
+    Returns:
+        dict: Số bản ghi, số khối hợp lệ/hỏng, số byte ghi dở và số lần đứt đoạn số thứ tự khối.
+    """
+    totals = {'records': 0, 'blocks': 0, 'bad_blocks': 0, 'torn_bytes': 0, 'seq_gaps': 0}
+    last_seq = None
+    with open(out_path, 'w') as out:
+        out.write("file,block,ticks_ms,red,ir,hr,spo2\n")
+        for path in files:
+            _, info = scan_file(path)
+            for key in ('blocks', 'bad_blocks', 'torn_bytes'):
+                totals[key] += info[key]
+            name = os.path.basename(path)
+            for seq, t, red, ir, hr, spo2 in read_records(path):
+                if last_seq is not None and seq != last_seq and seq != last_seq + 1:
+                    totals['seq_gaps'] += 1
+                last_seq = seq
+                out.write("{},{},{},{},{},{:.1f},{:.1f}\n".format(name, seq, t, red, ir, hr, spo2))
+                totals['records'] += 1
+    return totals
+
+
+def main():
+    if len(sys.argv) < 3:
+        print("Usage: python tools/sd_log_to_csv.py <log dir | file.bin ...> <output.csv>")
+        sys.exit(1)
+    files = collect_files(sys.argv[1:-1])
+    totals = export(files, sys.argv[-1])
+    print("Wrote {} records from {} files to {}".format(totals['records'], len(files), sys.argv[-1]))
+    print("Blocks: {} valid, {} bad, {} torn bytes, {} sequence gaps".format(
+        totals['blocks'], totals['bad_blocks'], totals['torn_bytes'], totals['seq_gaps']))
+
+
+if __name__ == "__main__":
+    main()